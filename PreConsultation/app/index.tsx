@@ -18,6 +18,12 @@ import AccessCodeModal from "./access_code";
 
 const BASE_URL = "http://192.168.0.15:8000";
 
+// finalize only queues the report: download-pdf answers 409 until the pdf is ready
+const PDF_READY_MAX_ATTEMPTS = 15;
+const PDF_READY_DEFAULT_WAIT_MS = 2000;
+
+const sleep = (ms: number) => new Promise(resolve => setTimeout(resolve, ms));
+
 type Role = "user" | "ai";
 type Message = { id: string; role: Role; text: string; };
 
@@ -281,10 +287,30 @@ export default function BeginFocus() {
 
             console.log("📂 Saving to:", fileUri);
 
-            const downloadResult = await FileSystem.downloadAsync(
+            // downloadAsync saves whatever body comes back, so check the status before using the file
+            let downloadResult = await FileSystem.downloadAsync(
                 `${BASE_URL}/sessions/${sessionId}/download-pdf`,
                 fileUri
             );
+            for (let attempt = 1; downloadResult.status === 409 && attempt < PDF_READY_MAX_ATTEMPTS; attempt++) {
+                await FileSystem.deleteAsync(fileUri, { idempotent: true });
+                const retryAfter = Number(downloadResult.headers["Retry-After"] ?? downloadResult.headers["retry-after"]);
+                console.log("⏳ Report still being generated, retrying...");
+                await sleep(retryAfter > 0 ? retryAfter * 1000 : PDF_READY_DEFAULT_WAIT_MS);
+                downloadResult = await FileSystem.downloadAsync(
+                    `${BASE_URL}/sessions/${sessionId}/download-pdf`,
+                    fileUri
+                );
+            }
+
+            if (downloadResult.status !== 200) {
+                await FileSystem.deleteAsync(fileUri, { idempotent: true });
+                throw new Error(
+                    downloadResult.status === 409
+                        ? "Report is still being generated"
+                        : `Download failed with status ${downloadResult.status}`
+                );
+            }
 
             console.log("✅ PDF downloaded:", downloadResult.uri);
 
@@ -422,13 +448,13 @@ export default function BeginFocus() {
                 const finalMsg: Message = {
                     id: String(Date.now()),
                     role: "ai",
-                    text: "✅ Session completed! Your report has been generated and sent to your doctor. You can download a copy for yourself using the button below."
+                    text: "✅ Session completed! Your report is being generated and sent to your doctor. You can download a copy for yourself using the button below."
                 };
                 setMessages(prev => [...prev, finalMsg]);
 
                 Alert.alert(
                     "✅ Session Complete!",
-                    `Your symptom report has been generated.\n\n` +
+                    `Your symptom report is being generated.\n\n` +
                     `📄 ${collectedSymptoms.length} symptoms recorded\n` +
                     `📁 Report sent to your doctor\n` +
                     `📥 Use the "Download Report" button to save a copy\n\n` +
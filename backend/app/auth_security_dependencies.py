@@ -6,6 +6,7 @@ from sqlalchemy.orm import Session
 from backend.app.database import get_db
 from backend.app import model
 from backend.services.auth_service import SECRET_KEY, ALGORITHM
+from backend.services.principal_cache import principal_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
@@ -13,6 +14,12 @@ def get_current_doctor(
         token: str = Depends(oauth2_scheme),
         db: Session = Depends(get_db)
 ):
+    #a token seen before skips the jwt decode and the doctor select,
+    #the cached copy is attached to this request's session without a query
+    cached = principal_cache.get(token)
+    if cached is not None:
+        return db.merge(cached, load=False)
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         doctor_id: str = payload.get("sub")
@@ -26,6 +33,7 @@ def get_current_doctor(
         if not doctor:
             raise HTTPException(status_code=404, detail="Doctor not found")
 
+        principal_cache.put(token, doctor, payload.get("exp"))
         return doctor
     except JWTError:
         raise HTTPException(
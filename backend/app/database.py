@@ -1,21 +1,114 @@
 from sqlalchemy import create_engine
 import os
+import time
+import threading
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 
+"""
+    engines and session factories. writes and anything that must read its own
+    writes go to the primary (get_db / get_async_db). read-only routes that can
+    live with replication lag (chat history, pdf download, dashboards) use
+    get_read_db, which goes to DB_READ_HOST when it is set and falls back to
+    the primary engine otherwise.
+    every pool is sized from DB_POOL_* and counts checkouts, time spent waiting
+    for a free connection and timeouts, see pool_stats().
+    """
 
 DB_USER = os.getenv("DB_USER", "root")
 DB_PASSWORD = os.getenv("DB_PASSWORD", "")
 DB_HOST = os.getenv("DB_HOST", "localhost")
+DB_READ_HOST = os.getenv("DB_READ_HOST", "")  #read replica, empty sends reads to DB_HOST
 DB_NAME = "preconsultationdb"
 
+#per engine, so one process can hold up to 2 x (size + overflow) per host (sync + async)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  #seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "3600"))  #recycles connections every hour
+DB_CREATE_TABLES = os.getenv("DB_CREATE_TABLES", "true").lower() == "true"  #create missing tables at startup
+
 #protected url to prevent bot getting access to my db
 DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:3306/{DB_NAME}"
+ASYNC_DATABASE_URL = f"mysql+aiomysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:3306/{DB_NAME}"
+READ_DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_READ_HOST}:3306/{DB_NAME}" if DB_READ_HOST else None
 
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,   #prevents mysql timeout issues
-    pool_recycle=3600     #recycles connections every hour
-)
+
+class _TimedPool:
+    #times every checkout; a checkout that finds the pool at its limit counts as a wait
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+
+    def _do_get(self):
+        saturated = self._max_overflow > -1 and self.checkedout() >= self.size() + self._max_overflow
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._stats_lock:
+                self.checkouts += 1
+                if saturated:
+                    self.waits += 1
+                    self.wait_seconds += elapsed
+                    self.max_wait_seconds = max(self.max_wait_seconds, elapsed)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "size": self.size(),
+                "max_overflow": self._max_overflow,
+                "checked_out": self.checkedout(),
+                "idle": self.checkedin(),
+                "overflow": max(self.overflow(), 0),
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "wait_ms_total": round(self.wait_seconds * 1000, 1),
+                "wait_ms_avg": round(self.wait_seconds * 1000 / self.waits, 2) if self.waits else 0.0,
+                "wait_ms_max": round(self.max_wait_seconds * 1000, 1),
+                "timeouts": self.timeouts
+            }
+
+
+class TimedQueuePool(_TimedPool, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedPool, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_options(async_engine: bool = False) -> dict:
+    return {
+        "poolclass": TimedAsyncQueuePool if async_engine else TimedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": True  #prevents mysql timeout issues
+    }
+
+
+engine = create_engine(DATABASE_URL, **pool_options())
+
+#async engine for routes that run on the event loop (chat turns)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **pool_options(async_engine=True))
+
+#replica engine, the primary one when no replica is configured
+read_engine = create_engine(READ_DATABASE_URL, **pool_options()) if READ_DATABASE_URL else engine
 
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -23,9 +116,29 @@ SessionLocal = sessionmaker(
     bind=engine
 )
 
+ReadSessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=read_engine
+)
+
+#expire_on_commit is off so rows can still be read after commit without another round trip
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 Base = declarative_base()
 
 
+#create any missing tables, called from the app's startup rather than at import
+def init_db():
+    from backend.app import model  #registers the tables on Base
+    Base.metadata.create_all(bind=engine)
+
+
 #dependency for FastAPI routes
 def get_db():
     db = SessionLocal()
@@ -33,3 +146,33 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+#async dependency for FastAPI routes
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+#read-only dependency, may lag the primary when a replica is configured
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+
+def pool_stats() -> dict:
+    def one(pool):
+        return pool.stats() if isinstance(pool, _TimedPool) else {"status": pool.status()}
+
+    stats = {
+        "replica_configured": bool(READ_DATABASE_URL),
+        "primary": one(engine.pool),
+        "primary_async": one(async_engine.sync_engine.pool)
+    }
+    if READ_DATABASE_URL:
+        stats["replica"] = one(read_engine.pool)
+    return stats
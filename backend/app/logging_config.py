@@ -0,0 +1,160 @@
+import os
+import sys
+import json
+import queue
+import logging
+import logging.handlers
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+"""
+    structured logging for the api. modules log with logging.getLogger(__name__);
+    the only handler on the root logger puts records on a bounded queue and a
+    background listener thread formats them and writes stdout, so a slow
+    terminal or log shipper never blocks a request. when the queue is full
+    records are dropped and counted rather than waited on.
+    every record carries the id of the request it was logged from (set by
+    RequestIdMiddleware, "-" outside a request) and any extra={...} fields.
+    LOG_LEVEL sets the default level, LOG_LEVELS overrides it per module, e.g.
+    LOG_LEVELS=backend.services.ai_service=DEBUG,backend.routers.chat=WARNING.
+    LOG_FORMAT=json (default) or text.
+    hot paths pass %-style arguments instead of f-strings: below the logger's
+    level a call is one cached level check and nothing is formatted or queued.
+    """
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+#http client libraries log every llm call at INFO, LOG_LEVELS can turn them back up
+DEFAULT_LEVELS = {"httpx": "WARNING", "httpcore": "WARNING"}
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"
+
+request_id: ContextVar[str] = ContextVar("request_id", default="-")
+
+#attributes every LogRecord has, anything else on a record came from extra={...}
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+
+class RequestIdFilter(logging.Filter):
+
+    #runs in the logging thread, where the request's context is still current
+
+    def filter(self, record):
+        record.request_id = request_id.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+
+    #never blocks the caller: a full queue drops the record
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        #render the message and traceback now (args and frames may change once we return),
+        #leave formatting and the write to the listener thread
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BlockingStopQueueListener(logging.handlers.QueueListener):
+
+    #the base class puts its stop sentinel with put_nowait, which raises queue.Full (and never
+    #stops the thread) if the bounded queue is full at shutdown. wait for the listener to make room
+    #instead: records are only ever dropped on the request path, never the stop signal
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+_handler = None
+_listener = None
+
+
+def parse_levels(spec: str) -> dict:
+    #"a.b=DEBUG,c=WARNING" -> {"a.b": "DEBUG", "c": "WARNING"}
+    levels = {}
+    for item in spec.split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging():
+    global _handler, _listener
+    if _listener is not None:
+        return
+
+    #no record carries its caller frame or process info, neither is in the output and the frame
+    #walk is the biggest part of building a record (the logging howto's optimization section)
+    logging._srcfile = None
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT))
+
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    _handler = DroppingQueueHandler(log_queue)
+    _handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    root.addHandler(_handler)
+    root.setLevel(LOG_LEVEL)
+    for name, level in {**DEFAULT_LEVELS, **parse_levels(LOG_LEVELS)}.items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = BlockingStopQueueListener(log_queue, stream)
+    _listener.start()
+
+
+def stop_logging():
+    #writes out whatever is still queued
+    global _handler, _listener
+    if _listener is None:
+        return
+    logging.getLogger().removeHandler(_handler)
+    _listener.stop()
+    _handler = None
+    _listener = None
+
+
+def log_stats() -> dict:
+    return {
+        "queued": _handler.queue.qsize() if _handler else 0,
+        "dropped": _handler.dropped if _handler else 0
+    }
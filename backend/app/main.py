@@ -2,13 +2,48 @@ from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 import os
 load_dotenv()
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from backend.app.database import Base,engine
+from fastapi.responses import PlainTextResponse
+from backend.app.database import init_db, pool_stats, DB_CREATE_TABLES
 from backend.routers import auth, sessions, appointments,chat
+from backend.services.report_jobs import report_workers
+from backend.services.email_service import smtp_pool
+from backend.services.transcription import transcription_pool
+from backend.services.auth_service import password_hash_pool
+from backend.services.code_service import access_code_pool
+from backend.services.llm_provider import close_llm_provider
+from backend.services.metrics import metrics, instrument_db
+from backend.app.middleware import ServerTimingMiddleware, RequestIdMiddleware
+from backend.app.logging_config import setup_logging, stop_logging, log_stats
 
-Base.metadata.create_all(bind=engine)
+#time every sql statement as the "db" stage of /metrics and Server-Timing
+instrument_db()
 
-app = FastAPI(title="Pre-Consultation AI")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    #queued structured logging, LOG_LEVEL / LOG_LEVELS / LOG_FORMAT
+    setup_logging()
+    #schema is created at startup, not import, so importing the app never touches mysql.
+    #DB_CREATE_TABLES=false skips it where migrations manage the schema
+    if DB_CREATE_TABLES:
+        init_db()
+    #background workers for finalize (pdf + email), REPORT_WORKERS=0 disables them
+    report_workers.start()
+    #keeps unclaimed appointment access codes ready, ACCESS_CODE_POOL_TARGET=0 disables it
+    access_code_pool.start()
+    yield
+    report_workers.stop()
+    access_code_pool.stop()
+    smtp_pool.close_all()  #closes pooled SMTP connections, after the report workers have stopped
+    transcription_pool.shutdown()
+    password_hash_pool.shutdown()
+    await close_llm_provider()  #closes the llm client's keep-alive connections
+    stop_logging()  #flushes queued log records
+
+
+app = FastAPI(title="Pre-Consultation AI", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -17,6 +52,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(ServerTimingMiddleware)
+app.add_middleware(RequestIdMiddleware)  #outermost, so every log line of a request carries its id
 app.include_router(auth.router, prefix="/auth", tags=["Auth"])
 app.include_router(appointments.router, prefix="/appointments", tags=["Appointments"])
 app.include_router(sessions.router, prefix="/sessions", tags=["Sessions"])
@@ -24,4 +61,19 @@ app.include_router(chat.router, prefix="/chat", tags=["Chat"])
 
 @app.get("/")
 def read_root():
-    return {"status": "Backend + Database Connected"}
\ No newline at end of file
+    return {"status": "Backend + Database Connected"}
+
+#connection pool usage per engine, waits are checkouts that found the pool exhausted
+@app.get("/db/stats")
+def get_db_stats():
+    return pool_stats()
+
+#stage and per-route latency histograms in prometheus text format
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    dropped = "\n".join([
+        "# HELP preconsult_log_records_dropped_total Log records dropped because the log queue was full.",
+        "# TYPE preconsult_log_records_dropped_total counter",
+        f"preconsult_log_records_dropped_total {log_stats()['dropped']}"
+    ])
+    return PlainTextResponse(metrics.render() + dropped + "\n", media_type="text/plain; version=0.0.4")
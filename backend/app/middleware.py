@@ -0,0 +1,86 @@
+import re
+import time
+import uuid
+from starlette.datastructures import Headers, MutableHeaders
+from backend.app.logging_config import request_id
+from backend.services.metrics import metrics, request_timings, server_timing
+
+"""
+    asgi middleware for the app. plain asgi rather than BaseHTTPMiddleware so
+    streaming responses (chat sse, pdf ranges) pass straight through.
+    """
+
+#ids we accept from a caller, anything else is replaced so it can't forge log lines
+REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+def route_template(scope) -> str:
+    #matched path with its parameters put back as {name}, so ids don't explode the label set.
+    #built from the path rather than the route object: included routers only know their own part
+    if scope.get("route") is None:
+        return "unmatched"
+    params = {str(value): name for name, value in (scope.get("path_params") or {}).items()}
+    return "/".join("{" + params[part] + "}" if part in params else part for part in scope["path"].split("/"))
+
+
+class ServerTimingMiddleware:
+
+    #collects the spans recorded while serving a request, adds them as a Server-Timing
+    #header and feeds the per-route latency histogram. the header goes out with the
+    #response start, so a streamed response only reports the work done before its first byte
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = []
+        token = request_timings.set(timings)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", server_timing(timings, time.perf_counter() - start))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_timings.reset(token)
+            metrics.observe_request(scope["method"], route_template(scope), status, time.perf_counter() - start)
+
+
+class RequestIdMiddleware:
+
+    #tags every log record of a request (and websocket) with one id: the caller's
+    #X-Request-ID when it sends a sane one (a proxy, the mobile app), a new one otherwise.
+    #the id is echoed back so a client report can be matched to the server logs
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        incoming = Headers(scope=scope).get("x-request-id", "")
+        rid = incoming if REQUEST_ID_RE.match(incoming) else uuid.uuid4().hex
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("X-Request-ID", rid)
+            await send(message)
+
+        token = request_id.set(rid)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id.reset(token)
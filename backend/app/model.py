@@ -6,6 +6,9 @@ from sqlalchemy import (Column,
                         DateTime,
                         Enum,
                         JSON,
+                        Boolean,
+                        SmallInteger,
+                        UniqueConstraint,
                         Index)
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -47,6 +50,12 @@ class Appointment(Base):
     user = relationship("User", back_populates="appointments")
     sessions = relationship("Session", back_populates="appointment", uselist=False)
 
+    #the doctor dashboard pages by (appointment_date, id) within one doctor.
+    #session start looks up access_code + status through the unique index on access_code
+    __table_args__ = (
+        Index("idx_appointments_doctor_date", "doctor_id", "appointment_date", "id"),
+    )
+
 
 class Session(Base):
     __tablename__ = "sessions"
@@ -60,6 +69,24 @@ class Session(Base):
     appointment = relationship("Appointment", back_populates="sessions")
     messages = relationship("Message", back_populates="session")
     summary = relationship("Summary", back_populates="session", uselist=False)
+    report_job = relationship("ReportJob", back_populates="session", uselist=False)
+    report = relationship("Report", back_populates="session", uselist=False)
+    symptoms = relationship("Symptom", back_populates="session", order_by="Symptom.position")
+
+    #session start resumes the appointment's open session (ended_at IS NULL)
+    __table_args__ = (
+        Index("idx_sessions_appointment_ended", "appointment_id", "ended_at"),
+    )
+
+    @property
+    def summary_content(self) -> dict:
+        #the old summaries json, built from the symptom rows. sessions from before the
+        #symptoms table fall back to their stored summary until a turn backfills them
+        if self.symptoms:
+            return {"symptoms": [symptom.as_dict() for symptom in self.symptoms]}
+        if self.summary:
+            return self.summary.summary_content or {"symptoms": []}
+        return {"symptoms": []}
 
 class Message(Base):
     __tablename__ = "messages"
@@ -76,6 +103,11 @@ class Message(Base):
 
     session = relationship("Session", back_populates="messages")
 
+    #history and the chat window read one session's messages in created_at order
+    __table_args__ = (
+        Index("idx_messages_session_created", "session_id", "created_at", "id"),
+    )
+
 class Summary(Base):
     __tablename__ = "summaries"
 
@@ -85,4 +117,95 @@ class Summary(Base):
     summary_content = Column(JSON, nullable=False)
     created_at = Column(DateTime, server_default=func.now())
 
-    session = relationship("Session", back_populates="summary")
\ No newline at end of file
+    session = relationship("Session", back_populates="summary")
+
+class Symptom(Base):
+    __tablename__ = "symptoms"
+
+    id = Column(Integer, primary_key=True, index=True)
+    session_id = Column(Integer, ForeignKey("sessions.id"), nullable=False)
+    position = Column(SmallInteger, nullable=False)  #order the patient mentioned it in
+
+    name = Column(String(100), nullable=True)
+    name_key = Column(String(100), nullable=True)  #lowercased name, for lookups across sessions
+    severity = Column(String(50), nullable=True)
+    duration = Column(String(100), nullable=True)
+    frequency = Column(String(100), nullable=True)
+    #bit per filled field, see symptom_store (15 = name, severity, duration and frequency all known)
+    completeness = Column(SmallInteger, default=0, nullable=False)
+
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    session = relationship("Session", back_populates="symptoms")
+
+    #one row per symptom per session, read in order; the next question is the session's
+    #first incomplete symptom; the dashboard filters sessions by symptom name
+    __table_args__ = (
+        UniqueConstraint("session_id", "position", name="uq_symptoms_session_position"),
+        Index("idx_symptoms_session_completeness", "session_id", "completeness"),
+        Index("idx_symptoms_name_session", "name_key", "session_id"),
+    )
+
+    def as_dict(self) -> dict:
+        return {
+            "symptom": self.name,
+            "severity": self.severity,
+            "duration": self.duration,
+            "frequency": self.frequency
+        }
+
+class ReportJob(Base):
+    __tablename__ = "report_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    session_id = Column(Integer, ForeignKey("sessions.id"), unique=True, nullable=False)
+
+    status = Column(
+        Enum("pending", "running", "succeeded", "failed", name="report_job_status"),
+        default="pending", nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=5, nullable=False)
+    next_run_at = Column(DateTime, server_default=func.now(), nullable=False)
+    locked_at = Column(DateTime, nullable=True)
+
+    pdf_path = Column(String(255), nullable=True)
+    email_sent = Column(Boolean, default=False, nullable=False)
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    session = relationship("Session", back_populates="report_job")
+
+    #workers poll for due jobs by status and next_run_at
+    __table_args__ = (
+        Index("idx_report_jobs_status_next_run", "status", "next_run_at"),
+    )
+
+class Report(Base):
+    __tablename__ = "reports"
+
+    id = Column(Integer, primary_key=True, index=True)
+    #unique index makes the download lookup a single indexed read
+    session_id = Column(Integer, ForeignKey("sessions.id"), unique=True, nullable=False)
+
+    file_path = Column(String(255), nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    sha256 = Column(String(64), nullable=False)
+    created_at = Column(DateTime, server_default=func.now())
+
+    session = relationship("Session", back_populates="report")
+
+class AccessCode(Base):
+    __tablename__ = "access_code_pool"
+
+    #every code ever issued stays here, the unique index is what keeps codes from repeating
+    id = Column(Integer, primary_key=True, index=True)
+    code = Column(String(8), unique=True, nullable=False)
+    claimed_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, server_default=func.now())
+
+    #claims take the oldest unclaimed code
+    __table_args__ = (
+        Index("idx_access_code_pool_unclaimed", "claimed_at", "id"),
+    )
@@ -50,6 +50,16 @@ class AppointmentResponse(BaseModel):
     class Config:
         orm_mode = True
 
+#one row of a bulk import (json array item or csv line)
+class AppointmentBulkItem(BaseModel):
+    appointment_date: datetime
+    patient_name: Optional[str] = None
+    patient_email: Optional[EmailStr] = None
+
+class AppointmentBulkResponse(BaseModel):
+    created: int
+    appointments: List[AppointmentResponse]
+
 #session
 
 class SessionCreate(BaseModel):
@@ -104,3 +114,42 @@ class SummaryResponse(BaseModel):
     class Config:
         orm_mode = True
 
+#doctor dashboard
+class DashboardPatient(BaseModel):
+    id: int
+    full_name: Optional[str] = None
+    email: Optional[str] = None
+
+class DashboardSession(BaseModel):
+    id: int
+    started_at: Optional[datetime] = None
+    ended_at: Optional[datetime] = None
+    report_status: Optional[str] = None
+
+class DashboardAppointment(BaseModel):
+    id: int
+    appointment_date: datetime
+    status: str
+    access_code: str
+    patient: Optional[DashboardPatient] = None
+    session: Optional[DashboardSession] = None
+    symptoms: List[SymptomInfo] = []
+
+class DashboardPage(BaseModel):
+    items: List[DashboardAppointment]
+    next_cursor: Optional[str] = None
+    has_more: bool
+
+#report job
+class ReportJobResponse(BaseModel):
+    id: int
+    session_id: int
+    status: str
+    attempts: int
+    max_attempts: int
+    next_run_at: Optional[datetime] = None
+    pdf_generated: bool
+    email_sent: bool
+    last_error: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
@@ -0,0 +1,86 @@
+#backend/benchmarks/argon2_sweep.py
+#login latency across argon2 cost parameters, to pick ARGON2_* and PASSWORD_HASH_WORKERS
+#
+#usage (from project root):
+#   python -m backend.benchmarks.argon2_sweep
+#   python -m backend.benchmarks.argon2_sweep --time-costs 2 3 --memory-costs 19456 65536 --parallelism 1 4 --burst 32
+#
+#for every combination: the single verify latency (what one login costs), then a burst
+#of --burst simultaneous logins through PasswordHashPool with --workers threads
+#(p50/p95 wait + verify, and logins per second). memory_cost is in KiB.
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from itertools import product
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.services.auth_service import (
+    make_pwd_context, PasswordHashPool,
+    ARGON2_TIME_COST, ARGON2_MEMORY_COST, ARGON2_PARALLELISM
+)
+
+PASSWORD = "correct horse battery staple"
+
+
+async def burst(context, stored_hash: str, logins: int, workers: int):
+    pool = PasswordHashPool(workers=workers, max_queue=logins)
+    latencies = []
+
+    async def one_login():
+        start = time.perf_counter()
+        await pool.run(context.verify, PASSWORD, stored_hash)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one_login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    pool.shutdown()
+
+    latencies.sort()
+    return statistics.median(latencies), latencies[max(0, int(len(latencies) * 0.95) - 1)], logins / elapsed
+
+
+def main(args):
+    current = (ARGON2_TIME_COST, ARGON2_MEMORY_COST, ARGON2_PARALLELISM)
+
+    print("=" * 86)
+    print(f"ARGON2 SWEEP (burst of {args.burst} logins, {args.workers} hash workers, * = current settings)")
+    print("=" * 86)
+    print(f"{'t':>3}{'m (MiB)':>9}{'p':>3}{'hash ms':>10}{'verify ms':>11}"
+          f"{'burst p50 ms':>14}{'burst p95 ms':>14}{'logins/s':>10}")
+
+    for time_cost, memory_cost, parallelism in product(args.time_costs, args.memory_costs, args.parallelism):
+        context = make_pwd_context(time_cost, memory_cost, parallelism)
+
+        start = time.perf_counter()
+        stored_hash = context.hash(PASSWORD)
+        hash_ms = (time.perf_counter() - start) * 1000
+
+        verify_times = []
+        for _ in range(args.samples):
+            start = time.perf_counter()
+            context.verify(PASSWORD, stored_hash)
+            verify_times.append(time.perf_counter() - start)
+
+        p50, p95, rate = asyncio.run(burst(context, stored_hash, args.burst, args.workers))
+        marker = "*" if (time_cost, memory_cost, parallelism) == current else " "
+        print(f"{time_cost:>3}{memory_cost / 1024:>9.0f}{parallelism:>3}{hash_ms:>10.1f}"
+              f"{statistics.median(verify_times) * 1000:>11.1f}{p50 * 1000:>14.1f}{p95 * 1000:>14.1f}{rate:>10.1f} {marker}")
+
+    print("=" * 86)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="argon2 cost parameters vs login latency")
+    parser.add_argument("--time-costs", type=int, nargs="+", default=[1, 2, 3])
+    parser.add_argument("--memory-costs", type=int, nargs="+", default=[19456, 47104, 65536])
+    parser.add_argument("--parallelism", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--samples", type=int, default=5, help="single verify timings per combination")
+    parser.add_argument("--burst", type=int, default=16, help="simultaneous logins")
+    parser.add_argument("--workers", type=int, default=2, help="PasswordHashPool workers")
+    main(parser.parse_args())
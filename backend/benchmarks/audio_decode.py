@@ -0,0 +1,158 @@
+#backend/benchmarks/audio_decode.py
+#voice note decode cost: the old temp-file pipeline vs the in-memory decode_audio path
+#
+#usage (from project root):
+#   python -m backend.benchmarks.audio_decode --seconds 5 15 60
+#   python -m backend.benchmarks.audio_decode --format m4a     (needs the ffmpeg binary and pydub)
+#
+#reports wall time per second of audio, bytes moved through read/write syscalls
+#(files and ffmpeg pipes, from /proc/self/io) and peak python/numpy allocations.
+#m4a test uploads are written like a phone records them (index after the audio), which
+#decode_audio hands to ffmpeg as a temp file; the input column says which way ffmpeg read it.
+#recognition itself is excluded, both paths stop at the AudioData handed to it.
+import argparse
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import wave
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import numpy as np
+import speech_recognition as sr
+
+from backend.services.transcription import decode_audio, needs_seekable_input, TARGET_RATE, TARGET_WIDTH
+
+
+def make_upload(seconds: float, fmt: str) -> bytes:
+    #speech-like test signal: 44.1 kHz stereo, a few harmonics with a syllable envelope
+    rate = 44100
+    t = np.arange(int(seconds * rate)) / rate
+    signal = sum(np.sin(2 * np.pi * f * t) / (i + 1) for i, f in enumerate((180, 360, 720, 1440)))
+    signal *= 0.5 * (1 + np.sin(2 * np.pi * 3 * t)) * 0.3
+    pcm = np.repeat((signal * 32767).astype("<i2")[:, None], 2, axis=1)
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as w:
+        w.setnchannels(2)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(pcm.tobytes())
+
+    if fmt == "wav":
+        return buffer.getvalue()
+
+    if fmt == "m4a":
+        #to a file, not a pipe: a seekable output gets the moov index after the audio, like a phone recording
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "upload.m4a")
+            subprocess.run(
+                ["ffmpeg", "-hide_banner", "-loglevel", "error", "-f", "wav", "-i", "pipe:0", "-c:a", "aac", path],
+                input=buffer.getvalue(), capture_output=True, check=True
+            )
+            with open(path, "rb") as f:
+                return f.read()
+
+    result = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", "-f", "wav", "-i", "pipe:0", "-f", fmt, "pipe:1"],
+        input=buffer.getvalue(), capture_output=True, check=True
+    )
+    return result.stdout
+
+
+def legacy_decode(content: bytes, file_extension: str) -> sr.AudioData:
+    #the pipeline transcribe_audio used before: temp file -> pydub wav temp file -> sr.AudioFile
+    temp_path = None
+    wav_path = None
+    try:
+        with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as temp_file:
+            temp_file.write(content)
+            temp_path = temp_file.name
+
+        wav_path = temp_path.replace(file_extension, '.wav')
+        if file_extension.lower() != '.wav':
+            from pydub import AudioSegment
+            audio = AudioSegment.from_file(temp_path)
+            audio.export(wav_path, format='wav')
+        else:
+            wav_path = temp_path
+
+        recognizer = sr.Recognizer()
+        with sr.AudioFile(wav_path) as source:
+            recognizer.adjust_for_ambient_noise(source, duration=0.5)
+            return recognizer.record(source)
+    finally:
+        for path in {temp_path, wav_path}:
+            if path and os.path.exists(path):
+                os.remove(path)
+
+
+def in_memory_decode(content: bytes, file_extension: str) -> sr.AudioData:
+    return sr.AudioData(decode_audio(content, file_extension), TARGET_RATE, TARGET_WIDTH)
+
+
+def io_bytes() -> int:
+    #bytes read + written through syscalls by this process (files and pipes)
+    with open("/proc/self/io") as f:
+        counters = dict(line.split(": ") for line in f.read().splitlines())
+    return int(counters["rchar"]) + int(counters["wchar"])
+
+
+def measure(fn, content: bytes, file_extension: str, repeats: int):
+    fn(content, file_extension)  #warm up imports and caches
+
+    start_io = io_bytes()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        audio = fn(content, file_extension)
+    elapsed = (time.perf_counter() - start) / repeats
+    moved = (io_bytes() - start_io) / repeats
+
+    tracemalloc.start()
+    fn(content, file_extension)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return elapsed, moved, peak, audio
+
+
+def main(args):
+    has_proc_io = os.path.exists("/proc/self/io")
+    extension = "." + args.format
+
+    print("=" * 97)
+    print(f"AUDIO DECODE ({args.format} upload, 44.1 kHz stereo source, {args.repeats} runs each)")
+    print("=" * 97)
+    print(f"{'path':<11}{'input':>11}{'audio s':>8}{'upload KB':>11}{'ms / audio s':>14}{'syscall KB':>12}"
+          f"{'peak alloc KB':>15}{'output KB':>11}")
+
+    for seconds in args.seconds:
+        content = make_upload(seconds, args.format)
+        #how ffmpeg gets the upload on the in-memory path (wav never reaches ffmpeg)
+        if content[:4] == b"RIFF":
+            source = "none"
+        else:
+            source = "temp file" if needs_seekable_input(content, extension) else "pipe"
+        for name, input_name, fn in (("temp files", "temp file", legacy_decode), ("in-memory", source, in_memory_decode)):
+            elapsed, moved, peak, audio = measure(fn, content, extension, args.repeats)
+            moved_kb = f"{moved / 1024:.0f}" if has_proc_io else "n/a"
+            print(f"{name:<11}{input_name:>11}{seconds:>8}{len(content) / 1024:>11.0f}{elapsed * 1000 / seconds:>14.2f}"
+                  f"{moved_kb:>12}{peak / 1024:>15.0f}{len(audio.frame_data) / 1024:>11.0f}")
+
+    print("=" * 97)
+    print("output = pcm handed to the recognizer (temp-file path keeps the source rate/channels,")
+    print("and adjust_for_ambient_noise drops the first 0.5s of it)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="temp-file vs in-memory audio decode benchmark")
+    parser.add_argument("--seconds", type=float, nargs="+", default=[5, 15, 60])
+    parser.add_argument("--format", default="wav", help="wav, or any format ffmpeg can encode (m4a, mp3, ...)")
+    parser.add_argument("--repeats", type=int, default=5)
+    main(parser.parse_args())
@@ -0,0 +1,101 @@
+#backend/benchmarks/chat_concurrency.py
+#how many concurrent patient turns can one uvicorn worker serve, sync handler vs async handler
+#
+#usage (from project root):
+#   python -m backend.benchmarks.chat_concurrency --llm-latency 0.8 --db-latency 0.005
+#
+#each simulated turn does what chat_with_ai does: 3 db round trips, 2 llm calls
+#(extract + reply), 1 db commit. the sync route runs in starlette's threadpool like
+#the old `def chat_with_ai`, the async route awaits everything on the event loop.
+#both are served in-process on a single event loop, i.e. one uvicorn worker.
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import httpx
+from fastapi import FastAPI
+
+
+def build_app(llm_latency: float, db_latency: float):
+    app = FastAPI()
+
+    @app.post("/sync/{session_id}")
+    def sync_turn(session_id: int):
+        for _ in range(3):
+            time.sleep(db_latency)
+        time.sleep(llm_latency)  #extraction call
+        time.sleep(llm_latency)  #reply call
+        time.sleep(db_latency)
+        return {"reply": "ok", "session_id": session_id}
+
+    @app.post("/async/{session_id}")
+    async def async_turn(session_id: int):
+        for _ in range(3):
+            await asyncio.sleep(db_latency)
+        await asyncio.sleep(llm_latency)
+        await asyncio.sleep(llm_latency)
+        await asyncio.sleep(db_latency)
+        return {"reply": "ok", "session_id": session_id}
+
+    return app
+
+
+async def run_level(client: httpx.AsyncClient, path: str, concurrency: int):
+    latencies = []
+
+    async def one_turn(i: int):
+        start = time.perf_counter()
+        res = await client.post(f"/{path}/{i}")
+        res.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one_turn(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) > 1 else latencies[0]
+    return {
+        "throughput": concurrency / elapsed,
+        "p50": statistics.median(latencies),
+        "p95": p95,
+        "elapsed": elapsed,
+    }
+
+
+async def main(args):
+    app = build_app(args.llm_latency, args.db_latency)
+    transport = httpx.ASGITransport(app=app)
+    ideal = 2 * args.llm_latency + 4 * args.db_latency
+
+    print("=" * 70)
+    print(f"CHAT TURN CONCURRENCY (llm {args.llm_latency}s x2, db {args.db_latency}s x4, ideal turn {ideal:.2f}s)")
+    print("=" * 70)
+    print(f"{'handler':<8}{'concurrent':>12}{'turns/s':>10}{'p50 (s)':>10}{'p95 (s)':>10}")
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for path in ("sync", "async"):
+            for level in args.levels:
+                stats = await run_level(client, path, level)
+                print(f"{path:<8}{level:>12}{stats['throughput']:>10.1f}{stats['p50']:>10.2f}{stats['p95']:>10.2f}")
+
+                #a turn taking more than twice the ideal means requests are queueing for a worker
+                if stats["p95"] > ideal * 2:
+                    print(f"   ⚠️ {path} handler saturated at {level} concurrent turns")
+                    break
+
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="sync vs async chat turn concurrency benchmark")
+    parser.add_argument("--llm-latency", type=float, default=0.8, help="seconds per groq call")
+    parser.add_argument("--db-latency", type=float, default=0.005, help="seconds per db round trip")
+    parser.add_argument("--levels", type=int, nargs="+", default=[10, 40, 80, 160, 320, 640])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,171 @@
+#backend/benchmarks/dashboard_queries.py
+#sql statements per page of GET /appointments/dashboard, eager loading vs lazy loading
+#
+#usage (from project root):
+#   python -m backend.benchmarks.dashboard_queries
+#   python -m backend.benchmarks.dashboard_queries --appointments 500 --page-sizes 10 50 100
+#
+#seeds an in-memory sqlite database with one doctor's appointments (patients, sessions,
+#symptoms, old summaries, report jobs) and walks every page of the dashboard by cursor. the eager
+#query must issue the same number of statements per page whatever the page size;
+#exits non-zero if it doesn't. the lazy column is the same page built without the
+#loader options, i.e. the N+1 the dashboard avoids. the doctor lookup is not counted.
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.app import model
+from backend.app.database import Base, get_db, get_read_db
+from backend.routers import appointments
+from backend.services.auth_service import create_access_token
+from backend.services.principal_cache import principal_cache
+
+STATUSES = ("scheduled", "in_progress", "completed")
+
+
+def build(count: int):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    LocalSession = sessionmaker(bind=engine)
+
+    counters = {"statements": 0}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        if "FROM doctors" not in statement:
+            counters["statements"] += 1
+
+    db = LocalSession()
+    doctor = model.Doctor(full_name="Bench Doctor", email="bench@example.com", password_hash="x")
+    db.add(doctor)
+    db.flush()
+
+    start_day = datetime(2026, 6, 1, 8, 0)
+    for i in range(count):
+        user = model.User(full_name=f"Patient {i}", email=f"patient{i}@example.com")
+        appointment = model.Appointment(
+            doctor_id=doctor.id, user=user, status=STATUSES[i % len(STATUSES)],
+            #pairs share a slot so the cursor has to break ties on id
+            appointment_date=start_day + timedelta(minutes=10 * (i // 2)),
+            access_code=f"{i:08d}"
+        )
+        db.add(appointment)
+        if i % 3:
+            session = model.Session(appointment=appointment, started_at=appointment.appointment_date)
+            db.add(session)
+            if i % 4:
+                db.add(model.Symptom(session=session, position=0, name="Headache", name_key="headache",
+                                     severity="4", duration="2 days", completeness=7))
+            else:
+                #a session from before the symptoms table, read from its summaries json
+                db.add(model.Summary(session=session, summary_content={
+                    "symptoms": [{"symptom": "headache", "duration": "2 days", "severity": 4}]
+                }))
+            if i % 3 == 2:
+                db.add(model.ReportJob(session=session, status="succeeded"))
+    db.commit()
+    token = create_access_token({"sub": str(doctor.id)})
+    db.close()
+
+    def override_db():
+        session = LocalSession()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app = FastAPI()
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_read_db] = override_db
+    app.include_router(appointments.router)
+    return app, LocalSession, token, counters
+
+
+def walk(client: TestClient, counters: dict, limit: int, status=None):
+    #every page by cursor, returns (appointments seen, statements per page)
+    params = {"limit": limit}
+    if status:
+        params["status"] = status
+    seen, per_page = [], []
+    while True:
+        before = counters["statements"]
+        res = client.get("/appointments/dashboard", params=params)
+        res.raise_for_status()
+        per_page.append(counters["statements"] - before)
+        page = res.json()
+        seen.extend(item["id"] for item in page["items"])
+        if not page["has_more"]:
+            return seen, per_page
+        params["cursor"] = page["next_cursor"]
+
+
+def lazy_page(LocalSession, counters: dict, limit: int) -> int:
+    #the same first page with default lazy loading, for comparison
+    db = LocalSession()
+    before = counters["statements"]
+    rows = db.query(model.Appointment).order_by(
+        model.Appointment.appointment_date, model.Appointment.id
+    ).limit(limit + 1).all()
+    [appointments._dashboard_item(appointment) for appointment in rows[:limit]]
+    db.close()
+    return counters["statements"] - before
+
+
+def main(args):
+    app, LocalSession, token, counters = build(args.appointments)
+    principal_cache.max_entries = 0
+
+    print("=" * 70)
+    print(f"DASHBOARD QUERIES ({args.appointments} appointments, statements per page)")
+    print("=" * 70)
+    print(f"{'page size':>10}{'pages':>7}{'eager min':>11}{'eager max':>11}{'lazy':>8}{'ms/page':>10}")
+
+    counts = set()
+    ok = True
+    with TestClient(app, headers={"Authorization": f"Bearer {token}"}) as client:
+        for limit in args.page_sizes:
+            start = time.perf_counter()
+            seen, per_page = walk(client, counters, limit)
+            elapsed = time.perf_counter() - start
+
+            #every appointment exactly once, in (appointment_date, id) order
+            if len(seen) != args.appointments or len(set(seen)) != len(seen):
+                print(f"❌ page size {limit}: walked {len(seen)} appointments, {len(set(seen))} distinct")
+                ok = False
+
+            #the last page can be empty of sessions, only full pages are compared
+            counts.update(per_page[:-1] or per_page)
+            print(f"{limit:>10}{len(per_page):>7}{min(per_page):>11}{max(per_page):>11}"
+                  f"{lazy_page(LocalSession, counters, limit):>8}{elapsed * 1000 / len(per_page):>10.2f}")
+
+        filtered, _ = walk(client, counters, args.page_sizes[0], status="completed")
+        expected = sum(1 for i in range(args.appointments) if STATUSES[i % len(STATUSES)] == "completed")
+        if len(filtered) != expected:
+            print(f"❌ status=completed returned {len(filtered)}, expected {expected}")
+            ok = False
+
+    print("=" * 70)
+    if len(counts) != 1:
+        print(f"❌ statements per page vary with page size: {sorted(counts)}")
+        ok = False
+    else:
+        print(f"✅ {counts.pop()} statements per page for every page size")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="dashboard statements per page")
+    parser.add_argument("--appointments", type=int, default=300)
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[10, 50, 100])
+    main(parser.parse_args())
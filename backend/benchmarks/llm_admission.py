@@ -0,0 +1,174 @@
+#backend/benchmarks/llm_admission.py
+#llm calls against a provider with a rate limit: client per call vs shared client vs shared client + limiter
+#
+#usage (from project root):
+#   python -m backend.benchmarks.llm_admission
+#   python -m backend.benchmarks.llm_admission --rate 4 --seconds 30 --rpm 120 --tpm 60000 --latency 0.3
+#
+#serves a local stand-in for the groq chat completions api that enforces --rpm/--tpm
+#itself (429 + retry-after once exceeded) and counts the tcp connections it accepts.
+#chat turns (an extraction call and a reply call, like generate_ai_response) arrive
+#at --rate per second for --seconds. the limiter is sized to the same quota, so with it
+#excess turns wait or are shed up front instead of reaching the provider and failing.
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from backend.services import ai_service
+from backend.services.llm_provider import GroqProvider
+from backend.services.rate_limiter import RateLimiter, TokenBucket, LLMRateLimited
+
+PROMPT = "You are a medical intake assistant. " * 40  #~1400 characters, about what a turn sends
+
+
+class NoLimiter(RateLimiter):
+    #every call goes straight to the provider, as before the limiter existed
+
+    async def acquire(self, cost: int):
+        pass
+
+    def pause(self, seconds: float):
+        pass
+
+
+def provider_app(args, counters: dict):
+    app = FastAPI()
+    lock = threading.Lock()
+
+    @app.post("/openai/v1/chat/completions")
+    async def completions(request: Request):
+        body = await request.json()
+        counters["connections"].add(tuple(request.scope["client"]))
+        cost = sum(len(m["content"]) for m in body["messages"]) // 4 + args.completion_tokens
+
+        with lock:
+            requests, tokens = counters["quota"]
+            now = time.monotonic()
+            requests.refill(now)
+            tokens.refill(now)
+            if requests.level < 1 or tokens.level < cost:
+                counters["429"] += 1
+                retry_after = max(requests.wait_for(1), tokens.wait_for(cost))
+                return JSONResponse(
+                    {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+                    status_code=429, headers={"retry-after": f"{retry_after:.2f}"}
+                )
+            requests.level -= 1
+            tokens.level -= cost
+
+        await asyncio.sleep(args.latency)
+        counters["served"] += 1
+        return {
+            "id": "chatcmpl-bench", "object": "chat.completion", "created": int(time.time()), "model": body["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "How severe is it?"}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": cost - args.completion_tokens, "completion_tokens": args.completion_tokens,
+                      "total_tokens": cost}
+        }
+
+    return app
+
+
+def serve(app: FastAPI):
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, server.servers[0].sockets[0].getsockname()[1]
+
+
+async def run_scenario(args, base_url: str, shared: bool, limiter: RateLimiter):
+    ai_service.llm_limiter = limiter
+    outcomes = {"ok": 0, "shed": 0, "429": 0, "error": 0}
+    latencies = []
+
+    #the groq provider, pointed at the stand-in. shared is what get_llm_provider hands out
+    shared_provider = GroqProvider(api_key="bench", base_url=base_url) if shared else None
+
+    async def one_turn():
+        start = time.perf_counter()
+        try:
+            for temperature in (0, 0.6):  #extraction, then reply
+                provider = shared_provider or GroqProvider(api_key="bench", base_url=base_url)
+                try:
+                    await ai_service.complete(provider, [{"role": "system", "content": PROMPT}], temperature)
+                finally:
+                    if not shared:
+                        await provider.close()
+            outcomes["ok"] += 1
+            latencies.append(time.perf_counter() - start)
+        except LLMRateLimited:
+            outcomes["shed"] += 1
+        except Exception as e:
+            outcomes["429" if getattr(e, "status_code", None) == 429 else "error"] += 1
+
+    rng = random.Random(3)
+    tasks = []
+    deadline = time.perf_counter() + args.seconds
+    while time.perf_counter() < deadline:
+        tasks.append(asyncio.create_task(one_turn()))
+        await asyncio.sleep(rng.expovariate(args.rate))
+    await asyncio.gather(*tasks)
+    if shared_provider:
+        await shared_provider.close()
+
+    latencies.sort()
+    return outcomes, latencies, limiter.stats()
+
+
+def main(args):
+    counters = {"connections": set(), "429": 0, "served": 0, "quota": None}
+    server, port = serve(provider_app(args, counters))
+    base_url = f"http://127.0.0.1:{port}"
+
+    scenarios = (
+        ("client per call, no limiter", False, lambda: NoLimiter()),
+        ("shared client, no limiter", True, lambda: NoLimiter()),
+        ("shared client + limiter", True, lambda: RateLimiter(rpm=args.rpm, tpm=args.tpm, max_wait=args.max_wait)),
+    )
+
+    print("=" * 104)
+    print(f"LLM ADMISSION ({args.rate} turns/s for {args.seconds}s, provider quota {args.rpm:.0f} rpm / {args.tpm:.0f} tpm, "
+          f"{args.latency * 1000:.0f} ms per call)")
+    print("=" * 104)
+    print(f"{'scenario':<30}{'turns':>6}{'ok':>5}{'shed':>6}{'failed':>8}{'429s sent':>11}{'conns':>7}"
+          f"{'ok p50 ms':>11}{'ok p95 ms':>11}{'waiting':>9}")
+
+    for name, shared, make_limiter in scenarios:
+        counters["quota"] = (TokenBucket(args.rpm), TokenBucket(args.tpm))  #every run starts with a full minute
+        counters["connections"] = set()
+        counters["429"] = 0
+        outcomes, latencies, stats = asyncio.run(run_scenario(args, base_url, shared, make_limiter()))
+        turns = sum(outcomes.values())
+        p50 = statistics.median(latencies) * 1000 if latencies else 0.0
+        p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)] * 1000 if latencies else 0.0
+        print(f"{name:<30}{turns:>6}{outcomes['ok']:>5}{outcomes['shed']:>6}{outcomes['429'] + outcomes['error']:>8}"
+              f"{counters['429']:>11}{len(counters['connections']):>7}{p50:>11.0f}{p95:>11.0f}{stats['max_waiting']:>9}")
+
+    print("=" * 104)
+    print("shed: refused by the limiter before any request. failed: turns that got a 429 (or other error).")
+    print("429s sent: requests the provider rejected. waiting: most calls the limiter held at once.")
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="llm client reuse and rate-limit admission control")
+    parser.add_argument("--rate", type=float, default=3.0, help="chat turns per second (2 llm calls each)")
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--rpm", type=float, default=30.0, help="provider requests per minute")
+    parser.add_argument("--tpm", type=float, default=12000.0, help="provider tokens per minute")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per provider call")
+    parser.add_argument("--completion-tokens", type=int, default=50)
+    parser.add_argument("--max-wait", type=float, default=5.0, help="limiter LLM_MAX_WAIT_SECONDS")
+    main(parser.parse_args())
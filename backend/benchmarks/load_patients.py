@@ -0,0 +1,149 @@
+#backend/benchmarks/load_patients.py
+#N simulated patients running a scripted symptom interview against a live server
+#
+#usage (from project root, three terminals):
+#   python -m backend.benchmarks.mock_llm_server --port 8001 --latency lognormal:0.6,0.4
+#   LLM_PROVIDER=openai LLM_BASE_URL=http://127.0.0.1:8001/v1 LLM_RPM=100000 LLM_TPM=100000000 \
+#       uvicorn backend.app.main:app --port 8000
+#   python -m backend.benchmarks.load_patients --base-url http://127.0.0.1:8000 --patients 50
+#
+#setup (not timed): registers or logs in a bench doctor and books one appointment per
+#patient with POST /appointments/appointments/bulk. each patient then runs
+#POST /sessions/start, one POST /chat/{id} per scripted turn and POST /sessions/{id}/finalize,
+#with at most --concurrency patients in flight. raise LLM_RPM/LLM_TPM on the server when
+#it talks to the mock, otherwise the limiter sheds turns at the real quota (reported as 503s).
+#prints throughput and p50/p95/p99 latency per endpoint; finalize also queues a report job,
+#set REPORT_WORKERS=0 on the server to keep pdf/email work out of the measurement.
+import argparse
+import asyncio
+import math
+import random
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import httpx
+
+SCRIPTS = (
+    ["Hi, I have had a headache", "7", "2 days", "every morning", "no, that's all"],
+    ["I have a cough and a fever", "the cough is about 5", "a week", "all the time",
+     "the fever is 6", "3 days", "in the evenings", "no"],
+    ["My back pain is bad", "8", "about a month", "when I sit for long", "no"],
+)
+ENDPOINTS = ("POST /sessions/start", "POST /chat/{id}", "POST /sessions/{id}/finalize")
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    #nearest rank
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(len(sorted_values) * q) - 1)]
+
+
+async def setup(client: httpx.AsyncClient, args) -> list:
+    doctor = {"full_name": "Load Test Doctor", "email": args.email, "password": args.password}
+    res = await client.post("/auth/register", json=doctor)
+    if res.status_code not in (200, 400):  #400: already registered from an earlier run
+        res.raise_for_status()
+    res = await client.post("/auth/login", data={"username": args.email, "password": args.password})
+    res.raise_for_status()
+    headers = {"Authorization": f"Bearer {res.json()['access_token']}"}
+
+    start = datetime.now().replace(second=0, microsecond=0) + timedelta(days=1)
+    rows = [
+        {"appointment_date": (start + timedelta(minutes=i)).isoformat(), "patient_name": f"Load Patient {i}"}
+        for i in range(args.patients)
+    ]
+    res = await client.post("/appointments/appointments/bulk", json=rows, headers=headers)
+    res.raise_for_status()
+    return [appointment["access_code"] for appointment in res.json()["appointments"]]
+
+
+async def run_patient(client: httpx.AsyncClient, access_code: str, script: list, args, samples: dict, errors: Counter):
+
+    async def call(endpoint: str, path: str, body: dict):
+        start = time.perf_counter()
+        try:
+            res = await client.post(path, json=body)
+        except httpx.HTTPError as e:
+            errors[(endpoint, type(e).__name__)] += 1
+            return None
+        samples[endpoint].append(time.perf_counter() - start)
+        if res.status_code >= 400:
+            errors[(endpoint, res.status_code)] += 1
+            return None
+        return res.json()
+
+    session = await call(ENDPOINTS[0], "/sessions/start", {"access_code": access_code})
+    if session is None:
+        return False
+
+    for message in script:
+        if args.think_ms:
+            await asyncio.sleep(random.uniform(0.5, 1.5) * args.think_ms / 1000)
+        if await call(ENDPOINTS[1], f"/chat/{session['id']}", {"content": message}) is None:
+            break
+
+    return await call(ENDPOINTS[2], f"/sessions/{session['id']}/finalize", {}) is not None
+
+
+async def main(args):
+    random.seed(args.seed)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        access_codes = await setup(client, args)
+
+        samples = {endpoint: [] for endpoint in ENDPOINTS}
+        errors = Counter()
+        gate = asyncio.Semaphore(args.concurrency)
+
+        async def patient(i: int, access_code: str):
+            #--ramp spreads the arrivals instead of starting everyone at once
+            await asyncio.sleep(args.ramp * i / max(1, len(access_codes)))
+            async with gate:
+                return await run_patient(client, access_code, SCRIPTS[i % len(SCRIPTS)], args, samples, errors)
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(patient(i, code) for i, code in enumerate(access_codes)))
+        wall = time.perf_counter() - start
+
+        llm = (await client.get("/chat/stats")).json().get("llm_limiter", {})
+
+    print("=" * 86)
+    print(f"PATIENT LOAD ({args.patients} patients, concurrency {args.concurrency}, {args.base_url})")
+    print("=" * 86)
+    print(f"{'endpoint':<30}{'calls':>7}{'errors':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for endpoint in ENDPOINTS:
+        values = sorted(samples[endpoint])
+        failed = sum(n for (name, _), n in errors.items() if name == endpoint)
+        print(f"{endpoint:<30}{len(values):>7}{failed:>8}{len(values) / wall:>9.1f}"
+              f"{percentile(values, 0.50) * 1000:>9.0f}{percentile(values, 0.95) * 1000:>9.0f}"
+              f"{percentile(values, 0.99) * 1000:>9.0f}{(values[-1] if values else 0) * 1000:>9.0f}")
+    print("-" * 86)
+    completed = sum(1 for ok in results if ok)
+    print(f"patients completed {completed}/{len(results)} in {wall:.1f} s ({completed / wall:.2f} patients/s)")
+    if errors:
+        print("errors: " + ", ".join(f"{name} -> {kind} x{n}" for (name, kind), n in sorted(errors.items(), key=str)))
+    if llm:
+        print(f"server llm limiter: admitted {llm.get('admitted')}, shed {llm.get('shed')}, "
+              f"provider 429s {llm.get('provider_429s')}, wait p95 {llm.get('wait_ms_p95')} ms")
+    print("=" * 86)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="simulated patients: start, scripted chat, finalize")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--patients", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=20, help="patients in flight at once")
+    parser.add_argument("--ramp", type=float, default=0.0, help="seconds over which patients arrive")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="mean pause before each message")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--email", default="loadtest-doctor@example.com")
+    parser.add_argument("--password", default="loadtest-password")
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,99 @@
+#backend/benchmarks/log_overhead.py
+#caller-side cost of one hot-path log call: print vs queued logger (enabled and disabled)
+#
+#usage (from project root):
+#   python -m backend.benchmarks.log_overhead --calls 20000
+#   python -m backend.benchmarks.log_overhead --sink-ms 0.5    #a slow terminal / log pipe
+#
+#every mode writes to the same sink. --sink-ms makes each write to it sleep, like stdout
+#attached to a terminal or a log shipper that is falling behind: print waits for it on
+#the request path, the queued logger leaves it to the listener thread (and drops records
+#once LOG_QUEUE_SIZE are waiting, which the dropped column counts).
+import argparse
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.app import logging_config
+from backend.app.logging_config import setup_logging, stop_logging, log_stats, request_id
+
+
+class Sink:
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.out = open(os.devnull, "w")
+        self.writes = 0
+
+    def write(self, text: str):
+        if self.delay:
+            time.sleep(self.delay)
+        self.writes += 1
+        return self.out.write(text)
+
+    def flush(self):
+        self.out.flush()
+
+
+def timed(calls: int, fn) -> list:
+    samples = []
+    for i in range(calls):
+        start = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - start)
+    return sorted(samples)
+
+
+def main(args):
+    sink = Sink(args.sink_ms / 1000)
+    session_id, symptom = 42, "headache"
+
+    #the listener writes to whatever sys.stdout is when logging is set up
+    real_stdout = sys.stdout
+    sys.stdout = sink
+    logging_config.LOG_LEVEL = "INFO"
+    setup_logging()
+    logger = logging.getLogger("backend.benchmarks.log_overhead")
+    request_id.set("bench")
+
+    modes = (
+        ("print(f\"...\")", lambda i: print(f"🎯 Currently asking about: {symptom} (session {session_id}, turn {i})", file=sink)),
+        ("logger.debug, level INFO", lambda i: logger.debug("🎯 Currently asking about: %s (session %d, turn %d)", symptom, session_id, i)),
+        ("logger.info, queued", lambda i: logger.info("🎯 Currently asking about: %s (session %d, turn %d)", symptom, session_id, i)),
+    )
+
+    results = []
+    for name, fn in modes:
+        before = log_stats()["dropped"]
+        samples = timed(args.calls, fn)
+        results.append((name, samples, log_stats()["dropped"] - before))
+
+    drain_start = time.perf_counter()
+    stop_logging()
+    drain = time.perf_counter() - drain_start
+    sys.stdout = real_stdout
+
+    print("=" * 78)
+    print(f"LOG CALL OVERHEAD ({args.calls} calls per mode, sink {args.sink_ms:g} ms per write)")
+    print("=" * 78)
+    print(f"{'mode':<28}{'mean us':>10}{'p50 us':>10}{'p99 us':>10}{'max us':>10}{'dropped':>10}")
+    for name, samples, dropped in results:
+        mean = sum(samples) / len(samples)
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+        print(f"{name:<28}{mean * 1e6:>10.2f}{samples[len(samples) // 2] * 1e6:>10.2f}"
+              f"{p99 * 1e6:>10.2f}{samples[-1] * 1e6:>10.1f}{dropped:>10}")
+    print("-" * 78)
+    print(f"listener drained the remaining queue in {drain * 1000:.0f} ms at shutdown")
+    print("=" * 78)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="print vs queued structured logging, caller-side cost")
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--sink-ms", type=float, default=0.0, help="delay per write to the output")
+    main(parser.parse_args())
@@ -0,0 +1,173 @@
+#backend/benchmarks/mock_llm_server.py
+#local openai-compatible chat completions server for load tests, no quota spent
+#
+#usage (from project root):
+#   python -m backend.benchmarks.mock_llm_server --port 8001
+#   python -m backend.benchmarks.mock_llm_server --latency lognormal:0.8,0.4 --token-ms 15 --error-rate 0.01
+#
+#point the app at it with LLM_PROVIDER=openai LLM_BASE_URL=http://127.0.0.1:8001/v1
+#(or LLM_PROVIDER=groq with the groq sdk's base_url, /openai/v1 is served too).
+#--latency is the time before the reply (before the first token when streaming):
+#   fixed:0.5  uniform:0.2,1.0  normal:0.6,0.15  lognormal:0.6,0.5 (median, sigma)
+#--token-ms spaces out streamed chunks. json-mode calls (symptom extraction) get a
+#plausible updated state back: the current state from the prompt plus any symptom named
+#in the user message. GET /stats has request counts and the latencies actually served.
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+KNOWN_SYMPTOMS = (
+    "headache", "cough", "fever", "sore throat", "nausea", "back pain", "chest pain",
+    "dizziness", "fatigue", "rash", "stomach ache", "shortness of breath"
+)
+REPLIES = (
+    "How severe is it on a scale of 1 to 10?",
+    "How long have you had it?",
+    "How often does it happen?",
+    "Do you have any other symptoms you want to mention?",
+    "Thank you, I have noted everything for your doctor.",
+)
+EXTRACT_RE = re.compile(r"CURRENT STATE:\n(.*?)\nCURRENTLY DISCUSSING:.*?USER MESSAGE:\n\"(.*?)\"\nRULES:", re.S)
+
+
+def latency_sampler(spec: str, rng: random.Random):
+    #"kind:a,b" -> function returning seconds
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",") if v]
+    samplers = {
+        "fixed": lambda: values[0],
+        "uniform": lambda: rng.uniform(values[0], values[1]),
+        "normal": lambda: max(0.0, rng.gauss(values[0], values[1])),
+        "lognormal": lambda: rng.lognormvariate(math.log(values[0]), values[1]),
+    }
+    if kind not in samplers:
+        raise ValueError(f"unknown latency distribution '{spec}', use one of {', '.join(samplers)}")
+    return samplers[kind]
+
+
+def mock_extraction(prompt: str) -> str:
+    match = EXTRACT_RE.search(prompt)
+    state = {"symptoms": []}
+    message = ""
+    if match:
+        try:
+            state = json.loads(match.group(1))
+        except ValueError:
+            pass
+        message = match.group(2).lower()
+
+    named = {s.get("symptom", "").lower() for s in state.get("symptoms", [])}
+    for symptom in KNOWN_SYMPTOMS:
+        if symptom in message and symptom not in named:
+            state.setdefault("symptoms", []).append(
+                {"symptom": symptom, "severity": None, "duration": None, "frequency": None}
+            )
+    return json.dumps(state)
+
+
+def build_app(latency: str = "lognormal:0.6,0.4", token_ms: float = 20, error_rate: float = 0.0, seed: int = 1):
+    rng = random.Random(seed)
+    sample = latency_sampler(latency, rng)
+    stats = {"requests": 0, "streamed": 0, "errors_injected": 0, "latencies": []}
+    app = FastAPI(title="mock llm")
+
+    def usage(messages: list, content: str) -> dict:
+        prompt_tokens = sum(len(m.get("content") or "") for m in messages) // 4
+        completion_tokens = max(1, len(content) // 4)
+        return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens}
+
+    async def completions(request: Request):
+        body = await request.json()
+        messages = body.get("messages", [])
+        stats["requests"] += 1
+
+        delay = sample()
+        stats["latencies"].append(delay)
+        await asyncio.sleep(delay)
+
+        if rng.random() < error_rate:
+            stats["errors_injected"] += 1
+            return JSONResponse({"error": {"message": "injected failure", "type": "server_error"}}, status_code=500)
+
+        json_mode = (body.get("response_format") or {}).get("type") == "json_object"
+        content = mock_extraction(messages[0]["content"] if messages else "") if json_mode else rng.choice(REPLIES)
+        created = int(time.time())
+        model = body.get("model", "mock")
+
+        if not body.get("stream"):
+            return {
+                "id": f"chatcmpl-mock-{stats['requests']}", "object": "chat.completion", "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": usage(messages, content)
+            }
+
+        stats["streamed"] += 1
+
+        async def events():
+            words = content.split(" ")
+            for i, word in enumerate(words):
+                chunk = {
+                    "id": "chatcmpl-mock", "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": [{"index": 0, "delta": {"content": word + (" " if i < len(words) - 1 else "")},
+                                 "finish_reason": None}]
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+                await asyncio.sleep(token_ms / 1000)
+            done = {"id": "chatcmpl-mock", "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+            yield f"data: {json.dumps(done)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    app.add_api_route("/v1/chat/completions", completions, methods=["POST"])
+    app.add_api_route("/openai/v1/chat/completions", completions, methods=["POST"])  #groq sdk path
+
+    @app.get("/v1/models")
+    def models():
+        return {"object": "list", "data": [{"id": "llama-3.3-70b-versatile", "object": "model", "owned_by": "mock"}]}
+
+    @app.get("/stats")
+    def get_stats():
+        latencies = sorted(stats["latencies"])
+        pick = lambda q: round(latencies[min(len(latencies) - 1, int(len(latencies) * q))] * 1000, 1) if latencies else 0.0
+        return {
+            "requests": stats["requests"],
+            "streamed": stats["streamed"],
+            "errors_injected": stats["errors_injected"],
+            "latency": latency,
+            "latency_ms_p50": pick(0.5),
+            "latency_ms_p95": pick(0.95),
+            "latency_ms_p99": pick(0.99)
+        }
+
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="openai-compatible mock llm server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", default="lognormal:0.6,0.4", help="fixed:s | uniform:a,b | normal:mu,sigma | lognormal:median,sigma")
+    parser.add_argument("--token-ms", type=float, default=20, help="delay between streamed chunks")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls answered with a 500")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    print(f"🧪 Mock LLM on http://{args.host}:{args.port}/v1 (latency {args.latency}, {args.token_ms:g} ms/chunk)")
+    uvicorn.run(build_app(args.latency, args.token_ms, args.error_rate, args.seed),
+                host=args.host, port=args.port, log_level="warning")
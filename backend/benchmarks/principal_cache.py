@@ -0,0 +1,111 @@
+#backend/benchmarks/principal_cache.py
+#doctor SELECTs and time per authenticated request, with and without the principal cache
+#
+#usage (from project root):
+#   python -m backend.benchmarks.principal_cache --doctors 20 --polls 50
+#
+#each doctor's dashboard polls an authenticated endpoint --polls times. runs against an
+#in-memory sqlite database, so the saved time is a lower bound (no network round trip).
+#finishes by renaming a doctor to show the cached principal is dropped on update.
+import argparse
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.app import model
+from backend.app.database import Base, get_db
+from backend.app.auth_security_dependencies import get_current_doctor
+from backend.services.auth_service import create_access_token
+from backend.services.principal_cache import principal_cache
+
+
+def build(doctors: int):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    LocalSession = sessionmaker(bind=engine)
+
+    selects = {"doctors": 0}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "FROM doctors" in statement:
+            selects["doctors"] += 1
+
+    db = LocalSession()
+    for i in range(doctors):
+        db.add(model.Doctor(full_name=f"Doctor {i}", email=f"doctor{i}@example.com", password_hash="x"))
+    db.commit()
+    tokens = [create_access_token({"sub": str(d.id)}) for d in db.query(model.Doctor).order_by(model.Doctor.id)]
+    db.close()
+
+    def override_db():
+        session = LocalSession()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app = FastAPI()
+    app.dependency_overrides[get_db] = override_db
+
+    @app.get("/dashboard")
+    def dashboard(doctor: model.Doctor = Depends(get_current_doctor)):
+        return {"doctor": doctor.full_name}
+
+    return app, LocalSession, tokens, selects
+
+
+def poll(client: TestClient, tokens: list, polls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(polls):
+        for token in tokens:
+            client.get("/dashboard", headers={"Authorization": f"Bearer {token}"}).raise_for_status()
+    return time.perf_counter() - start
+
+
+def main(args):
+    app, LocalSession, tokens, selects = build(args.doctors)
+    requests = args.doctors * args.polls
+
+    print("=" * 70)
+    print(f"PRINCIPAL CACHE ({args.doctors} doctors x {args.polls} polls = {requests} requests)")
+    print("=" * 70)
+
+    with TestClient(app) as client:
+        size = principal_cache.max_entries
+        for name, max_entries in (("no cache", 0), ("cache", size)):
+            principal_cache.clear()
+            principal_cache.max_entries = max_entries
+            before = selects["doctors"]
+            saved_before = principal_cache.stats()["db_lookups_saved"]
+            elapsed = poll(client, tokens, args.polls)
+            saved = principal_cache.stats()["db_lookups_saved"] - saved_before
+            print(f"{name:<9}: doctor selects {selects['doctors'] - before:6d}  saved {saved:6d}  "
+                  f"{elapsed * 1000 / requests:6.3f} ms/request")
+
+        #an orm update invalidates, the next request sees the new name
+        db = LocalSession()
+        doctor = db.query(model.Doctor).order_by(model.Doctor.id).first()
+        doctor.full_name = "Renamed Doctor"
+        db.commit()
+        db.close()
+        res = client.get("/dashboard", headers={"Authorization": f"Bearer {tokens[0]}"})
+        print(f"after rename: {res.json()['doctor']!r}  invalidations={principal_cache.stats()['invalidations']}")
+
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="principal cache db lookup benchmark")
+    parser.add_argument("--doctors", type=int, default=20)
+    parser.add_argument("--polls", type=int, default=50)
+    main(parser.parse_args())
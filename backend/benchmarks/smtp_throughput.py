@@ -0,0 +1,170 @@
+#backend/benchmarks/smtp_throughput.py
+#report email throughput: new connection + login per report (old send_report_email)
+#vs the pooled SMTPConnectionPool in email_service
+#
+#usage (from project root):
+#   python -m backend.benchmarks.smtp_throughput --messages 200 --pool-size 4 --handshake-latency 0.15
+#
+#runs against a local SMTP stand-in server (no real mail is sent). the stand-in
+#sleeps --handshake-latency on connect and on AUTH to model the TLS + login
+#round trips of a real provider, and --send-latency per message.
+import argparse
+import asyncio
+import os
+import smtplib
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+#the pool's default login; email_service only checks them when a report is sent
+os.environ.setdefault("SENDER_EMAIL", "bench@localhost")
+os.environ.setdefault("SENDER_APP_PASSWORD", "bench-password")
+os.environ.setdefault("DOCTOR_EMAIL", "doctor@localhost")
+
+from backend.services.email_service import SMTPConnectionPool, build_report_message
+
+
+class StandInSMTPServer:
+
+    #just enough SMTP (EHLO, AUTH PLAIN, MAIL, RCPT, DATA, NOOP, RSET, QUIT) for smtplib
+
+    def __init__(self, handshake_latency: float, send_latency: float):
+        self.handshake_latency = handshake_latency
+        self.send_latency = send_latency
+        self.connections = 0
+        self.messages = 0
+        self.port = None
+        self._ready = threading.Event()
+        self._loop = None
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        await asyncio.sleep(self.handshake_latency)
+        writer.write(b"220 localhost stand-in ESMTP\r\n")
+        await writer.drain()
+
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            command = line.decode(errors="ignore").strip().upper()
+
+            if command.startswith(("EHLO", "HELO")):
+                writer.write(b"250-localhost\r\n250-AUTH PLAIN LOGIN\r\n250-SIZE 52428800\r\n250 8BITMIME\r\n")
+            elif command.startswith("AUTH"):
+                await asyncio.sleep(self.handshake_latency)
+                writer.write(b"235 2.7.0 Authentication successful\r\n")
+            elif command.startswith(("MAIL", "RCPT", "RSET", "NOOP")):
+                writer.write(b"250 OK\r\n")
+            elif command == "DATA":
+                writer.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                await writer.drain()
+                while (await reader.readline()) not in (b".\r\n", b""):
+                    pass
+                await asyncio.sleep(self.send_latency)
+                self.messages += 1
+                writer.write(b"250 OK queued\r\n")
+            elif command == "QUIT":
+                writer.write(b"221 Bye\r\n")
+                await writer.drain()
+                break
+            else:
+                writer.write(b"502 Command not implemented\r\n")
+            await writer.drain()
+
+        writer.close()
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        server = self._loop.run_until_complete(asyncio.start_server(self._handle, "127.0.0.1", 0))
+        self.port = server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+        self._ready.wait()
+
+
+def make_pdf(size_kb: int) -> str:
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    with os.fdopen(fd, "wb") as f:
+        f.write(b"%PDF-1.4\n" + os.urandom(size_kb * 1024))
+    return path
+
+
+def send_unpooled(port: int, msg):
+    #what send_report_email did before: connect, login, send, quit for every report
+    server = smtplib.SMTP("127.0.0.1", port, timeout=30)
+    server.login("bench@localhost", "bench-password")
+    server.send_message(msg)
+    server.quit()
+
+
+def run_unpooled(port: int, messages: list, concurrency: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(lambda m: send_unpooled(port, m), messages))
+    return time.perf_counter() - start
+
+
+def run_pooled(port: int, messages: list, pool_size: int):
+    pool = SMTPConnectionPool(
+        host="127.0.0.1", port=port, username="bench@localhost", password="bench-password",
+        use_starttls=False, size=pool_size
+    )
+    #more senders than connections, like report workers: the pool's slots cap concurrent sends
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=pool_size * 2) as executor:
+        list(executor.map(pool.send, messages))
+    elapsed = time.perf_counter() - start
+    stats = pool.stats()
+    pool.close_all()
+    return elapsed, stats
+
+
+def main(args):
+    server = StandInSMTPServer(args.handshake_latency, args.send_latency)
+    server.start()
+
+    pdf_path = make_pdf(args.pdf_kb)
+    try:
+        messages = [
+            build_report_message(pdf_path, f"Patient {i}", i, "doctor@localhost")
+            for i in range(args.messages)
+        ]
+
+        print("=" * 70)
+        print(f"SMTP THROUGHPUT ({args.messages} reports, {args.pdf_kb} KB pdf, "
+              f"handshake {args.handshake_latency}s, send {args.send_latency}s)")
+        print("=" * 70)
+
+        before = server.connections
+        elapsed = run_unpooled(server.port, messages, args.pool_size)
+        print(f"per-report connection : {args.messages / elapsed:8.1f} msg/s  "
+              f"{elapsed:6.2f}s  connections={server.connections - before}")
+
+        before = server.connections
+        elapsed, stats = run_pooled(server.port, messages, args.pool_size)
+        print(f"pooled ({args.pool_size} conns)     : {args.messages / elapsed:8.1f} msg/s  "
+              f"{elapsed:6.2f}s  connections={server.connections - before}  "
+              f"reconnects={stats['reconnects']}")
+        print("=" * 70)
+    finally:
+        os.remove(pdf_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="pooled vs per-report SMTP delivery benchmark")
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--pool-size", type=int, default=4, help="pool size, also the unpooled concurrency")
+    parser.add_argument("--handshake-latency", type=float, default=0.15, help="seconds for connect and for AUTH")
+    parser.add_argument("--send-latency", type=float, default=0.01, help="seconds per accepted message")
+    parser.add_argument("--pdf-kb", type=int, default=30)
+    main(parser.parse_args())
@@ -0,0 +1,120 @@
+#backend/benchmarks/startup_budget.py
+#cold start budget: time to import backend.app.main and to serve the first request
+#
+#usage (from project root):
+#   python -m backend.benchmarks.startup_budget
+#   python -m backend.benchmarks.startup_budget --runs 5 --import-budget-ms 1500 --first-request-budget-ms 100
+#
+#every run is a fresh interpreter with no SMTP settings and an unreachable DB_HOST, so
+#importing the app must neither validate email config nor touch the database. reports
+#the median import time, first and second request latency (GET / without the lifespan
+#hook) and the packages that take longest to import, and exits non-zero if a budget is exceeded or
+#a lazily loaded subsystem (groq, speech_recognition, reportlab) was imported anyway.
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+LAZY_MODULES = ("groq", "speech_recognition", "reportlab")
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import backend.app.main as main
+imported = time.perf_counter() - start
+
+from fastapi.testclient import TestClient
+client = TestClient(main.app)  #no context manager: the lifespan hook (workers, init_db) stays off
+start = time.perf_counter()
+client.get("/").raise_for_status()
+first = time.perf_counter() - start
+start = time.perf_counter()
+client.get("/").raise_for_status()
+second = time.perf_counter() - start
+
+print(json.dumps({
+    "import_ms": imported * 1000,
+    "first_request_ms": first * 1000,
+    "second_request_ms": second * 1000,
+    "eager": [name for name in %r if name in sys.modules]
+}))
+""" % (LAZY_MODULES,)
+
+
+def child_env() -> dict:
+    env = dict(os.environ)
+    for name in ("SENDER_EMAIL", "SENDER_APP_PASSWORD", "DOCTOR_EMAIL"):
+        env.pop(name, None)
+    env["DB_HOST"] = "db.invalid"
+    env["PYTHONPATH"] = str(project_root)
+    return env
+
+
+def run_once(importtime: bool = False):
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", CHILD]
+    result = subprocess.run(cmd, cwd=project_root, env=child_env(), capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "child failed")
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def top_imports(stderr: str, count: int):
+    #packages by the self time of all their modules, from -X importtime
+    totals = {}
+    for line in stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+) \|\s+\d+ \| +(\S+)$", line)
+        if match:
+            name = match.group(2).split(".")[0]
+            totals[name] = totals.get(name, 0) + int(match.group(1))
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:count]
+
+
+def main(args):
+    runs = [run_once()[0] for _ in range(args.runs)]
+    _, importtime = run_once(importtime=True)
+
+    import_ms = statistics.median(run["import_ms"] for run in runs)
+    first_ms = statistics.median(run["first_request_ms"] for run in runs)
+    second_ms = statistics.median(run["second_request_ms"] for run in runs)
+    eager = sorted({name for run in runs for name in run["eager"]})
+
+    print("=" * 60)
+    print(f"STARTUP BUDGET (median of {args.runs} fresh interpreters)")
+    print("=" * 60)
+    print(f"{'import backend.app.main':<28}{import_ms:>10.1f} ms   budget {args.import_budget_ms:.0f}")
+    print(f"{'first request':<28}{first_ms:>10.1f} ms   budget {args.first_request_budget_ms:.0f}")
+    print(f"{'second request':<28}{second_ms:>10.1f} ms")
+    print("slowest packages to import (self time):")
+    for name, micros in top_imports(importtime, args.top):
+        print(f"   {name:<25}{micros / 1000:>10.1f} ms")
+    print("=" * 60)
+
+    ok = True
+    if eager:
+        print(f"❌ loaded at import, should be lazy: {', '.join(eager)}")
+        ok = False
+    if import_ms > args.import_budget_ms:
+        print(f"❌ import over budget by {import_ms - args.import_budget_ms:.0f} ms")
+        ok = False
+    if first_ms > args.first_request_budget_ms:
+        print(f"❌ first request over budget by {first_ms - args.first_request_budget_ms:.0f} ms")
+        ok = False
+    if ok:
+        print("✅ within budget")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="import and first request latency of the app")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--import-budget-ms", type=float, default=2000)
+    parser.add_argument("--first-request-budget-ms", type=float, default=100)
+    parser.add_argument("--top", type=int, default=8, help="slowest packages to list")
+    main(parser.parse_args())
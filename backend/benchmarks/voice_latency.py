@@ -0,0 +1,133 @@
+#backend/benchmarks/voice_latency.py
+#time from "patient stops talking" to transcript: record-then-upload (/sessions/transcribe-audio)
+#vs streaming over the websocket (/sessions/transcribe-stream)
+#
+#usage (from project root):
+#   python -m backend.benchmarks.voice_latency --utterances 3 --utterance-seconds 3 --rtf 0.3
+#
+#uses the stub recognizer (no network): --base-latency per request plus --rtf seconds
+#per second of audio, roughly how hosted recognizers behave. audio is streamed in real
+#time in --chunk-ms chunks, so a run takes about as long as the speech it simulates.
+import argparse
+import io
+import os
+import sys
+import threading
+import time
+import wave
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="upload vs streamed voice transcription latency")
+    parser.add_argument("--utterances", type=int, default=3)
+    parser.add_argument("--utterance-seconds", type=float, default=3.0)
+    parser.add_argument("--pause-seconds", type=float, default=0.8, help="silence between utterances")
+    parser.add_argument("--chunk-ms", type=int, default=100)
+    parser.add_argument("--base-latency", type=float, default=0.3, help="stub recognizer seconds per request")
+    parser.add_argument("--rtf", type=float, default=0.3, help="stub recognizer seconds per audio second")
+    return parser.parse_args()
+
+
+args = parse_args()
+
+#the recognizer and email config are read at import time
+os.environ["TRANSCRIBE_ENGINE"] = "stub"
+os.environ["STUB_TRANSCRIBE_LATENCY"] = str(args.base_latency)
+os.environ["STUB_TRANSCRIBE_RTF"] = str(args.rtf)
+os.environ.setdefault("SENDER_EMAIL", "bench@localhost")
+os.environ.setdefault("SENDER_APP_PASSWORD", "bench-password")
+os.environ.setdefault("DOCTOR_EMAIL", "doctor@localhost")
+
+import numpy as np
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.routers import sessions
+from backend.services.transcription import TARGET_RATE
+
+
+def make_speech() -> bytes:
+    #voiced bursts separated by pauses, 16 kHz mono 16-bit pcm
+    rate = TARGET_RATE
+    parts = [np.zeros(int(0.3 * rate))]
+    for _ in range(args.utterances):
+        t = np.arange(int(args.utterance_seconds * rate)) / rate
+        voiced = sum(np.sin(2 * np.pi * f * t) / (i + 1) for i, f in enumerate((160, 320, 640)))
+        parts.append(0.25 * voiced * (0.6 + 0.4 * np.sin(2 * np.pi * 4 * t)))
+        parts.append(np.zeros(int(args.pause_seconds * rate)))
+    return (np.concatenate(parts) * 32767).astype("<i2").tobytes()
+
+
+def to_wav(pcm: bytes) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(TARGET_RATE)
+        w.writeframes(pcm)
+    return buffer.getvalue()
+
+
+def run_upload(client: TestClient, pcm: bytes):
+    #the recording is done when the patient stops, then the whole clip is uploaded
+    start = time.perf_counter()
+    res = client.post("/sessions/transcribe-audio", files={"file": ("voice.wav", to_wav(pcm), "audio/wav")})
+    res.raise_for_status()
+    return time.perf_counter() - start, None
+
+
+def run_stream(client: TestClient, pcm: bytes):
+    chunk_bytes = TARGET_RATE * 2 * args.chunk_ms // 1000
+    arrivals = []  #(seconds since speech start, message), filled by the reader thread
+
+    with client.websocket_connect("/sessions/transcribe-stream") as ws:
+        speech_start = time.perf_counter()
+
+        def read():
+            while True:
+                message = ws.receive_json()
+                arrivals.append((time.perf_counter() - speech_start, message))
+                if message["type"] in ("final", "error"):
+                    return
+
+        reader = threading.Thread(target=read, daemon=True)
+        reader.start()
+
+        for i in range(0, len(pcm), chunk_bytes):
+            ws.send_bytes(pcm[i:i + chunk_bytes])
+            time.sleep(args.chunk_ms / 1000)  #real time, like a microphone
+
+        ws.send_json({"type": "end"})
+        end = time.perf_counter() - speech_start
+        reader.join()
+
+    first_partial = next((t for t, m in arrivals if m["type"] == "partial"), None)
+    return arrivals[-1][0] - end, first_partial
+
+
+def main():
+    app = FastAPI()
+    app.include_router(sessions.router, prefix="/sessions")
+    pcm = make_speech()
+    speech_seconds = len(pcm) / (TARGET_RATE * 2)
+
+    print("=" * 70)
+    print(f"VOICE LATENCY ({args.utterances} x {args.utterance_seconds}s utterances, {speech_seconds:.1f}s audio, "
+          f"recognizer {args.base_latency}s + {args.rtf}x audio)")
+    print("=" * 70)
+
+    with TestClient(app) as client:
+        for name, fn in (("record + upload", run_upload), ("websocket stream", run_stream)):
+            latency, first_partial = fn(client, pcm)
+            first = f"  first text at {first_partial:.2f}s" if first_partial is not None else ""
+            print(f"{name:<18}: transcript {latency:6.2f}s after the patient stops{first}")
+
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,39 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Query
+from starlette.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import insert, or_, and_
+from sqlalchemy.orm import Session, joinedload, selectinload
 from datetime import datetime
+from typing import Optional
 import secrets
+import base64
+import csv
+import io
+import json
+import os
+import logging
 
-from backend.app.database import get_db
+from backend.app.database import get_db, get_read_db
 from backend.app import schemas,model
 from backend.app.auth_security_dependencies import get_current_doctor
-from backend.services.code_service import generate_access_code
+from backend.services.code_service import access_code_pool
+from backend.services.symptom_store import COMPLETE
 
 
 router = APIRouter(prefix="/appointments", tags=["Appointments"])
+logger = logging.getLogger(__name__)
+
+BULK_APPOINTMENT_LIMIT = int(os.getenv("BULK_APPOINTMENT_LIMIT", "1000"))
+DASHBOARD_PAGE_SIZE = 25
+DASHBOARD_MAX_PAGE_SIZE = 100
 
 @router.post("/", response_model=schemas.AppointmentResponse)
 def create_appointments(
         payload:schemas.AppointmentCreate,
         db: Session = Depends(get_db),
         doctor: model.Doctor = Depends(get_current_doctor)):
-    access_code = generate_access_code()
+    #claimed in this transaction, committed together with the appointment
+    access_code = access_code_pool.claim(db)
 
     appointment = model.Appointment(
         doctor_id=doctor.id,
@@ -27,4 +44,232 @@ def create_appointments(
     db.add(appointment)
     db.commit()
     db.refresh(appointment)
-    return appointment
\ No newline at end of file
+    return appointment
+
+
+#bulk import helpers
+def _parse_csv(text: str) -> list:
+    #header row with appointment_date and optionally patient_name, patient_email
+    reader = csv.DictReader(io.StringIO(text))
+    return [
+        {key.strip(): (value or "").strip() or None for key, value in row.items() if key is not None}
+        for row in reader
+    ]
+
+
+async def _read_bulk_rows(request: Request) -> list:
+    content_type = request.headers.get("content-type", "")
+    try:
+        rows = await _parse_bulk_body(request, content_type)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Could not parse the appointment list")
+
+    if not isinstance(rows, list) or not rows:
+        raise HTTPException(status_code=400, detail="Expected a non-empty list of appointments")
+    if len(rows) > BULK_APPOINTMENT_LIMIT:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_APPOINTMENT_LIMIT} appointments per import")
+    return rows
+
+
+async def _parse_bulk_body(request: Request, content_type: str):
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="Upload the list as a 'file' field")
+        text = (await upload.read()).decode("utf-8-sig")
+        rows = json.loads(text) if (upload.filename or "").lower().endswith(".json") else _parse_csv(text)
+    elif content_type.startswith("application/json"):
+        rows = await request.json()
+    elif content_type.startswith("text/csv"):
+        rows = _parse_csv((await request.body()).decode("utf-8-sig"))
+    else:
+        raise HTTPException(status_code=415, detail="Send a JSON array, a CSV body (text/csv) or a file upload")
+    return rows
+
+
+def _validate_bulk_rows(rows: list) -> list:
+    #check every row up front so nothing is inserted when any row is bad
+    items = []
+    errors = []
+    for number, row in enumerate(rows, start=1):
+        try:
+            if not isinstance(row, dict):
+                raise TypeError("expected an object")
+            items.append(schemas.AppointmentBulkItem(**row))
+        except (ValidationError, TypeError) as e:
+            messages = [
+                {"field": ".".join(str(part) for part in err["loc"]), "message": err["msg"]}
+                for err in e.errors()
+            ] if isinstance(e, ValidationError) else [{"field": "", "message": str(e)}]
+            errors.append({"row": number, "errors": messages})
+
+    if errors:
+        raise HTTPException(status_code=422, detail={"message": "Some rows are invalid", "rows": errors[:50]})
+    return items
+
+
+def _insert_bulk(db: Session, doctor_id: int, items: list) -> list:
+    #patients with an email are matched or created by email in bulk
+    user_ids = {}
+    emails = {item.patient_email.lower(): item for item in items if item.patient_email}
+    if emails:
+        existing = db.query(model.User.id, model.User.email).filter(model.User.email.in_(list(emails))).all()
+        user_ids = {row.email.lower(): row.id for row in existing}
+
+        new_users = [
+            {"full_name": item.patient_name, "email": item.patient_email}
+            for email, item in emails.items() if email not in user_ids
+        ]
+        if new_users:
+            db.execute(insert(model.User), new_users)
+            created = db.query(model.User.id, model.User.email).filter(
+                model.User.email.in_([user["email"] for user in new_users])
+            ).all()
+            user_ids.update({row.email.lower(): row.id for row in created})
+
+    #name-only patients have nothing to look them up by, so they are flushed as objects
+    named = {}
+    for position, item in enumerate(items):
+        if item.patient_name and not item.patient_email:
+            named[position] = model.User(full_name=item.patient_name)
+    if named:
+        db.add_all(named.values())
+        db.flush()
+
+    codes = access_code_pool.claim_many(db, len(items))
+
+    db.execute(insert(model.Appointment), [
+        {
+            "doctor_id": doctor_id,
+            "user_id": user_ids.get(item.patient_email.lower()) if item.patient_email
+            else (named[position].id if position in named else None),
+            "appointment_date": item.appointment_date,
+            "access_code": code,
+            "status": "scheduled"
+        }
+        for position, (item, code) in enumerate(zip(items, codes))
+    ])
+    db.commit()
+
+    #read the batch back by code, in input order
+    appointments = db.query(model.Appointment).filter(model.Appointment.access_code.in_(codes)).all()
+    by_code = {appointment.access_code: appointment for appointment in appointments}
+    return [by_code[code] for code in codes]
+
+
+@router.post("/bulk", response_model=schemas.AppointmentBulkResponse)
+async def create_appointments_bulk(
+        request: Request,
+        db: Session = Depends(get_db),
+        doctor: model.Doctor = Depends(get_current_doctor)):
+    #a whole day's list in one transaction: json array, csv body or uploaded .csv/.json file.
+    #rows: appointment_date, optional patient_name and patient_email
+    rows = await _read_bulk_rows(request)
+    items = _validate_bulk_rows(rows)
+
+    #the inserts are blocking db work, keep them off the event loop
+    appointments = await run_in_threadpool(_insert_bulk, db, doctor.id, items)
+    logger.info("📅 Bulk created %d appointments for doctor %d", len(appointments), doctor.id)
+
+    return {"created": len(appointments), "appointments": appointments}
+
+
+#dashboard helpers
+def _encode_cursor(appointment) -> str:
+    raw = f"{appointment.appointment_date.isoformat()}|{appointment.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str):
+    try:
+        appointment_date, appointment_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(appointment_date), int(appointment_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _dashboard_item(appointment) -> dict:
+    session = appointment.sessions
+    return {
+        "id": appointment.id,
+        "appointment_date": appointment.appointment_date,
+        "status": appointment.status,
+        "access_code": appointment.access_code,
+        "patient": {
+            "id": appointment.user.id,
+            "full_name": appointment.user.full_name,
+            "email": appointment.user.email
+        } if appointment.user else None,
+        "session": {
+            "id": session.id,
+            "started_at": session.started_at,
+            "ended_at": session.ended_at,
+            "report_status": session.report_job.status if session.report_job else None
+        } if session else None,
+        "symptoms": session.summary_content.get("symptoms", []) if session else []
+    }
+
+
+@router.get("/dashboard", response_model=schemas.DashboardPage)
+def get_dashboard(
+        status: Optional[str] = Query(None, pattern="^(scheduled|in_progress|completed|cancelled)$"),
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        symptom: Optional[str] = Query(None, max_length=100),
+        incomplete: bool = False,
+        cursor: Optional[str] = None,
+        limit: int = Query(DASHBOARD_PAGE_SIZE, ge=1, le=DASHBOARD_MAX_PAGE_SIZE),
+        db: Session = Depends(get_read_db),
+        doctor: model.Doctor = Depends(get_current_doctor)):
+    #the doctor's appointments by (appointment_date, id) with patient, session state and symptoms.
+    #symptom= keeps appointments whose session has that symptom, incomplete=true the ones with a
+    #symptom still missing details; both are answered from the symptoms indexes.
+    #three statements per page whatever its size: the appointments joined to their patients,
+    #one select-in for the sessions with their report job (and old summary json), one for their symptoms
+    query = db.query(model.Appointment).options(
+        joinedload(model.Appointment.user),
+        selectinload(model.Appointment.sessions).options(
+            joinedload(model.Session.summary),
+            joinedload(model.Session.report_job),
+            selectinload(model.Session.symptoms)
+        )
+    ).filter(
+        model.Appointment.doctor_id == doctor.id
+    )
+
+    if status:
+        query = query.filter(model.Appointment.status == status)
+    if date_from:
+        query = query.filter(model.Appointment.appointment_date >= date_from)
+    if date_to:
+        query = query.filter(model.Appointment.appointment_date < date_to)
+    if symptom and symptom.strip():
+        query = query.filter(model.Appointment.sessions.has(
+            model.Session.symptoms.any(model.Symptom.name_key == symptom.strip().lower())
+        ))
+    if incomplete:
+        query = query.filter(model.Appointment.sessions.has(
+            model.Session.symptoms.any(model.Symptom.completeness < COMPLETE)
+        ))
+
+    if cursor:
+        #keyset: strictly after the last row of the previous page, no OFFSET scan
+        last_date, last_id = _decode_cursor(cursor)
+        query = query.filter(or_(
+            model.Appointment.appointment_date > last_date,
+            and_(model.Appointment.appointment_date == last_date, model.Appointment.id > last_id)
+        ))
+
+    rows = query.order_by(
+        model.Appointment.appointment_date, model.Appointment.id
+    ).limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    return {
+        "items": [_dashboard_item(appointment) for appointment in rows],
+        "next_cursor": _encode_cursor(rows[-1]) if has_more else None,
+        "has_more": has_more
+    }
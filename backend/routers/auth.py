@@ -1,27 +1,41 @@
 from fastapi import APIRouter, HTTPException, Depends
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 
 from starlette.status import HTTP_401_UNAUTHORIZED
 
-from backend.app.database import get_db
+from backend.app.database import get_async_db
 from backend.app import model,schemas
 from backend.services.auth_service import (
-get_password_hash, verify_password, create_access_token
+get_password_hash, verify_and_update_password, create_access_token,
+password_hash_pool, PasswordHashOverloaded
 )
+from backend.services.principal_cache import principal_cache
 
 
 
 router = APIRouter()
+
+#argon2 runs on its own bounded pool, when it is full ask the client to retry
+async def _hash_call(fn, *args):
+    try:
+        return await password_hash_pool.run(fn, *args)
+    except PasswordHashOverloaded:
+        raise HTTPException(status_code=503,
+                            detail="Too many sign-in attempts right now. Please try again in a moment.",
+                            headers={"Retry-After": "1"})
+
 #register doctor
 @router.post("/register", response_model=schemas.DoctorResponse)
-def register_doctor(
+async def register_doctor(
         doctor: schemas.DoctorCreate,
-        db: Session = Depends(get_db)):
+        db: AsyncSession = Depends(get_async_db)):
     #check is doctor exists
-    existing_doctor = db.query(model.Doctor).filter(
-        model.Doctor.email == doctor.email).first()
+    result = await db.execute(select(model.Doctor).filter(
+        model.Doctor.email == doctor.email))
+    existing_doctor = result.scalars().first()
     if existing_doctor:
         raise HTTPException(status_code=400,
                             detail="Email already registered")
@@ -29,26 +43,37 @@ def register_doctor(
     new_doctor = model.Doctor(
         full_name=doctor.full_name,
         email=doctor.email,
-        password_hash=get_password_hash(doctor.password))
+        password_hash=await _hash_call(get_password_hash, doctor.password))
     db.add(new_doctor)
-    db.commit()
-    db.refresh(new_doctor)
+    await db.commit()
+    await db.refresh(new_doctor)
     return {"id":new_doctor.id, "full_name":new_doctor.full_name,
             "email": new_doctor.email}
 
 #login doctor
 @router.post("/login", response_model=schemas.Token)
-def login_doctor(
+async def login_doctor(
         form_data: OAuth2PasswordRequestForm=Depends(),
-        db: Session = Depends(get_db)):
-    doctor = db.query(model.Doctor).filter(
-        model.Doctor.email == form_data.username).first()
-    if not doctor or not verify_password(form_data.password, doctor.password_hash):
+        db: AsyncSession = Depends(get_async_db)):
+    result = await db.execute(select(model.Doctor).filter(
+        model.Doctor.email == form_data.username))
+    doctor = result.scalars().first()
+    if doctor:
+        valid, new_hash = await _hash_call(verify_and_update_password, form_data.password, doctor.password_hash)
+    if not doctor or not valid:
         raise HTTPException(
             status_code=HTTP_401_UNAUTHORIZED, detail="Incorrect email or password")
+    if new_hash:
+        #stored hash used older argon2 parameters, upgrade it now that we have the password
+        doctor.password_hash = new_hash
+        await db.commit()
     token = create_access_token({"sub": str(doctor.id)})
     return {"access_token": token, "token_type": "bearer"}
 
-
-
-
+#principal cache and password hashing stats, cache hits are doctor selects saved
+@router.get("/stats")
+def get_auth_stats():
+    return {
+        "principal_cache": principal_cache.stats(),
+        "password_hashing": password_hash_pool.stats()
+    }
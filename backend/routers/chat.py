@@ -1,15 +1,39 @@
+import json
+import math
+import asyncio
+import logging
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, func, delete
 from sqlalchemy.orm import Session
-from backend.app.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.app.database import get_read_db, get_async_db, AsyncSessionLocal
 from backend.app import model, schemas
-from backend.routers import sessions, appointments, auth
-from backend.services.ai_service import generate_ai_response
+from backend.services.ai_service import generate_ai_response, stream_ai_response
+from backend.services.fast_extractor import get_extraction_stats
+from backend.services.conversation_cache import conversation_cache
+from backend.services.extract_cache import extraction_cache
+from backend.services.rate_limiter import llm_limiter, LLMRateLimited
+from backend.services.symptom_store import load_state, save_state, current_symptom
 
 router = APIRouter(tags=["Chat"])
+logger = logging.getLogger(__name__)
+
+#extraction stats endpoint
+@router.get("/stats")
+def get_chat_stats():
+    #how turns were extracted and how well the caches are doing
+    return {
+        "extraction": get_extraction_stats(),
+        "conversation_cache": conversation_cache.stats(),
+        "extraction_cache": extraction_cache.stats(),
+        "llm_limiter": llm_limiter.stats()
+    }
+
 
 #get chat history endpoint
 @router.get("/{session_id}/history")
-def get_chat_history(session_id: int, db: Session = Depends(get_db)):
+def get_chat_history(session_id: int, db: Session = Depends(get_read_db)):
 
     #retrieve all previous chat messages for a session
 
@@ -36,7 +60,7 @@ def get_chat_history(session_id: int, db: Session = Depends(get_db)):
             "timestamp": msg.created_at.isoformat()
         })
 
-    print(f"📜 Retrieved {len(chat_history)} messages for session {session_id}")
+    logger.debug("📜 Retrieved %d messages for session %d", len(chat_history), session_id)
 
     return {
         "session_id": session_id,
@@ -45,49 +69,78 @@ def get_chat_history(session_id: int, db: Session = Depends(get_db)):
     }
 
 
-@router.post("/{session_id}", response_model=schemas.ChatResponse)
-def chat_with_ai(
-        session_id: int,
-        payload: schemas.MessageCreate,
-        db: Session = Depends(get_db)
-):
+#load session state, save the user message and build the chat history for a turn
+async def _start_turn(db: AsyncSession, session_id: int, content: str):
     #validate session
-    session = db.query(model.Session).filter(
-        model.Session.id == session_id
-    ).first()
+    result = await db.execute(
+        select(model.Session).filter(model.Session.id == session_id)
+    )
+    session = result.scalars().first()
 
     if not session:
         raise HTTPException(status_code=404, detail="Invalid session id")
 
-    existing_summary_row = db.query(model.Summary).filter(
-        model.Summary.session_id == session_id
-    ).first()
-    current_state = existing_summary_row.summary_content if existing_summary_row else None
+    #the session's symptom rows, and the json state the extractor works on built from them
+    symptom_rows, current_state = await load_state(db, session_id)
 
     #save user message
     user_message = model.Message(
         session_id=session_id,
         sender="user",
-        content=payload.content
+        content=content
     )
     db.add(user_message)
-    db.commit()
+    await db.commit()
 
-    messages = db.query(model.Message).filter(
-        model.Message.session_id == session_id
-    ).order_by(model.Message.created_at).all()
+    #newest message before this one, tells us whether the cached window is still current
+    result = await db.execute(
+        select(func.max(model.Message.id)).filter(
+            model.Message.session_id == session_id,
+            model.Message.id < user_message.id
+        )
+    )
+    previous_id = result.scalar()
 
-    #build chat history from db
-    chat_history = [
-        {
-            "role": "assistant" if m.sender == "ai" else "user",
-            "content": m.content
-        }
-        for m in messages
-    ]
+    chat_history = conversation_cache.get(session_id, previous_id)
+
+    if chat_history is None:
+        #cache miss: only load the window the ai actually looks at
+        result = await db.execute(
+            select(model.Message).filter(
+                model.Message.session_id == session_id
+            ).order_by(
+                model.Message.created_at.desc(), model.Message.id.desc()
+            ).limit(conversation_cache.window)
+        )
+        messages = reversed(result.scalars().all())
+
+        #build chat history from db
+        chat_history = [
+            {
+                "role": "assistant" if m.sender == "ai" else "user",
+                "content": m.content
+            }
+            for m in messages
+        ]
+        conversation_cache.put(session_id, chat_history, user_message.id)
+    else:
+        new_message = {"role": "user", "content": content}
+        conversation_cache.append(session_id, new_message, user_message.id)
+        chat_history = (chat_history + [new_message])[-conversation_cache.window:]
+
+    return symptom_rows, current_state, chat_history, user_message.id
 
-    #call AI
-    ai_response = generate_ai_response(chat_history, current_state)
+
+#the turn was shed before any reply: take the user message back out,
+#so the patient's retry isn't stored twice next to an unanswered copy
+async def _drop_turn(db: AsyncSession, session_id: int, message_id: int):
+    await db.execute(delete(model.Message).where(model.Message.id == message_id))
+    await db.commit()
+    conversation_cache.invalidate(session_id)
+
+
+#save the ai reply and the extracted symptoms for a turn
+async def _finish_turn(db: AsyncSession, session_id: int, ai_response: dict):
     reply_content = ai_response.get("reply", "i'm listening")
 
     #save ai reply
@@ -98,16 +151,148 @@ def chat_with_ai(
     )
     db.add(ai_message)
 
-    #update summary table if ai extracted any symptom
+    #write only the symptom fields that changed if ai extracted any symptom
     if ai_response.get("extracted") and ai_response["extracted"].get("symptoms"):
-        if existing_summary_row:
-            existing_summary_row.summary_content = ai_response["extracted"]
-        else:
-            new_summary = model.Summary(
-                session_id=session_id,
-                summary_content=ai_response["extracted"]
-            )
-            db.add(new_summary)
-    db.commit()
-
-    return ai_response
\ No newline at end of file
+        await save_state(db, session_id, ai_response["extracted"])
+    await db.commit()
+
+    conversation_cache.append(
+        session_id,
+        {"role": "assistant", "content": reply_content},
+        ai_message.id
+    )
+
+
+#one complete turn: save the message, ask the ai, save the reply.
+#also used by the voice stream in sessions once the transcript is final
+async def run_chat_turn(db: AsyncSession, session_id: int, content: str) -> dict:
+    #refuse before the message is saved if the provider quota can't take the turn (extraction + reply)
+    llm_limiter.check(calls=2)
+    symptom_rows, current_state, chat_history, message_id = await _start_turn(db, session_id, content)
+
+    #call AI (awaited so the worker can serve other turns while groq responds)
+    try:
+        ai_response = await generate_ai_response(chat_history, current_state, current_symptom(symptom_rows))
+    except LLMRateLimited:
+        #check() is only a forecast, the quota can still run out between the two calls
+        await _drop_turn(db, session_id, message_id)
+        raise
+
+    await _finish_turn(db, session_id, ai_response)
+
+    return ai_response
+
+
+#llm quota exhausted: shed the turn rather than queue it behind a long backlog
+def _llm_busy(error: LLMRateLimited) -> HTTPException:
+    logger.warning("⚠️ LLM quota exhausted, rejecting chat turn (retry in %.1fs)", error.retry_after)
+    return HTTPException(
+        status_code=503,
+        detail="The assistant is busy right now. Please try again in a moment.",
+        headers={"Retry-After": str(math.ceil(error.retry_after))}
+    )
+
+
+def _sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+#streamed turns being saved; holds the tasks so one outliving its request isn't garbage collected
+_pending_saves = set()
+
+
+async def _save_streamed_turn(session_id: int, ai_response: dict):
+    #a fresh db session, the request one may already be closed once streaming starts
+    async with AsyncSessionLocal() as stream_db:
+        await _finish_turn(stream_db, session_id, ai_response)
+
+
+def _shielded_save(session_id: int, ai_response: dict):
+    #runs the save as its own task: if the client disconnects and the stream is cancelled,
+    #the await is cancelled but the save still completes
+    task = asyncio.ensure_future(_save_streamed_turn(session_id, ai_response))
+    _pending_saves.add(task)
+    task.add_done_callback(_pending_saves.discard)
+    return asyncio.shield(task)
+
+
+@router.post("/{session_id}", response_model=schemas.ChatResponse)
+async def chat_with_ai(
+        session_id: int,
+        payload: schemas.MessageCreate,
+        db: AsyncSession = Depends(get_async_db)
+):
+    try:
+        return await run_chat_turn(db, session_id, payload.content)
+    except LLMRateLimited as e:
+        raise _llm_busy(e)
+
+
+@router.post("/{session_id}/stream")
+async def chat_with_ai_stream(
+        session_id: int,
+        payload: schemas.MessageCreate,
+        db: AsyncSession = Depends(get_async_db)
+):
+    #same turn as chat_with_ai, but the reply is sent as server-sent events:
+    #  event: token  data: {"text": "..."}     one per reply chunk
+    #  event: done   data: ChatResponse         once the reply is complete
+    #  event: error  data: {"detail": "..."}    if the turn fails mid-stream
+
+    try:
+        llm_limiter.check(calls=2)
+    except LLMRateLimited as e:
+        raise _llm_busy(e)
+
+    symptom_rows, current_state, chat_history, message_id = await _start_turn(db, session_id, payload.content)
+    asking_about = current_symptom(symptom_rows)
+
+    async def event_stream():
+        parts, extracted, saved = [], None, False
+        try:
+            ai_response = None
+            async for kind, data in stream_ai_response(chat_history, current_state, asking_about):
+                if kind == "token":
+                    parts.append(data)
+                    yield _sse_event("token", {"text": data})
+                elif kind == "state":
+                    extracted = data
+                else:
+                    ai_response = data
+
+            saved = True
+            await _shielded_save(session_id, ai_response)
+
+            yield _sse_event("done", ai_response)
+
+        except LLMRateLimited:
+            logger.warning("⚠️ LLM quota exhausted mid-turn for session %d", session_id)
+            if not parts:
+                #nothing of the reply was sent, the turn never happened
+                async with AsyncSessionLocal() as stream_db:
+                    await _drop_turn(stream_db, session_id, message_id)
+            yield _sse_event("error", {"detail": "The assistant is busy right now. Please try again in a moment."})
+
+        except Exception as e:
+            logger.exception("❌ Streaming chat failed for session %d: %s", session_id, e)
+            yield _sse_event("error", {"detail": "AI reply failed. Please try again."})
+
+        finally:
+            #client went away (or the provider failed) mid-reply: keep what the patient already
+            #saw, so history and the conversation cache don't end on an unanswered message
+            if not saved and parts:
+                logger.info("✂️ Saving partial streamed reply for session %d (%d chunks)", session_id, len(parts))
+                await _shielded_save(session_id, {
+                    "reply": "".join(parts).strip(),
+                    "off_topic": False,
+                    "extracted": extracted
+                })
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  #stop reverse proxies buffering the stream
+        }
+    )
@@ -1,20 +1,32 @@
 #validate access code, create session and prevent multiple sessions
 import os
-from fastapi import APIRouter, Depends, HTTPException, File, UploadFile
-from fastapi.responses import FileResponse
+import re
+import json
+import asyncio
+import logging
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from datetime import datetime
-import speech_recognition as sr
-import tempfile
-import os
-from pydub import AudioSegment
 
-from backend.app.database import get_db
+from backend.app.database import get_db, get_read_db, AsyncSessionLocal
 from backend.app import schemas, model
-from backend.services.pdf_generator import generate_summary_pdf
-from backend.services.email_service import send_report_email
+from backend.routers.chat import run_chat_turn
+from backend.services.report_jobs import enqueue_report_job, job_to_dict, report_workers
+from backend.services.report_store import get_report
+from backend.services.conversation_cache import conversation_cache
+from backend.services.transcription import (
+    transcription_pool, transcribe_bytes, transcribe_pcm, TARGET_RATE, TARGET_WIDTH,
+    TranscriptionError, TranscriptionOverloaded, RecognizerUnavailable
+)
+from backend.services.vad import EnergyVAD
+from backend.services.rate_limiter import LLMRateLimited
+
+TRANSCRIBE_STREAM_MAX_SECONDS = int(os.getenv("TRANSCRIBE_STREAM_MAX_SECONDS", "120"))
 
 router = APIRouter(tags=["sessions"])
+logger = logging.getLogger(__name__)
 
 @router.post("/start", response_model=schemas.SessionResponse)
 def start_session(payload: schemas.SessionCreate, db: Session = Depends(get_db)):
@@ -41,7 +53,7 @@ def start_session(payload: schemas.SessionCreate, db: Session = Depends(get_db))
 
     if existing_session:
         #resume the existing session instead of creating a new one
-        print(f"🔄 Resuming existing session {existing_session.id}")
+        logger.info("🔄 Resuming existing session %d", existing_session.id, extra={"session_id": existing_session.id})
 
         return {
             "id": existing_session.id,
@@ -63,7 +75,8 @@ def start_session(payload: schemas.SessionCreate, db: Session = Depends(get_db))
     db.commit()
     db.refresh(session)
 
-    print(f"✅ New session {session.id} started for appointment {appointment.id}")
+    logger.info("✅ New session %d started for appointment %d", session.id, appointment.id,
+                extra={"session_id": session.id})
 
     return {
         "id": session.id,
@@ -77,7 +90,7 @@ def start_session(payload: schemas.SessionCreate, db: Session = Depends(get_db))
 @router.post("/{session_id}/finalize")
 def finalize_session(session_id: int, db: Session = Depends(get_db)):
 
-    #finalize session, generate PDF report, and update appointment status
+    #finalize session, update appointment status and queue the PDF report job
 
     #1 get session
     session = db.query(model.Session).filter(
@@ -91,18 +104,14 @@ def finalize_session(session_id: int, db: Session = Depends(get_db)):
     if session.ended_at:
         raise HTTPException(status_code=400, detail="Session already finalized")
 
-    #3 get summary with symptoms
-    summary_row = db.query(model.Summary).filter(
-        model.Summary.session_id == session_id
-    ).first()
-
-    if not summary_row or not summary_row.summary_content:
+    #3 get the symptoms (the session's symptom rows, or its old summary json)
+    if not session.symptoms and not session.summary:
         raise HTTPException(
             status_code=404,
             detail="No summary found for this session"
         )
 
-    symptom_list = summary_row.summary_content.get("symptoms", [])
+    symptom_list = session.summary_content.get("symptoms", [])
 
     #4 validate symptoms exist
     if not symptom_list:
@@ -111,90 +120,123 @@ def finalize_session(session_id: int, db: Session = Depends(get_db)):
             detail="No symptoms recorded. Please report symptoms first."
         )
 
-    #5 get patient name
-    patient_name = "patient"
-    if session.appointment and session.appointment.user:
-        patient_name = session.appointment.user.full_name
-
-    #6 generate pdf
-    report_dir = "reports"
-    os.makedirs(report_dir, exist_ok=True)
-
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    filename = f"symptom_report_{session_id}_{timestamp}.pdf"
-    file_path = os.path.join(report_dir, filename)
-
-    try:
-        print(f"🔄 Generating PDF for session {session_id}...")
-        generate_summary_pdf(session_id, patient_name, symptom_list, file_path)
-        print(f"✅ PDF generated successfully: {file_path}")
-    except Exception as e:
-        print(f"❌ PDF generation failed: {e}")
-        raise HTTPException(
-            status_code=500,
-            detail=f"PDF generation failed: {str(e)}"
-        )
-
-    #7 send email
-    email_sent = False
-    try:
-        email_result = send_report_email(file_path, patient_name, session_id)
-
-        #handle both dict and boolean return types
-        if isinstance(email_result, dict):
-            email_sent = email_result.get("success", False)
-        else:
-            email_sent = email_result
-
-        if email_sent:
-            print(f"✅ Email sent successfully")
-        else:
-            print(f"⚠️ Email not sent, but PDF was generated")
-    except Exception as e:
-        print(f"⚠️ Email error: {e}")
-        email_sent = False
-
-    #8 Mark the session as ended and update the appointment status
-    print(f"⏰ Ending session {session_id}...")
+    #5 mark the session as ended and update the appointment status
+    logger.debug("⏰ Ending session %d", session_id)
     session.ended_at = datetime.now()
 
     #update appointment status to completed
     if session.appointment:
-        print(f"📅 Updating appointment {session.appointment.id} to completed...")
         session.appointment.status = "completed"
-        print(f"✅ Appointment status updated to: {session.appointment.status}")
 
-    #9 commit all changes to the database schema
+    #6 queue pdf rendering + email, committed together with the session change
+    job = enqueue_report_job(db, session_id)
+
+    #7 commit all changes to the database schema
     db.commit()
 
-    print(f"✅ Session {session_id} finalized successfully")
-    print(f"   Session ended at: {session.ended_at}")
-    print(f"   Appointment status: {session.appointment.status if session.appointment else 'N/A'}")
-    print(f"   PDF path: {file_path}")
-    print("=" * 60)
+    #no more turns for this session, drop its cached conversation
+    conversation_cache.invalidate(session_id)
 
-    #10 return success response
+    #wake a worker so the report starts straight away
+    report_workers.notify()
+
+    logger.info("✅ Session %d finalized, report job %d queued", session_id, job.id,
+                extra={"session_id": session_id, "job_id": job.id})
+
+    #8 return success response, the report itself is produced in the background
     return {
         "status": "success",
-        "message": "Session finalized, PDF generated, and sent to doctor",
+        "message": "Session finalized, report is being generated and sent to doctor",
         "session_id": session_id,
-        "pdf_path": file_path,
-        "pdf_generated": True,
-        "email_sent": email_sent,
+        "report_job_id": job.id,
+        "report_job_status": job.status,
+        "report_status_url": f"/sessions/report-jobs/{job.id}",
         "ended_at": session.ended_at.isoformat(),
         "appointment_status": session.appointment.status if session.appointment else None,
         "symptoms_count": len(symptom_list)
     }
 
-@router.get("/{session_id}/download-pdf")
-def download_pdf(session_id: int, db: Session = Depends(get_db)):
 
-    #download the odf report for a session (for patient to save to their phone)
+@router.get("/report-jobs/{job_id}", response_model=schemas.ReportJobResponse)
+def get_report_job(job_id: int, db: Session = Depends(get_db)):
+
+    #status of the background pdf + email job created by finalize
 
-    #1 validate session exists
+    job = db.query(model.ReportJob).filter(
+        model.ReportJob.id == job_id
+    ).first()
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Report job not found")
+
+    return job_to_dict(job)
+
+REPORT_CHUNK_SIZE = 64 * 1024
+
+
+def _iter_file_range(path: str, start: int, length: int):
+    #stream a byte range of the file without loading it into memory
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = f.read(min(REPORT_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+class _RangeNotSatisfiable(Exception):
+    pass
+
+
+def _parse_range(range_header: str, size: int):
+    #single "bytes=start-end" / "bytes=start-" / "bytes=-suffix" range as (start, end).
+    #None for anything else (several ranges, another unit, garbage): per rfc 9110 a range form
+    #the server doesn't support is ignored and the whole file sent. a single range that lies
+    #outside the file raises _RangeNotSatisfiable (416)
+    match = re.match(r"^bytes=(\d*)-(\d*)$", range_header.strip())
+    if not match or (not match.group(1) and not match.group(2)):
+        return None
+
+    if not match.group(1):
+        suffix = int(match.group(2))
+        if suffix == 0:
+            raise _RangeNotSatisfiable()
+        return max(size - suffix, 0), size - 1
+
+    start = int(match.group(1))
+    if match.group(2) and int(match.group(2)) < start:
+        #an invalid range-spec, ignored like a malformed header
+        return None
+    if start >= size:
+        raise _RangeNotSatisfiable()
+    end = int(match.group(2)) if match.group(2) else size - 1
+    return start, min(end, size - 1)
+
+
+def _session_and_report(db: Session, session_id: int):
     session = db.query(model.Session).filter(
         model.Session.id == session_id
     ).first()
+    return session, get_report(db, session_id) if session and session.ended_at else None
+
+
+@router.get("/{session_id}/download-pdf")
+def download_pdf(session_id: int, request: Request, db: Session = Depends(get_read_db),
+                 primary_db: Session = Depends(get_db)):
+
+    #download the pdf report for a session (for patient to save to their phone).
+    #read from the replica; one that hasn't caught up with the finalize or the report job's
+    #commit yet would answer 404/400/409, so those cases are read again from the primary
+    #(primary_db only opens a connection if it is used)
+
+    #1 validate session exists (and look up its stored report)
+    session, report = _session_and_report(db, session_id)
+    if report is None:
+        db = primary_db
+        session, report = _session_and_report(db, session_id)
 
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
@@ -206,124 +248,115 @@ def download_pdf(session_id: int, db: Session = Depends(get_db)):
             detail="Session not finalized yet. Please finalize the session first."
         )
 
-    #3 find the pdf file in reports directory
-    report_dir = "reports"
-
-    if not os.path.exists(report_dir):
-        raise HTTPException(
-            status_code=500,
-            detail="Reports directory not found"
-        )
-
-    #look for any pdf with this session id
-    try:
-        pdf_files = [
-            f for f in os.listdir(report_dir)
-            if f.startswith(f"symptom_report_{session_id}") and f.endswith(".pdf")
-        ]
-    except Exception as e:
-        print(f"❌ Error reading reports directory: {e}")
-        raise HTTPException(
-            status_code=500,
-            detail="Error accessing reports directory"
-        )
-
-    if not pdf_files:
+    #3 the stored report, from the indexed lookup above
+    if not report:
+        if session.report_job and session.report_job.status in ("pending", "running"):
+            raise HTTPException(
+                status_code=409,
+                detail="Report is still being generated. Please try again shortly.",
+                headers={"Retry-After": "2"}
+            )
         raise HTTPException(
             status_code=404,
             detail="PDF report not found. The report may have been deleted."
         )
 
-    #4 get the most recent pdf if multiple exist (sorted by name, newest first)
-    pdf_files.sort(reverse=True)
-    pdf_filename = pdf_files[0]
-    pdf_path = os.path.join(report_dir, pdf_filename)
-
-    #5 verify file exists
-    if not os.path.exists(pdf_path):
+    #4 verify file exists
+    if not os.path.exists(report.file_path):
         raise HTTPException(
             status_code=404,
             detail="PDF file not found on server"
         )
 
-    print(f"📥 Patient downloading PDF: {pdf_path}")
-    print(f"   Session ID: {session_id}")
-    print(f"   File size: {os.path.getsize(pdf_path)} bytes")
+    pdf_filename = os.path.basename(report.file_path)
+    etag = f'"{report.sha256}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f'attachment; filename="{pdf_filename}"'
+    }
+
+    #5 the client already has this exact file
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in [t.strip() for t in if_none_match.split(",")]):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    logger.info("📥 Patient downloading PDF for session %d (%d bytes)", session_id, report.size_bytes)
 
-    #6 return the file for download
-    return FileResponse(
-        path=pdf_path,
-        filename=pdf_filename,
+    #6 partial download (resume), only honoured if If-Range is absent or still matches
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    byte_range = None
+    if range_header and (not if_range or if_range.strip() == etag):
+        try:
+            byte_range = _parse_range(range_header, report.size_bytes)
+        except _RangeNotSatisfiable:
+            return Response(
+                status_code=416,
+                headers={"Content-Range": f"bytes */{report.size_bytes}", "ETag": etag}
+            )
+
+    if byte_range:
+        start, end = byte_range
+        length = end - start + 1
+        headers["Content-Range"] = f"bytes {start}-{end}/{report.size_bytes}"
+        headers["Content-Length"] = str(length)
+        return StreamingResponse(
+            _iter_file_range(report.file_path, start, length),
+            status_code=206,
+            media_type="application/pdf",
+            headers=headers
+        )
+
+    #7 return the whole file (also when the range header was ignored)
+    headers["Content-Length"] = str(report.size_bytes)
+    return StreamingResponse(
+        _iter_file_range(report.file_path, 0, report.size_bytes),
         media_type="application/pdf",
-        headers={
-            "Content-Disposition": f'attachment; filename="{pdf_filename}"'
-        }
+        headers=headers
     )
 
 @router.post("/transcribe-audio")
 async def transcribe_audio(file: UploadFile = File(...)):
 
-    #transcribe audio file to text using google speech recognition
+    #transcribe audio file to text, the heavy lifting runs on the transcription pool
 
-    temp_path = None
-    wav_path = None
+    logger.debug("📥 Received audio file %s (%s)", file.filename, file.content_type)
+
+    file_extension = os.path.splitext(file.filename)[1] if file.filename else '.m4a'
+    content = await file.read()
 
     try:
-        print(f"📥 Received audio file: {file.filename}")
-        print(f"   Content type: {file.content_type}")
-
-        #save uploaded file temporarily
-        file_extension = os.path.splitext(file.filename)[1] if file.filename else '.m4a'
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as temp_file:
-            content = await file.read()
-            temp_file.write(content)
-            temp_path = temp_file.name
-            print(f"📁 Saved to: {temp_path}")
-
-        #convert to WAV if needed
-        wav_path = temp_path.replace(file_extension, '.wav')
-
-        if file_extension.lower() != '.wav':
-            print(f"🔄 Converting {file_extension} to WAV...")
-            audio = AudioSegment.from_file(temp_path)
-            audio.export(wav_path, format='wav')
-            print(f"✅ Converted to: {wav_path}")
-        else:
-            wav_path = temp_path
-
-        #transcribe using Google Speech Recognition
-        print("🎤 Starting transcription...")
-        recognizer = sr.Recognizer()
-
-        with sr.AudioFile(wav_path) as source:
-            #adjustment for ambient noise
-            recognizer.adjust_for_ambient_noise(source, duration=0.5)
-
-            #record the audio
-            audio_data = recognizer.record(source)
-
-            #speech recognition using Google Speech Recognition
-            print("🔄 Calling Google Speech API...")
-            text = recognizer.recognize_google(audio_data, language='en-US')
-
-            print(f"✅ Transcription successful: {text}")
-
-            return {
-                "success": True,
-                "text": text,
-                "message": "Audio transcribed successfully"
-            }
-
-    except sr.UnknownValueError:
-        print("❌ Google Speech Recognition could not understand audio")
+        text = await transcription_pool.run(transcribe_bytes, content, file_extension or '.m4a')
+
+        #length only, the transcript is patient data
+        logger.debug("✅ Transcription successful (%d chars)", len(text))
+
+        return {
+            "success": True,
+            "text": text,
+            "message": "Audio transcribed successfully"
+        }
+
+    except TranscriptionOverloaded:
+        #shed load rather than queue voice notes behind a long backlog
+        logger.warning("⚠️ Transcription queue full, rejecting request")
+        raise HTTPException(
+            status_code=503,
+            detail="Speech recognition is busy. Please try again in a moment.",
+            headers={"Retry-After": "2"}
+        )
+
+    except TranscriptionError:
+        logger.info("❌ Speech recognition could not understand audio")
         return {
             "success": False,
             "text": "",
             "error": "Could not understand audio. Please speak clearly and try again."
         }
 
-    except sr.RequestError as e:
-        print(f"❌ Could not request results from Google Speech Recognition service: {e}")
+    except RecognizerUnavailable as e:
+        logger.error("❌ Could not request results from speech recognition service: %s", e)
         return {
             "success": False,
             "text": "",
@@ -331,23 +364,147 @@ async def transcribe_audio(file: UploadFile = File(...)):
         }
 
     except Exception as e:
-        print(f"❌ Transcription error: {str(e)}")
+        logger.exception("❌ Transcription error: %s", e)
         return {
             "success": False,
             "text": "",
             "error": f"Transcription failed: {str(e)}"
         }
 
-    finally:
-        #clean up temporary files
-        try:
-            if temp_path and os.path.exists(temp_path):
-                os.remove(temp_path)
-                print(f"🗑️ Cleaned up: {temp_path}")
 
-            if wav_path and wav_path != temp_path and os.path.exists(wav_path):
-                os.remove(wav_path)
-                print(f"🗑️ Cleaned up: {wav_path}")
+async def _close_with_error(websocket: WebSocket, detail: str, code: int):
+    #best effort, the client may already be gone
+    try:
+        await websocket.send_json({"type": "error", "detail": detail})
+        await websocket.close(code=code)
+    except Exception:
+        pass
+
 
-        except Exception as cleanup_error:
-            print(f"⚠️ Cleanup error: {cleanup_error}")
\ No newline at end of file
+def _control_message(text: str) -> Optional[dict]:
+    #a text frame as a json object, None for anything else (5, "x", not json at all)
+    try:
+        msg = json.loads(text)
+    except ValueError:
+        return None
+    return msg if isinstance(msg, dict) else None
+
+
+@router.websocket("/transcribe-stream")
+async def transcribe_stream(websocket: WebSocket, session_id: Optional[int] = None):
+
+    #voice input transcribed while the patient is still speaking
+    #client -> server: binary frames of 16 kHz mono 16-bit pcm, then {"type": "end"}
+    #server -> client:
+    #  {"type": "partial", "segment": n, "text": "..."}   as each speech segment is transcribed
+    #  {"type": "final", "text": "..."}                   every segment joined, once the client ends
+    #  {"type": "reply", "response": ChatResponse}        with ?session_id=, the final text run as a chat turn
+    #  {"type": "error", "detail": "..."}
+
+    if session_id is not None:
+        async with AsyncSessionLocal() as db:
+            if await db.get(model.Session, session_id) is None:
+                await websocket.close(code=1008, reason="Invalid session id")
+                return
+
+    await websocket.accept()
+    logger.debug("🎙️ Voice stream opened (session %s)", session_id)
+
+    vad = EnergyVAD()
+    max_bytes = TRANSCRIBE_STREAM_MAX_SECONDS * TARGET_RATE * TARGET_WIDTH
+    received = 0
+    tasks = []
+    segments = asyncio.Queue()
+    texts = []
+
+    def start_segment(segment: bytes):
+        #transcription starts as soon as the vad closes a segment, results go out in order
+        task = asyncio.ensure_future(transcription_pool.run(transcribe_pcm, segment))
+        tasks.append(task)
+        segments.put_nowait(task)
+
+    async def send_partials():
+        while True:
+            task = await segments.get()
+            if task is None:
+                return
+            try:
+                text = await task
+            except TranscriptionError:
+                continue  #noise the vad let through
+            texts.append(text)
+            await websocket.send_json({"type": "partial", "segment": len(texts), "text": text})
+
+    sender = asyncio.create_task(send_partials())
+
+    try:
+        while received < max_bytes:  #past the limit the recording counts as ended
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+
+            if message.get("bytes"):
+                received += len(message["bytes"])
+                for segment in vad.feed(message["bytes"]):
+                    start_segment(segment)
+            elif message.get("text"):
+                control = _control_message(message["text"])
+                if control is None:
+                    await _close_with_error(websocket, "Invalid message, text frames must be json objects.", 1003)
+                    return
+                if control.get("type") == "end":
+                    break
+
+            if sender.done():
+                await sender  #a segment failed, raises its error
+
+        segment = vad.flush()
+        if segment:
+            start_segment(segment)
+        segments.put_nowait(None)
+        await sender
+
+        text = " ".join(texts)
+        if not text:
+            logger.info("❌ Speech recognition could not understand streamed audio")
+            await _close_with_error(websocket, "Could not understand audio. Please speak clearly and try again.", 1000)
+            return
+
+        logger.debug("✅ Streamed transcription successful (%d chars)", len(text))
+        await websocket.send_json({"type": "final", "text": text})
+
+        if session_id is not None:
+            async with AsyncSessionLocal() as db:
+                ai_response = await run_chat_turn(db, session_id, text)
+            await websocket.send_json({"type": "reply", "response": ai_response})
+
+        await websocket.close()
+
+    except WebSocketDisconnect:
+        logger.info("⚠️ Voice stream closed by client (session %s)", session_id)
+
+    except TranscriptionOverloaded:
+        logger.warning("⚠️ Transcription queue full, closing voice stream")
+        await _close_with_error(websocket, "Speech recognition is busy. Please try again in a moment.", 1013)
+
+    except RecognizerUnavailable as e:
+        logger.error("❌ Could not request results from speech recognition service: %s", e)
+        await _close_with_error(websocket, "Speech recognition service unavailable. Please try again.", 1011)
+
+    except LLMRateLimited:
+        #the transcript was already sent as final, the client can resend it as a text turn
+        logger.warning("⚠️ LLM quota exhausted, no reply for voice stream (session %s)", session_id)
+        await _close_with_error(websocket, "The assistant is busy right now. Please try again in a moment.", 1013)
+
+    except Exception as e:
+        #the detail stays generic, exception text is for the log only
+        logger.exception("❌ Voice stream error: %s", e)
+        await _close_with_error(websocket, "Transcription failed. Please try again.", 1011)
+
+    finally:
+        sender.cancel()
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                task.exception()  #already reported, keeps asyncio from warning about it
@@ -1,59 +1,82 @@
-import os
 import json
-from groq import Groq
+import logging
 from backend.prompts.conversation import CONVERSATION_PROMPT
 from backend.prompts.extractor import EXTRACT_PROMPT
-
-#api config
-def get_groq_client():
-    api_key = os.getenv("GROQ_API_KEY")
-    if not api_key:
-        raise RuntimeError("GROQ_API_KEY environment variable not set")
-    return Groq(api_key=api_key)
-
-
-
-#get ai response
-
-def generate_ai_response(chat_history: list[dict], current_state: dict = None) -> dict:
-    client = get_groq_client()
-    user_message = chat_history[-1]["content"].strip()
-
-    #step 1: extract data
-    if not current_state:
-        current_state = {"symptoms": []}
-
-    symptoms = current_state.get("symptoms", [])
-    last_symptom_mentioned = None
-    missing_info_found = False
-
-    #determine which symptom we're currently asking about
-    #check for unnamed symptoms
-    for s in symptoms:
-        name = s.get("symptom")
-        if not name or name.lower() in ["yes", "no", "other", "symptom"]:
-            last_symptom_mentioned = name
-            missing_info_found = True
-            break
-
-    #check for missing fields in reverse order
-    if not missing_info_found:
-        for s in reversed(symptoms):
-            name = s.get("symptom")
-            if not s.get("severity"):
-                last_symptom_mentioned = name
-                missing_info_found = True
-                break
-            if not s.get("duration"):
-                last_symptom_mentioned = name
-                missing_info_found = True
-                break
-            if not s.get("frequency"):
-                last_symptom_mentioned = name
-                missing_info_found = True
-                break
-
-    print(f"🎯 Currently asking about: {last_symptom_mentioned}")
+from backend.services.fast_extractor import fast_extract, record_extraction
+from backend.services.extract_cache import extraction_cache, extraction_key
+from backend.services.rate_limiter import llm_limiter, estimate_tokens, LLMRateLimited
+from backend.services.llm_provider import get_llm_provider, LLMError
+from backend.services.metrics import span
+from backend.services.symptom_store import completeness, next_missing
+
+logger = logging.getLogger(__name__)
+
+
+#every llm call goes through the limiter: admitted (possibly after a wait) or shed with LLMRateLimited
+async def complete(provider, messages: list, temperature: float, json_mode: bool = False,
+                   stage: str = "llm_reply") -> str:
+    cost = estimate_tokens(messages)
+    with span("llm_wait"):
+        await llm_limiter.acquire(cost)
+    try:
+        with span(stage):
+            text, total_tokens = await provider.complete(messages, temperature, json_mode)
+    except LLMError as e:
+        if e.status_code == 429:
+            llm_limiter.pause(e.retry_after or 1.0)
+        raise
+
+    llm_limiter.settle(cost, total_tokens)
+    return text
+
+
+async def stream_reply(provider, messages: list, temperature: float):
+    cost = estimate_tokens(messages)
+    with span("llm_wait"):
+        await llm_limiter.acquire(cost)
+    #streams carry no usage report, so charge the prompt plus the reply text actually received
+    #(same ~4 characters per token estimate), also when the stream fails or the client goes away
+    streamed_chars = 0
+    try:
+        with span("llm_reply"):
+            async for text in provider.stream(messages, temperature):
+                streamed_chars += len(text)
+                yield text
+    except LLMError as e:
+        if e.status_code == 429:
+            llm_limiter.pause(e.retry_after or 1.0)
+        raise
+    finally:
+        llm_limiter.settle(cost, estimate_tokens(messages, completion_tokens=0) + streamed_chars // 4)
+
+
+#determine which symptom we're currently asking about
+def find_current_symptom(symptoms: list[dict]):
+    missing = next_missing([completeness(s) for s in symptoms])
+    return symptoms[missing[0]].get("symptom") if missing else None
+
+
+#step 1: extract data. current_symptom can come from the stored symptom masks (symptom_store)
+async def extract_state(provider, user_message: str, current_state: dict, current_symptom: str = None) -> dict:
+    last_symptom_mentioned = current_symptom or find_current_symptom(current_state.get("symptoms", []))
+
+    logger.debug("🎯 Currently asking about: %s", last_symptom_mentioned)
+
+    #short answers like "5" or "2 days" are applied locally without an llm round trip
+    fast_state = fast_extract(current_state, user_message, last_symptom_mentioned)
+    if fast_state is not None:
+        record_extraction("fast")
+        logger.debug("⚡ Fast-path extraction")
+        return fast_state
+
+    record_extraction("llm")
+
+    #identical inputs give identical output at temperature 0, reuse it
+    cache_key = extraction_key(current_state, user_message, last_symptom_mentioned)
+    cached_state = extraction_cache.get(cache_key)
+    if cached_state is not None:
+        logger.debug("♻️ Extraction cache hit")
+        return cached_state
 
     extract_messages = [
         {"role": "system", "content": EXTRACT_PROMPT.format(
@@ -64,19 +87,22 @@ def generate_ai_response(chat_history: list[dict], current_state: dict = None) -
     ]
 
     try:
-        extract_res = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=extract_messages,
-            temperature=0,
-            response_format={"type": "json_object"}
-        )
-        new_state = json.loads(extract_res.choices[0].message.content)
+        new_state = json.loads(await complete(provider, extract_messages, temperature=0, json_mode=True,
+                                           stage="llm_extract"))
+    except LLMRateLimited:
+        #shed by the limiter: fail the turn so the client retries, rather than carrying on with stale state
+        raise
     except Exception as e:
-        print(f"Extraction Failed: {e}")
-        new_state = current_state
+        logger.warning("Extraction failed: %s", e)
+        return current_state
 
-    #step 2: determine the next move
+    #only successful extractions are cached, failures should be retried
+    extraction_cache.put(cache_key, new_state)
+    return new_state
 
+
+#step 2: determine the next move
+def choose_goal(user_message: str, new_state: dict) -> str:
     goal = ""
     symptoms = new_state.get("symptoms", [])
 
@@ -89,49 +115,33 @@ def generate_ai_response(chat_history: list[dict], current_state: dict = None) -
         goal = "The user said 'Yes' to having another symptom. Ask them specifically to name the new symptom."
 
     else:
-        missing_info_found = False
-
-        #check for unnamed symptoms
-        for s in symptoms:
-            name = s.get("symptom")
-            if not name or name.lower() in ["yes", "no", "other", "symptom"]:
-                goal = "The user indicated a new symptom but didn't name it. Ask them specifically what the symptom is."
-                missing_info_found = True
-                break
-
-        #check for missing fields in reverse order
-        if not missing_info_found:
-            for s in reversed(symptoms):
-                name = s.get("symptom")
-
-                if not s.get("severity"):
-                    goal = f"Ask how severe the {name} is (accept 1-10 scale)."
-                    missing_info_found = True
-                    break
-                if not s.get("duration"):
-                    goal = f"Ask how long they have had the {name}."
-                    missing_info_found = True
-                    break
-                if not s.get("frequency"):
-                    goal = f"Ask how often the {name} happens."
-                    missing_info_found = True
-                    break
-
-            if not missing_info_found:
-                if len(symptoms) == 0:
-                    goal = "Ask the user what their main symptom is today."
-                else:
-                    if "no" in user_message.lower() and len(user_message) < 15:
-                        goal = "Thank the user, summarize ALL collected symptoms (Headache, Cough, etc.), and say goodbye."
-                    else:
-                        goal = "Ask if they have any OTHER symptoms they want to mention."
-
-    #step 3: generate reply
-
+        #one pass over the completeness masks: unnamed symptoms first, then missing fields newest first
+        missing = next_missing([completeness(s) for s in symptoms])
+
+        if missing:
+            index, field = missing
+            name = symptoms[index].get("symptom")
+            goal = {
+                "symptom": "The user indicated a new symptom but didn't name it. Ask them specifically what the symptom is.",
+                "severity": f"Ask how severe the {name} is (accept 1-10 scale).",
+                "duration": f"Ask how long they have had the {name}.",
+                "frequency": f"Ask how often the {name} happens."
+            }[field]
+        elif len(symptoms) == 0:
+            goal = "Ask the user what their main symptom is today."
+        elif "no" in user_message.lower() and len(user_message) < 15:
+            goal = "Thank the user, summarize ALL collected symptoms (Headache, Cough, etc.), and say goodbye."
+        else:
+            goal = "Ask if they have any OTHER symptoms they want to mention."
+
+    return goal
+
+
+#step 3 prompt: pass the new_state json into the prompt
+def build_talk_messages(goal: str, new_state: dict, chat_history: list[dict]) -> list[dict]:
     msg_history_formatted = "\n".join([f"{m['role']}: {m['content']}" for m in chat_history[-4:]])
 
-    #pass the new_state json into the prompt
-    talk_messages = [
+    return [
         {"role": "system", "content": CONVERSATION_PROMPT.format(
             goal_instruction=goal,
             current_data=json.dumps(new_state, indent=2),
@@ -139,16 +149,54 @@ def generate_ai_response(chat_history: list[dict], current_state: dict = None) -
         )}
     ]
 
-    reply_res = client.chat.completions.create(
-        model="llama-3.3-70b-versatile",
-        messages=talk_messages,
-        temperature=0.6
-    )
 
-    bot_reply = reply_res.choices[0].message.content.strip().replace('"', '')
+#get ai response
+
+async def generate_ai_response(chat_history: list[dict], current_state: dict = None,
+                               current_symptom: str = None) -> dict:
+    provider = get_llm_provider()
+    user_message = chat_history[-1]["content"].strip()
+
+    if not current_state:
+        current_state = {"symptoms": []}
+
+    new_state = await extract_state(provider, user_message, current_state, current_symptom)
+    goal = choose_goal(user_message, new_state)
+
+    #step 3: generate reply
+    reply = await complete(provider, build_talk_messages(goal, new_state, chat_history), temperature=0.6)
+
+    bot_reply = reply.strip().replace('"', '')
 
     return {
         "reply": bot_reply,
         "off_topic": False,
         "extracted": new_state
-    }
\ No newline at end of file
+    }
+
+
+#streaming variant: yields ("token", text) as the reply arrives, then ("done", response)
+async def stream_ai_response(chat_history: list[dict], current_state: dict = None, current_symptom: str = None):
+    provider = get_llm_provider()
+    user_message = chat_history[-1]["content"].strip()
+
+    if not current_state:
+        current_state = {"symptoms": []}
+
+    new_state = await extract_state(provider, user_message, current_state, current_symptom)
+    goal = choose_goal(user_message, new_state)
+    #before the first token, so a reply cut off mid-stream can still be saved with its extraction
+    yield "state", new_state
+
+    parts = []
+    async for text in stream_reply(provider, build_talk_messages(goal, new_state, chat_history), temperature=0.6):
+        token = text.replace('"', '')
+        if token:
+            parts.append(token)
+            yield "token", token
+
+    yield "done", {
+        "reply": "".join(parts).strip(),
+        "off_topic": False,
+        "extracted": new_state
+    }
@@ -4,11 +4,43 @@ from datetime import datetime, timedelta
 from fastapi import HTTPException, Depends
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 import os
+from backend.services.bounded_pool import BoundedPool, PoolOverloaded
+
+"""
+    password hashing and jwt helpers. argon2 is deliberately expensive in cpu
+    and memory, so register/login hash on their own small executor
+    (PASSWORD_HASH_WORKERS) instead of the shared threadpool, and once
+    PASSWORD_HASH_MAX_QUEUE hashes are waiting or running new ones are
+    rejected so the routes can answer 503 instead of piling up.
+    cost parameters come from ARGON2_TIME_COST / ARGON2_MEMORY_COST (KiB) /
+    ARGON2_PARALLELISM; hashes made with other parameters are upgraded the
+    next time that doctor logs in.
+    """
 
 SECRET_KEY = os.getenv("SECRET_KEY", "unsafe-dev-secret-key")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60*24
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+
+#defaults are passlib's, so existing hashes stay current
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "65536"))
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "4"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "32"))
+
+
+def make_pwd_context(time_cost: int = ARGON2_TIME_COST, memory_cost: int = ARGON2_MEMORY_COST,
+                     parallelism: int = ARGON2_PARALLELISM) -> CryptContext:
+    return CryptContext(
+        schemes=["argon2"],
+        deprecated="auto",
+        argon2__time_cost=time_cost,
+        argon2__memory_cost=memory_cost,
+        argon2__parallelism=parallelism
+    )
+
+
+pwd_context = make_pwd_context()
 
 def get_password_hash(password: str):
     return pwd_context.hash(password)
@@ -16,6 +48,36 @@ def get_password_hash(password: str):
 def verify_password( plain_password:str, hashed_password:str):
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str):
+    #(valid, new_hash), new_hash is set when the stored hash uses outdated parameters
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+class PasswordHashOverloaded(PoolOverloaded):
+    #too many hashes already queued
+    pass
+
+
+class PasswordHashPool(BoundedPool):
+
+    overloaded = PasswordHashOverloaded
+    overloaded_message = "Password hashing queue is full"
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_queue: int = PASSWORD_HASH_MAX_QUEUE):
+        super().__init__(workers, max_queue, thread_name_prefix="argon2")
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats["argon2"] = {
+            "time_cost": ARGON2_TIME_COST,
+            "memory_cost": ARGON2_MEMORY_COST,
+            "parallelism": ARGON2_PARALLELISM
+        }
+        return stats
+
+
+password_hash_pool = PasswordHashPool()
+
 def create_access_token( data: dict):
     to_encode = data.copy() #copies the data to avoid modifying the original data
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
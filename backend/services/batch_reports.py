@@ -0,0 +1,194 @@
+#backend/services/batch_reports.py
+#regenerate pdf reports in bulk, e.g. after a template change
+#
+#usage (from project root):
+#   python -m backend.services.batch_reports --date 2026-05-01
+#   python -m backend.services.batch_reports --doctor-id 3 --workers 8
+#   python -m backend.services.batch_reports --from-session 100 --to-session 400
+import os
+import sys
+import time
+import hashlib
+import argparse
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timedelta
+from pathlib import Path
+
+#add project root to python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from dotenv import load_dotenv
+from sqlalchemy import or_
+load_dotenv()  #load db credentials
+
+from backend.app.database import SessionLocal
+from backend.app import model
+from backend.services.pdf_generator import generate_summary_pdf
+from backend.services.report_store import REPORT_DIR, write_atomically, report_filename, record_report
+from backend.services.symptom_store import symptom_lists
+
+
+def render_batch(items: list, out_dir: str) -> list:
+    #runs in a worker process: render each report in memory and write it atomically
+    results = []
+    for session_id, patient_name, symptoms in items:
+        start = time.perf_counter()
+        pdf_bytes = generate_summary_pdf(session_id, patient_name, symptoms)
+        file_path = os.path.join(out_dir, report_filename(session_id))
+        write_atomically(file_path, pdf_bytes)
+        results.append({
+            "session_id": session_id,
+            "file_path": file_path,
+            "size_bytes": len(pdf_bytes),
+            "sha256": hashlib.sha256(pdf_bytes).hexdigest(),
+            "pid": os.getpid(),
+            "seconds": time.perf_counter() - start
+        })
+    return results
+
+
+def iter_summary_chunks(db, args):
+    #keyset pagination over finalized sessions with symptoms (rows, or the old summaries json) so
+    #each chunk is one indexed range query, plus one for the chunk's symptoms. interviews still in
+    #progress get their report from finalize
+    query = db.query(
+        model.Session.id,
+        model.User.full_name
+    ).filter(
+        model.Session.ended_at.isnot(None),
+        or_(model.Session.symptoms.any(), model.Session.summary.has())
+    ).join(
+        model.Appointment, model.Appointment.id == model.Session.appointment_id
+    ).outerjoin(
+        model.User, model.User.id == model.Appointment.user_id
+    )
+
+    if args.date:
+        day = datetime.strptime(args.date, "%Y-%m-%d")
+        query = query.filter(
+            model.Appointment.appointment_date >= day,
+            model.Appointment.appointment_date < day + timedelta(days=1)
+        )
+    if args.doctor_id:
+        query = query.filter(model.Appointment.doctor_id == args.doctor_id)
+    if args.from_session:
+        query = query.filter(model.Session.id >= args.from_session)
+    if args.to_session:
+        query = query.filter(model.Session.id <= args.to_session)
+
+    last_id = 0
+    while True:
+        rows = query.filter(model.Session.id > last_id).order_by(model.Session.id).limit(args.chunk_size).all()
+        if not rows:
+            return
+        last_id = rows[-1].id
+        symptoms = symptom_lists(db, [row.id for row in rows])
+        yield [
+            (row.id, row.full_name or "patient", symptoms.get(row.id, []))
+            for row in rows
+        ]
+
+
+def save_results(db, results: list):
+    #record the new files against their sessions and remove the files they replace. a report
+    #job still pointing at a replaced file is moved to the new one in the same commit
+    replaced = []
+    for result in results:
+        existing = db.query(model.Report).filter(
+            model.Report.session_id == result["session_id"]
+        ).first()
+        if existing and existing.file_path != result["file_path"]:
+            replaced.append(existing.file_path)
+            db.query(model.ReportJob).filter(
+                model.ReportJob.session_id == result["session_id"],
+                model.ReportJob.pdf_path == existing.file_path
+            ).update({model.ReportJob.pdf_path: result["file_path"]}, synchronize_session=False)
+        record_report(db, result["session_id"], result["file_path"], result["size_bytes"], result["sha256"])
+    db.commit()
+
+    for path in replaced:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def run(args):
+    db = SessionLocal()
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    per_worker = defaultdict(lambda: {"reports": 0, "seconds": 0.0})
+    total = 0
+    failed = 0
+    start = time.perf_counter()
+
+    print("=" * 70)
+    print(f"BATCH REPORT GENERATION ({args.workers} workers, chunks of {args.chunk_size})")
+    print("=" * 70)
+
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            pending = set()
+
+            def collect(done):
+                nonlocal total, failed
+                for future in done:
+                    try:
+                        results = future.result()
+                    except Exception as e:
+                        failed += future.batch_size
+                        print(f"❌ Batch failed: {e}")
+                        continue
+                    save_results(db, results)
+                    for result in results:
+                        per_worker[result["pid"]]["reports"] += 1
+                        per_worker[result["pid"]]["seconds"] += result["seconds"]
+                    total += len(results)
+
+            for chunk in iter_summary_chunks(db, args):
+                #split each db chunk into small batches so every worker gets some
+                for i in range(0, len(chunk), args.batch_size):
+                    batch = chunk[i:i + args.batch_size]
+                    future = executor.submit(render_batch, batch, args.out_dir)
+                    future.batch_size = len(batch)
+                    pending.add(future)
+
+                #keep a bounded number of batches in flight so memory stays flat
+                while len(pending) >= args.workers * 4:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+
+                print(f"   ... {total} reports written")
+
+            done, _ = wait(pending)
+            collect(done)
+    finally:
+        db.close()
+
+    elapsed = time.perf_counter() - start
+
+    print("\nPER WORKER:")
+    for pid, stats in sorted(per_worker.items()):
+        rate = stats["reports"] / stats["seconds"] if stats["seconds"] else 0
+        print(f"  pid {pid}: {stats['reports']:6d} reports  {rate:8.1f} reports/s busy")
+
+    print("\nSUMMARY:")
+    print(f"  ✅ Written: {total}")
+    print(f"  ❌ Failed: {failed}")
+    print(f"  ⏱️ Wall time: {elapsed:.2f}s ({total / elapsed if elapsed else 0:.1f} reports/s)")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="regenerate pdf reports with a process pool")
+    parser.add_argument("--date", help="appointment date, YYYY-MM-DD")
+    parser.add_argument("--doctor-id", type=int)
+    parser.add_argument("--from-session", type=int)
+    parser.add_argument("--to-session", type=int)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--chunk-size", type=int, default=500, help="sessions fetched per query")
+    parser.add_argument("--batch-size", type=int, default=25, help="reports per worker task")
+    parser.add_argument("--out-dir", default=REPORT_DIR)
+    run(parser.parse_args())
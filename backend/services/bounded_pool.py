@@ -0,0 +1,63 @@
+import asyncio
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+"""
+    a small dedicated executor with admission control, for blocking work the
+    event loop must not do itself (transcription, argon2). at most max_queue
+    jobs are waiting or running; past that run() raises the pool's overloaded
+    exception straight away so the route can answer 503 instead of queueing.
+    jobs run in a copy of the caller's context, so their spans and log
+    records belong to the request that submitted them.
+    """
+
+
+class PoolOverloaded(Exception):
+    #the pool already has max_queue jobs waiting or running
+    pass
+
+
+class BoundedPool:
+
+    #subclasses set the exception raised when full, a subclass of PoolOverloaded
+    overloaded = PoolOverloaded
+    overloaded_message = "Queue is full"
+
+    def __init__(self, workers: int, max_queue: int, thread_name_prefix: str):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=thread_name_prefix)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    async def run(self, fn, *args):
+        #counted from admission to completion, so max_queue bounds queued and running jobs together
+        with self._lock:
+            if self.in_flight >= self.max_queue:
+                self.rejected += 1
+                raise self.overloaded(self.overloaded_message)
+            self.in_flight += 1
+
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, contextvars.copy_context().run, fn, *args)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
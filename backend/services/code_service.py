@@ -1,5 +1,242 @@
-import random
+import os
 import string
+import secrets
+import logging
+import threading
+from datetime import datetime
+
+from sqlalchemy import insert, func
+from sqlalchemy.exc import IntegrityError
+
+from backend.app import model
+from backend.app.database import SessionLocal
+
+"""
+    access codes for appointments. codes are drawn from a csprng ahead of
+    time into the access_code_pool table and a new appointment claims the
+    oldest unclaimed one in its own transaction (SELECT ... FOR UPDATE SKIP
+    LOCKED, so concurrent requests never wait on or get the same code).
+    a background thread keeps ACCESS_CODE_POOL_TARGET codes ready, topping up
+    with bulk INSERT IGNOREs whenever fewer than ACCESS_CODE_POOL_LOW are left.
+    claimed codes stay in the table, so its unique index rules out reissuing
+    one; codes issued before the pool existed are checked against appointments.
+    if the pool ever runs dry a code is minted inline instead of failing.
+    """
+
+logger = logging.getLogger(__name__)
+
+ACCESS_CODE_LENGTH = 8
+ACCESS_CODE_POOL_TARGET = int(os.getenv("ACCESS_CODE_POOL_TARGET", "1000"))
+ACCESS_CODE_POOL_LOW = int(os.getenv("ACCESS_CODE_POOL_LOW", "250"))
+ACCESS_CODE_REFILL_BATCH = int(os.getenv("ACCESS_CODE_REFILL_BATCH", "500"))
+ACCESS_CODE_REFILL_SECONDS = float(os.getenv("ACCESS_CODE_REFILL_SECONDS", "30"))
+
+CLAIM_ATTEMPTS = 5
+MINT_ATTEMPTS = 10
+
+
 #generates access code
-def generate_access_code(length=8):
-    return ''.join(random.choices(string.digits, k=length))
\ No newline at end of file
+def generate_access_code(length=ACCESS_CODE_LENGTH):
+    #csprng: the code is all a patient needs to open a session
+    return ''.join(secrets.choice(string.digits) for _ in range(length))
+
+
+class AccessCodePool:
+
+    def __init__(self, target: int = ACCESS_CODE_POOL_TARGET, low_water: int = ACCESS_CODE_POOL_LOW,
+                 batch_size: int = ACCESS_CODE_REFILL_BATCH):
+        self.target = target
+        self.low_water = low_water
+        self.batch_size = batch_size
+        self._thread = None
+        self._stop = threading.Event()
+        self._wake = threading.Condition()
+        self._lock = threading.Lock()
+        self.claimed = 0
+        self.minted = 0
+        self.refills = 0
+        self.unclaimed = None  #last counted, minus claims since
+
+    def count_unclaimed(self, db) -> int:
+        return db.query(func.count(model.AccessCode.id)).filter(
+            model.AccessCode.claimed_at.is_(None)
+        ).scalar()
+
+    def refill(self, db) -> int:
+        #top the pool up to target, returns how many codes were added
+        start = unclaimed = self.count_unclaimed(db)
+        rounds = 0
+        while unclaimed < self.target and rounds < 2 * self.target // max(self.batch_size, 1) + 2:
+            rounds += 1
+            candidates = {generate_access_code() for _ in range(min(self.batch_size, self.target - unclaimed))}
+
+            #codes handed out before the pool existed only live in appointments
+            taken = {
+                row.access_code for row in db.query(model.Appointment.access_code).filter(
+                    model.Appointment.access_code.in_(candidates)
+                )
+            }
+            rows = [{"code": code} for code in candidates - taken]
+            if rows:
+                #one multi-row insert, codes already in the pool are skipped
+                db.execute(
+                    insert(model.AccessCode).prefix_with("IGNORE", dialect="mysql").prefix_with("OR IGNORE", dialect="sqlite"),
+                    rows
+                )
+            db.commit()
+            unclaimed = self.count_unclaimed(db)
+
+        with self._lock:
+            self.unclaimed = unclaimed
+            if unclaimed > start:
+                self.refills += 1
+        return unclaimed - start
+
+    def claim(self, db) -> str:
+        #claim a code inside the caller's transaction, it is committed with the appointment
+        for _ in range(CLAIM_ATTEMPTS):
+            row = db.query(model.AccessCode).filter(
+                model.AccessCode.claimed_at.is_(None)
+            ).order_by(
+                model.AccessCode.id
+            ).with_for_update(skip_locked=True).first()
+
+            if row is None:
+                break
+
+            #FOR UPDATE is dropped on sqlite, so two bookings can both read this row as free;
+            #"claimed_at IS NULL" makes the slower one match nothing and try the next code,
+            #which keeps two appointments from ever sharing an access code
+            claimed = db.query(model.AccessCode).filter(
+                model.AccessCode.id == row.id,
+                model.AccessCode.claimed_at.is_(None)
+            ).update({model.AccessCode.claimed_at: datetime.now()}, synchronize_session=False)
+
+            if claimed == 1:
+                with self._lock:
+                    self.claimed += 1
+                    if self.unclaimed is not None:
+                        self.unclaimed -= 1
+                    running_low = self.unclaimed is None or self.unclaimed < self.low_water
+                if running_low:
+                    self.notify()
+                return row.code
+
+        self.notify()
+        logger.warning("⚠️ Access code pool empty, minted a code inline")
+        return self.mint(db)
+
+    def claim_many(self, db, count: int) -> list:
+        #claim codes for a whole batch with one select and one update, same transaction rules as claim
+        codes = []
+        for _ in range(CLAIM_ATTEMPTS):
+            needed = count - len(codes)
+            if needed <= 0:
+                break
+
+            rows = db.query(model.AccessCode.id, model.AccessCode.code).filter(
+                model.AccessCode.claimed_at.is_(None)
+            ).order_by(
+                model.AccessCode.id
+            ).limit(needed).with_for_update(skip_locked=True).all()
+
+            if not rows:
+                break
+
+            #all or nothing per round, if another request got any of these rows try again
+            savepoint = db.begin_nested()
+            claimed = db.query(model.AccessCode).filter(
+                model.AccessCode.id.in_([row.id for row in rows]),
+                model.AccessCode.claimed_at.is_(None)
+            ).update({model.AccessCode.claimed_at: datetime.now()}, synchronize_session=False)
+
+            if claimed == len(rows):
+                savepoint.commit()
+                codes.extend(row.code for row in rows)
+            else:
+                savepoint.rollback()
+
+        with self._lock:
+            self.claimed += len(codes)
+            if self.unclaimed is not None:
+                self.unclaimed -= len(codes)
+        self.notify()
+
+        #pool ran short of the batch, the rest are minted one by one
+        if len(codes) < count:
+            logger.warning("⚠️ Access code pool short, minting %d code(s) inline", count - len(codes))
+        while len(codes) < count:
+            codes.append(self.mint(db))
+        return codes
+
+    def mint(self, db) -> str:
+        #pool is empty: draw a code now and record it as claimed, the unique index still guards it
+        for _ in range(MINT_ATTEMPTS):
+            code = generate_access_code()
+            if db.query(model.Appointment.id).filter(model.Appointment.access_code == code).first():
+                continue
+            try:
+                with db.begin_nested():
+                    db.add(model.AccessCode(code=code, claimed_at=datetime.now()))
+            except IntegrityError:
+                continue
+
+            with self._lock:
+                self.minted += 1
+            return code
+
+        raise RuntimeError("Could not allocate a unique access code")
+
+    def start(self):
+        if self._thread or self.target <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="access-code-refill", daemon=True)
+        self._thread.start()
+        logger.info("🧵 Started access code refill (target %d, refill below %d)", self.target, self.low_water)
+
+    def stop(self, timeout: float = 10):
+        self._stop.set()
+        self.notify()
+        if self._thread:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def notify(self):
+        #wake the refill thread, e.g. once claims bring the pool under low water
+        with self._wake:
+            self._wake.notify_all()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            db = SessionLocal()
+            try:
+                unclaimed = self.count_unclaimed(db)
+                if unclaimed < self.low_water:
+                    added = self.refill(db)
+                    logger.debug("🔑 Access code pool refilled with %d code(s)", added)
+                else:
+                    with self._lock:
+                        self.unclaimed = unclaimed
+            except Exception as e:
+                db.rollback()
+                logger.exception("⚠️ Access code refill error: %s", e)
+            finally:
+                db.close()
+
+            with self._wake:
+                self._wake.wait(ACCESS_CODE_REFILL_SECONDS)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "target": self.target,
+                "low_water": self.low_water,
+                "unclaimed": self.unclaimed,
+                "claimed": self.claimed,
+                "minted": self.minted,
+                "refills": self.refills
+            }
+
+
+access_code_pool = AccessCodePool()
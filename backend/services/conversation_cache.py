@@ -0,0 +1,78 @@
+import os
+import threading
+from collections import OrderedDict, deque
+
+"""
+    in-memory cache of the last few chat messages for each active session.
+    generate_ai_response only looks at the tail of the conversation, so a turn
+    never needs the whole history: on a miss only the last HISTORY_WINDOW
+    messages are loaded, on a hit nothing is loaded at all.
+    each entry remembers the id of the newest message it holds so the caller
+    can detect messages written by another worker and reload.
+    """
+
+#generate_ai_response uses chat_history[-4:]
+HISTORY_WINDOW = int(os.getenv("CHAT_HISTORY_WINDOW", "4"))
+MAX_CACHED_SESSIONS = int(os.getenv("CONVERSATION_CACHE_SIZE", "500"))
+
+
+class ConversationCache:
+
+    def __init__(self, max_sessions: int = MAX_CACHED_SESSIONS, window: int = HISTORY_WINDOW):
+        self.max_sessions = max_sessions
+        self.window = window
+        self._entries = OrderedDict()  #session_id -> {"messages": deque, "last_id": int}
+        self._lock = threading.Lock()  #finalize runs in the threadpool, chat on the event loop
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, session_id: int, last_id):
+        #returns the cached messages, or None on a miss / when the newest cached id isn't last_id
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None or entry["last_id"] != last_id:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(session_id)
+            self.hits += 1
+            return list(entry["messages"])
+
+    def put(self, session_id: int, messages: list[dict], last_id: int):
+        with self._lock:
+            self._entries[session_id] = {
+                "messages": deque(messages, maxlen=self.window),
+                "last_id": last_id
+            }
+            self._entries.move_to_end(session_id)
+
+            #evict the least recently used sessions
+            while len(self._entries) > self.max_sessions:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def append(self, session_id: int, message: dict, message_id: int):
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return
+            entry["messages"].append(message)
+            entry["last_id"] = message_id
+
+    def invalidate(self, session_id: int):
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "sessions": len(self._entries),
+                "max_sessions": self.max_sessions,
+                "window": self.window,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+
+conversation_cache = ConversationCache()
@@ -1,113 +1,264 @@
 import smtplib
+import time
+import queue
+import logging
+import threading
+from contextlib import contextmanager
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.application import MIMEApplication
 import os
 from dotenv import load_dotenv
 from typing import Optional
+from backend.services.metrics import span
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Secure configuration
 SENDER_EMAIL = os.getenv("SENDER_EMAIL")
 SENDER_PASSWORD = os.getenv("SENDER_APP_PASSWORD")
 DOCTOR_EMAIL = os.getenv("DOCTOR_EMAIL")
 
-# Validation check
-if not all([SENDER_EMAIL, SENDER_PASSWORD, DOCTOR_EMAIL]):
-    raise ValueError(
-        "Missing email configuration! Please set SENDER_EMAIL, "
-        "SENDER_APP_PASSWORD, and DOCTOR_EMAIL in your .env file"
+# SMTP server and delivery tuning
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() == "true"
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "30"))
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "2"))
+SMTP_IDLE_CHECK_SECONDS = float(os.getenv("SMTP_IDLE_CHECK_SECONDS", "30"))
+SMTP_MAX_IDLE_SECONDS = float(os.getenv("SMTP_MAX_IDLE_SECONDS", "240"))
+
+
+# Validation check, done when a report is sent so importing this module never fails
+def missing_email_config() -> list:
+    return [name for name, value in (
+        ("SENDER_EMAIL", SENDER_EMAIL),
+        ("SENDER_APP_PASSWORD", SENDER_PASSWORD),
+        ("DOCTOR_EMAIL", DOCTOR_EMAIL)
+    ) if not value]
+
+
+class SMTPConnectionPool:
+
+    #bounded pool of logged-in SMTP connections, reused across reports.
+    #at most `size` connections exist at once, and the slot semaphore is the cap on concurrent
+    #sends: report workers (the only senders) block in connection() until a slot frees up,
+    #and retrying a failed send is the report job's business
+
+    def __init__(self, host: str = SMTP_HOST, port: int = SMTP_PORT, username: Optional[str] = SENDER_EMAIL,
+                 password: Optional[str] = SENDER_PASSWORD, use_starttls: bool = SMTP_STARTTLS,
+                 size: int = SMTP_POOL_SIZE, timeout: float = SMTP_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_starttls = use_starttls
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()  #(connection, last_used); lifo keeps the warmest connection in use
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+        self.reconnects = 0
+        self.messages_sent = 0
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        server.ehlo()
+        if self.use_starttls:
+            server.starttls()
+            server.ehlo()
+        if self.username and self.password:
+            server.login(self.username, self.password)
+        with self._lock:
+            self.connections_opened += 1
+        return server
+
+    @staticmethod
+    def _close(server):
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    def _is_alive(self, server) -> bool:
+        try:
+            return server.noop()[0] == 250
+        except Exception:
+            return False
+
+    def _checkout(self):
+        #reuse an idle connection if it is still usable, otherwise open a new one
+        while True:
+            try:
+                server, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+
+            idle_for = time.monotonic() - last_used
+            if idle_for > SMTP_MAX_IDLE_SECONDS:
+                self._close(server)
+                continue
+            if idle_for > SMTP_IDLE_CHECK_SECONDS and not self._is_alive(server):
+                self._close(server)
+                continue
+            return server
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        if not self._slots.acquire(timeout=timeout if timeout is not None else self.timeout):
+            raise smtplib.SMTPException("Timed out waiting for a free SMTP connection")
+        server = None
+        try:
+            server = self._checkout()
+            yield server
+            self._idle.put((server, time.monotonic()))
+        except Exception:
+            #a connection that errored is never handed out again
+            if server is not None:
+                self._close(server)
+            raise
+        finally:
+            self._slots.release()
+
+    @span("email")
+    def send(self, msg):
+        #send one message, reconnecting once if the server dropped the connection
+        for attempt in range(2):
+            try:
+                with self.connection() as server:
+                    server.send_message(msg)
+                with self._lock:
+                    self.messages_sent += 1
+                return
+            except (smtplib.SMTPServerDisconnected, ConnectionError):
+                if attempt == 1:
+                    raise
+                with self._lock:
+                    self.reconnects += 1
+
+    def close_all(self):
+        while True:
+            try:
+                server, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(server)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": self.size,
+                "idle": self._idle.qsize(),
+                "connections_opened": self.connections_opened,
+                "reconnects": self.reconnects,
+                "messages_sent": self.messages_sent
+            }
+
+
+smtp_pool = SMTPConnectionPool()
+
+
+def build_report_message(pdf_path: str, patient_name: str, session_id: int, recipient: str,
+                         pdf_bytes: Optional[bytes] = None):
+    msg = MIMEMultipart()
+    msg['From'] = SENDER_EMAIL
+    msg['To'] = recipient
+    msg['Subject'] = f"Patient Pre-Consultation Report - {patient_name} (Session #{session_id})"
+
+    #email body
+    body = f"""
+Hello Doctor,
+
+Attached is the pre-consultation report for:
+
+Patient Name: {patient_name}
+Session ID: {session_id}
+Report Generated: {os.path.basename(pdf_path)}
+
+This report was generated automatically by the AI-Powered Patient Pre-Consultation System.
+
+Please review the symptoms before the patient's consultation.
+
+
+This is an automated message. Please do not reply to this email.
+        """
+    msg.attach(MIMEText(body, 'plain'))
+
+    #attach the pdf, reading it back from disk only if the caller doesn't already have it
+    if pdf_bytes is None:
+        with open(pdf_path, "rb") as f:
+            pdf_bytes = f.read()
+    pdf_attachment = MIMEApplication(pdf_bytes, _subtype="pdf")
+    pdf_attachment.add_header(
+        'Content-Disposition',
+        'attachment',
+        filename=os.path.basename(pdf_path)
     )
+    msg.attach(pdf_attachment)
+
+    return msg
 
 
 def send_report_email(
         pdf_path: str,
         patient_name: str,
         session_id: int,
-        recipient_email: Optional[str] = None
+        recipient_email: Optional[str] = None,
+        pdf_bytes: Optional[bytes] = None
 ) -> dict:
 
     #use provided email or default doctor email
     recipient = recipient_email or DOCTOR_EMAIL
 
     #validation
-    if not os.path.exists(pdf_path):
+    missing = missing_email_config()
+    if missing:
+        error_msg = f"❌ Missing email configuration! Please set {', '.join(missing)} in your .env file"
+        logger.error(error_msg)
+        return {"success": False, "message": error_msg}
+
+    if pdf_bytes is None and not os.path.exists(pdf_path):
         error_msg = f"❌ error: pdf not found at {pdf_path}"
-        print(error_msg)
+        logger.error(error_msg)
         return {"success": False, "message": error_msg}
 
     if not recipient:
         error_msg = "❌ Error: No recipient email provided"
-        print(error_msg)
+        logger.error(error_msg)
         return {"success": False, "message": error_msg}
 
     try:
-        # 1 setup the email
-        msg = MIMEMultipart()
-        msg['From'] = SENDER_EMAIL
-        msg['To'] = recipient
-        msg['Subject'] = f"Patient Pre-Consultation Report - {patient_name} (Session #{session_id})"
-
-        #email body
-        body = f"""
-Hello Doctor,
-
-Attached is the pre-consultation report for:
-
-Patient Name: {patient_name}
-Session ID: {session_id}
-Report Generated: {os.path.basename(pdf_path)}
+        # 1 setup the email with the pdf attached
+        msg = build_report_message(pdf_path, patient_name, session_id, recipient, pdf_bytes)
 
-This report was generated automatically by the AI-Powered Patient Pre-Consultation System.
-
-Please review the symptoms before the patient's consultation.
-
-
-This is an automated message. Please do not reply to this email.
-        """
-        msg.attach(MIMEText(body, 'plain'))
-
-        # 2 attach the pdf
-        with open(pdf_path, "rb") as f:
-            pdf_attachment = MIMEApplication(f.read(), _subtype="pdf")
-            pdf_attachment.add_header(
-                'Content-Disposition',
-                'attachment',
-                filename=os.path.basename(pdf_path)
-            )
-            msg.attach(pdf_attachment)
-
-        #3 connect to gmail server and send
-        print(f"📧 Connecting to gmail server...")
-        server = smtplib.SMTP('smtp.gmail.com', 587)
-        server.starttls()
-
-        print(f"🔐 logging in as {SENDER_EMAIL}...")
-        server.login(SENDER_EMAIL, SENDER_PASSWORD)
-
-        print(f"📤 sending email to {recipient}...")
-        server.send_message(msg)
-        server.quit()
+        # 2 send over a pooled, already logged-in connection
+        logger.debug("📤 sending email to %s", recipient)
+        smtp_pool.send(msg)
 
         success_msg = f"✅ Email sent successfully to {recipient}"
-        print(success_msg)
+        logger.info(success_msg)
         return {"success": True, "message": success_msg}
 
     except smtplib.SMTPAuthenticationError:
         error_msg = "❌ authentication failed. Check your email and app password."
-        print(error_msg)
+        logger.error(error_msg)
         return {"success": False, "message": error_msg}
 
     except smtplib.SMTPException as e:
         error_msg = f"❌ SMTP error occurred: {str(e)}"
-        print(error_msg)
+        logger.error(error_msg)
         return {"success": False, "message": error_msg}
 
     except Exception as e:
         error_msg = f"❌ Unexpected error: {str(e)}"
-        print(error_msg)
+        logger.error(error_msg)
         return {"success": False, "message": error_msg}
 
 
@@ -120,8 +271,9 @@ def test_email_configuration():
     print(f"Recipient: {DOCTOR_EMAIL}")
     print(f"Password set: {'Yes' if SENDER_PASSWORD else 'No'}")
 
-    if not SENDER_PASSWORD:
-        print("❌ App password not set!")
+    missing = missing_email_config()
+    if missing:
+        print(f"❌ Not set: {', '.join(missing)}")
         return False
 
     print("✅ Configuration loaded successfully")
@@ -0,0 +1,91 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+"""
+    memo cache for the extraction model. the extraction call runs with
+    temperature=0 and json output, so the same (current_state, user_message,
+    last_symptom) always gives the same answer. results are keyed by a sha256
+    of those inputs in canonical json form and expire after a ttl.
+    """
+
+EXTRACT_CACHE_SIZE = int(os.getenv("EXTRACT_CACHE_SIZE", "2048"))
+EXTRACT_CACHE_TTL = float(os.getenv("EXTRACT_CACHE_TTL", "3600"))  #seconds
+
+
+def extraction_key(current_state: dict, user_message: str, last_symptom) -> str:
+    #sorted keys + compact separators so equal inputs always hash the same
+    canonical = json.dumps(
+        [current_state, user_message, last_symptom],
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ExtractionCache:
+
+    def __init__(self, max_entries: int = EXTRACT_CACHE_SIZE, ttl: float = EXTRACT_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  #key -> (expires_at, json text)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+        #stored as json so every caller gets its own copy of the state
+        return json.loads(value)
+
+    def put(self, key: str, state: dict):
+        value = json.dumps(state)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+extraction_cache = ExtractionCache()
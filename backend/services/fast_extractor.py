@@ -0,0 +1,135 @@
+import re
+import copy
+from collections import Counter
+
+"""
+    rule based extractor for the short answers patients give most of the time
+    ("5", "8/10", "2 days", "every hour", "yes"). it applies the same rules as
+    EXTRACT_PROMPT to the symptom currently being discussed and returns None
+    whenever the message is not an unambiguous match, so the llm handles it.
+    """
+
+#how each turn was extracted ("fast" = handled here, "llm" = extraction model call)
+extraction_counts = Counter()
+
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+    "couple of": 2, "few": 3, "a few": 3, "a couple of": 2,
+}
+
+AFFIRMATIVE = {"yes", "yeah", "yep", "yup", "y", "sure", "i do"}
+NEGATIVE = {"no", "nope", "nah", "n", "none", "no thanks", "no thank you",
+            "that's all", "thats all", "that is all", "nothing else", "i don't", "i dont"}
+
+SEVERITY_WORDS = {
+    "mild": "Mild", "slight": "Mild", "a little": "Mild", "not bad": "Mild",
+    "moderate": "Moderate", "medium": "Moderate", "quite bad": "Moderate",
+    "severe": "Severe", "very bad": "Severe", "really bad": "Severe",
+    "hurts a lot": "Severe", "unbearable": "Severe", "extreme": "Severe",
+}
+
+FREQUENCY_WORDS = {
+    "constant": "Constant", "constantly": "Constant", "all the time": "Constant",
+    "frequent": "Frequent", "frequently": "Frequent", "often": "Frequent",
+    "sometimes": "Sometimes", "occasionally": "Occasional", "occasional": "Occasional",
+    "rarely": "Rarely", "daily": "Daily", "hourly": "Hourly", "weekly": "Weekly",
+    "on and off": "On and off", "comes and goes": "Comes and goes",
+}
+
+UNITS = r"(?:minute|min|hour|hr|day|week|wk|month|year|yr)s?"
+COUNT = r"(?:\d+|" + "|".join(sorted(map(re.escape, NUMBER_WORDS), key=len, reverse=True)) + r")"
+
+#"5", "8/10", "5 out of 10"
+SEVERITY_SCORE_RE = re.compile(r"^(?:about |around |maybe )?(\d{1,2})(?:\s*(?:/|out of)\s*10)?$")
+#"2 days", "for a week", "about 3 months now", "2 days ago"
+DURATION_RE = re.compile(r"^(?:for )?(?:about |around |roughly )?(" + COUNT + r" " + UNITS + r")(?: now| ago)?$")
+#"since yesterday", "since last week", "since monday"
+SINCE_RE = re.compile(r"^since [a-z ]{3,20}$")
+#"every hour", "every 2 hours", "once a day", "3 times a week"
+FREQUENCY_RE = re.compile(
+    r"^(?:every (?:" + COUNT + r" )?" + UNITS +
+    r"|(?:once|twice|" + COUNT + r" times?) (?:a|an|per|every) " + UNITS + r")$"
+)
+
+
+def _normalise(message: str) -> str:
+    text = message.strip().lower()
+    text = re.sub(r"[.!?,]+$", "", text)
+    return re.sub(r"\s+", " ", text)
+
+
+def _classify(text: str):
+    #returns (field, value) for a message that only carries one field, else None
+    match = SEVERITY_SCORE_RE.match(text)
+    if match:
+        score = int(match.group(1))
+        if 0 <= score <= 10:
+            return "severity", f"{score}/10"
+        return None
+
+    if text in SEVERITY_WORDS:
+        return "severity", SEVERITY_WORDS[text]
+
+    match = DURATION_RE.match(text)
+    if match:
+        return "duration", match.group(1)
+
+    if SINCE_RE.match(text):
+        return "duration", text.capitalize()
+
+    if text in FREQUENCY_WORDS:
+        return "frequency", FREQUENCY_WORDS[text]
+
+    if FREQUENCY_RE.match(text):
+        return "frequency", text.capitalize()
+
+    return None
+
+
+def fast_extract(current_state: dict, user_message: str, last_symptom):
+    #returns the updated state, or None when the llm should handle the message
+    text = _normalise(user_message)
+    symptoms = current_state.get("symptoms", [])
+
+    #yes/no to "any other symptoms?" never changes the data (rule 7)
+    if text in AFFIRMATIVE or text in NEGATIVE:
+        if last_symptom is None and symptoms:
+            return copy.deepcopy(current_state)
+        return None
+
+    #unnamed symptoms need the llm to pick up the name
+    if not last_symptom or last_symptom.lower() in ["yes", "no", "other", "symptom"]:
+        return None
+
+    classified = _classify(text)
+    if not classified:
+        return None
+    field, value = classified
+
+    new_state = copy.deepcopy(current_state)
+    for s in reversed(new_state.get("symptoms", [])):
+        if (s.get("symptom") or "").lower() == last_symptom.lower():
+            #only fill gaps, overwriting an answered field is a judgement call for the llm
+            if s.get(field):
+                return None
+            s[field] = value
+            return new_state
+
+    return None
+
+
+def record_extraction(path: str):
+    extraction_counts[path] += 1
+
+
+def get_extraction_stats() -> dict:
+    fast = extraction_counts["fast"]
+    llm = extraction_counts["llm"]
+    total = fast + llm
+    return {
+        "fast_path": fast,
+        "llm": llm,
+        "total": total,
+        "fast_path_ratio": round(fast / total, 4) if total else 0.0
+    }
@@ -0,0 +1,199 @@
+import os
+import json
+import asyncio
+from typing import Optional
+
+"""
+    the chat model behind ai_service, behind one small interface so the
+    conversation logic doesn't depend on a vendor sdk.
+    LLM_PROVIDER=groq (default) uses the groq sdk against the live api.
+    LLM_PROVIDER=openai talks to any openai-compatible /chat/completions
+    endpoint at LLM_BASE_URL over plain httpx, e.g. a self-hosted model or
+    backend/benchmarks/mock_llm_server.py for load tests without quota.
+    providers own a pooled keep-alive http client and are created once per
+    event loop (one per worker process when served), see get_llm_provider().
+    """
+
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "groq")
+LLM_MODEL = os.getenv("LLM_MODEL", "llama-3.3-70b-versatile")
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "")  #openai provider, e.g. http://127.0.0.1:8001/v1
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_KEEPALIVE_SECONDS = float(os.getenv("LLM_KEEPALIVE_SECONDS", "60"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "1"))  #429s are not worth retrying blind, the limiter pauses instead
+
+
+class LLMError(Exception):
+    #the provider answered with an error status (429 carries its retry-after)
+
+    def __init__(self, message: str, status_code: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+def _retry_after(headers) -> Optional[float]:
+    try:
+        return float(headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def _http_limits():
+    import httpx
+    return httpx.Limits(
+        max_connections=LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_MAX_CONNECTIONS,
+        keepalive_expiry=LLM_KEEPALIVE_SECONDS
+    )
+
+
+class LLMProvider:
+
+    name = "base"
+
+    async def complete(self, messages: list, temperature: float, json_mode: bool = False,
+                       model: str = LLM_MODEL) -> tuple:
+        #returns (reply text, total tokens as reported by the provider or None)
+        raise NotImplementedError
+
+    def stream(self, messages: list, temperature: float, model: str = LLM_MODEL):
+        #async iterator of reply text chunks
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class GroqProvider(LLMProvider):
+
+    name = "groq"
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
+        api_key = api_key or os.getenv("GROQ_API_KEY")
+        if not api_key:
+            raise RuntimeError("GROQ_API_KEY environment variable not set")
+        #the groq sdk is slow to import, load it with the first chat turn instead of at startup
+        from groq import AsyncGroq, DefaultAsyncHttpxClient
+        self.client = AsyncGroq(
+            api_key=api_key,
+            base_url=base_url,
+            timeout=LLM_TIMEOUT_SECONDS,
+            max_retries=LLM_MAX_RETRIES,
+            http_client=DefaultAsyncHttpxClient(limits=_http_limits())
+        )
+
+    @staticmethod
+    def _error(e) -> LLMError:
+        response = getattr(e, "response", None)
+        return LLMError(str(e), getattr(e, "status_code", None),
+                        _retry_after(response.headers) if response is not None else None)
+
+    async def complete(self, messages, temperature, json_mode=False, model=LLM_MODEL):
+        from groq import APIStatusError
+        kwargs = {"response_format": {"type": "json_object"}} if json_mode else {}
+        try:
+            res = await self.client.chat.completions.create(
+                model=model, messages=messages, temperature=temperature, **kwargs
+            )
+        except APIStatusError as e:
+            raise self._error(e)
+        usage = getattr(res, "usage", None)
+        return res.choices[0].message.content, getattr(usage, "total_tokens", None)
+
+    async def stream(self, messages, temperature, model=LLM_MODEL):
+        from groq import APIStatusError
+        try:
+            chunks = await self.client.chat.completions.create(
+                model=model, messages=messages, temperature=temperature, stream=True
+            )
+        except APIStatusError as e:
+            raise self._error(e)
+        async for chunk in chunks:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    async def close(self):
+        await self.client.close()
+
+
+class OpenAICompatibleProvider(LLMProvider):
+
+    #POST {base_url}/chat/completions, the request and sse stream format most servers implement
+
+    name = "openai"
+
+    def __init__(self, base_url: str = LLM_BASE_URL, api_key: Optional[str] = None):
+        if not base_url:
+            raise RuntimeError("LLM_BASE_URL must be set for LLM_PROVIDER=openai")
+        import httpx
+        api_key = api_key or os.getenv("LLM_API_KEY", "")
+        self.client = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"),
+            headers={"Authorization": f"Bearer {api_key}"} if api_key else {},
+            timeout=LLM_TIMEOUT_SECONDS,
+            limits=_http_limits()
+        )
+
+    @staticmethod
+    async def _check(response):
+        if response.status_code >= 400:
+            await response.aread()
+            raise LLMError(f"{response.status_code}: {response.text[:200]}", response.status_code,
+                           _retry_after(response.headers))
+
+    async def complete(self, messages, temperature, json_mode=False, model=LLM_MODEL):
+        body = {"model": model, "messages": messages, "temperature": temperature}
+        if json_mode:
+            body["response_format"] = {"type": "json_object"}
+        response = await self.client.post("/chat/completions", json=body)
+        await self._check(response)
+        data = response.json()
+        return data["choices"][0]["message"]["content"], (data.get("usage") or {}).get("total_tokens")
+
+    async def stream(self, messages, temperature, model=LLM_MODEL):
+        body = {"model": model, "messages": messages, "temperature": temperature, "stream": True}
+        async with self.client.stream("POST", "/chat/completions", json=body) as response:
+            await self._check(response)
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                choices = json.loads(data).get("choices") or []
+                text = choices[0].get("delta", {}).get("content") if choices else None
+                if text:
+                    yield text
+
+    async def close(self):
+        await self.client.aclose()
+
+
+PROVIDERS = {
+    "groq": GroqProvider,
+    "openai": OpenAICompatibleProvider,
+}
+
+_provider = None
+_provider_loop = None
+
+
+def get_llm_provider() -> LLMProvider:
+    #one provider per event loop: pooled connections can't move between loops
+    global _provider, _provider_loop
+    loop = asyncio.get_running_loop()
+    if _provider is None or _provider_loop is not loop:
+        if LLM_PROVIDER not in PROVIDERS:
+            raise RuntimeError(f"Unknown LLM_PROVIDER '{LLM_PROVIDER}'")
+        _provider = PROVIDERS[LLM_PROVIDER]()
+        _provider_loop = loop
+    return _provider
+
+
+async def close_llm_provider():
+    global _provider, _provider_loop
+    if _provider is not None:
+        await _provider.close()
+    _provider = None
+    _provider_loop = None
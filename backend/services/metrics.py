@@ -0,0 +1,171 @@
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+"""
+    latency histograms for the hot path, served in prometheus text format at
+    /metrics. span(stage) times a block (or a whole function, as a decorator);
+    sql statements are timed as the "db" stage by engine events, see
+    instrument_db().
+    a span that runs inside a request also lands in that request's timings,
+    which ServerTimingMiddleware returns as a Server-Timing header
+    (db;dur=4.1;desc="3 calls", llm_extract;dur=612.0, ...). work on the pools
+    (transcription) carries the request context along; the report workers
+    run outside any request and only feed the histograms.
+    """
+
+STAGES = ("db", "llm_wait", "llm_extract", "llm_reply", "pdf", "email", "transcription")
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+#(stage, seconds) per request; list.append is atomic, so threads and tasks of one request can share it
+request_timings: ContextVar[Optional[list]] = ContextVar("request_timings", default=None)
+
+
+class Histogram:
+
+    def __init__(self, buckets: tuple = BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  #last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        i = bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += seconds
+            self.count += 1
+
+    def snapshot(self) -> tuple:
+        #(cumulative bucket counts, sum, count)
+        with self._lock:
+            cumulative, total = [], 0
+            for n in self.counts:
+                total += n
+                cumulative.append(total)
+            return cumulative, self.sum, self.count
+
+
+def _labels(**labels) -> str:
+    return ",".join(f'{k}="{v}"' for k, v in labels.items())
+
+
+class Metrics:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = {stage: Histogram() for stage in STAGES}
+        self.requests = {}  #(method, route) -> Histogram
+        self.responses = {}  #(method, route, status) -> count
+
+    def observe_stage(self, stage: str, seconds: float):
+        self.stages[stage].observe(seconds)
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float):
+        with self._lock:
+            histogram = self.requests.get((method, route))
+            if histogram is None:
+                histogram = self.requests[(method, route)] = Histogram()
+            key = (method, route, status)
+            self.responses[key] = self.responses.get(key, 0) + 1
+        histogram.observe(seconds)
+
+    def _histogram_lines(self, name: str, histogram: Histogram, labels: str) -> list:
+        cumulative, total, count = histogram.snapshot()
+        sep = "," if labels else ""
+        lines = [f'{name}_bucket{{{labels}{sep}le="{le}"}} {n}' for le, n in zip(histogram.buckets, cumulative)]
+        lines.append(f'{name}_bucket{{{labels}{sep}le="+Inf"}} {cumulative[-1]}')
+        lines.append(f"{name}_sum{{{labels}}} {total:.6f}")
+        lines.append(f"{name}_count{{{labels}}} {count}")
+        return lines
+
+    def render(self) -> str:
+        lines = [
+            "# HELP preconsult_stage_duration_seconds Time spent in each hot-path stage.",
+            "# TYPE preconsult_stage_duration_seconds histogram",
+        ]
+        for stage, histogram in self.stages.items():
+            lines += self._histogram_lines("preconsult_stage_duration_seconds", histogram, _labels(stage=stage))
+
+        with self._lock:
+            requests = sorted(self.requests.items())
+            responses = sorted(self.responses.items())
+        lines += [
+            "# HELP preconsult_http_request_duration_seconds Time from request to the end of the response.",
+            "# TYPE preconsult_http_request_duration_seconds histogram",
+        ]
+        for (method, route), histogram in requests:
+            lines += self._histogram_lines("preconsult_http_request_duration_seconds", histogram,
+                                           _labels(method=method, route=route))
+        lines += [
+            "# HELP preconsult_http_responses_total Responses by route and status code.",
+            "# TYPE preconsult_http_responses_total counter",
+        ]
+        for (method, route, status), n in responses:
+            lines.append(f"preconsult_http_responses_total{{{_labels(method=method, route=route, status=status)}}} {n}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+def record(stage: str, seconds: float):
+    metrics.observe_stage(stage, seconds)
+    timings = request_timings.get()
+    if timings is not None:
+        timings.append((stage, seconds))
+
+
+@contextmanager
+def span(stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - start)
+
+
+def server_timing(timings: list, total: float) -> str:
+    #one entry per stage in first-seen order, summed over repeated spans (every query is a db span)
+    totals, counts = {}, {}
+    for stage, seconds in list(timings):
+        totals[stage] = totals.get(stage, 0.0) + seconds
+        counts[stage] = counts.get(stage, 0) + 1
+    parts = [
+        f'{stage};dur={seconds * 1000:.1f}' + (f';desc="{counts[stage]} calls"' if counts[stage] > 1 else "")
+        for stage, seconds in totals.items()
+    ]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("metrics_query_start")
+    if starts:
+        record("db", time.perf_counter() - starts.pop())
+
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    starts = conn.info.get("metrics_query_start") if conn is not None else None
+    if starts:
+        record("db", time.perf_counter() - starts.pop())
+
+
+def instrument_db():
+    #times every statement on every engine, sync and async (async engines run on a sync Engine underneath)
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    if event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
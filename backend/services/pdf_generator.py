@@ -1,20 +1,28 @@
-from reportlab.lib.pagesizes import A4, letter
-from reportlab.pdfgen import canvas
-from reportlab.lib import colors
-from reportlab.lib.units import cm
 import os
+import logging
+from io import BytesIO
 from datetime import datetime
+from backend.services.metrics import span
+
+logger = logging.getLogger(__name__)
 
 """
     this generates a pdf report of patient symptoms containing:
         session_id
         patient_name
         list of symptoms
-        and returns pdf file path
+        and returns pdf file path, or the pdf bytes when no file path is given
     """
-def generate_summary_pdf(session_id: int, patient_name: str, symptoms: list, file_path: str):
-
-    c = canvas.Canvas(file_path, pagesize=letter)
+@span("pdf")
+def generate_summary_pdf(session_id: int, patient_name: str, symptoms: list, file_path: str = None):
+    #reportlab is only loaded by whoever renders a report, not by every importer of this module
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+    from reportlab.lib import colors
+
+    #render straight into memory unless a file path was asked for
+    buffer = BytesIO() if file_path is None else None
+    c = canvas.Canvas(buffer if buffer is not None else file_path, pagesize=letter)
     width, height = letter
 
     #header
@@ -86,7 +94,11 @@ def generate_summary_pdf(session_id: int, patient_name: str, symptoms: list, fil
 
     #save the pdf
     c.save()
-    print(f"✅ PDF generated successfully: {file_path}")
+
+    if buffer is not None:
+        return buffer.getvalue()
+
+    logger.debug("✅ PDF generated successfully: %s", file_path)
     return file_path
 
 
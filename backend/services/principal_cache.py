@@ -0,0 +1,139 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session as OrmSession, make_transient_to_detached, object_session
+
+from backend.app import model
+
+"""
+    cache of authenticated doctors for get_current_doctor, so polling
+    dashboards don't decode the jwt and select the doctor on every request.
+    entries are keyed by the bearer token and expire with the token's exp
+    (capped at PRINCIPAL_CACHE_TTL so other workers' edits show up too).
+    cached doctors are detached copies; callers merge them into their own
+    session with load=False, which attaches them without a SELECT.
+    any orm update or delete of a doctor drops all of that doctor's entries,
+    once at flush and again after commit. bulk query.update() bypasses the
+    orm events, call invalidate_doctor() after those.
+    """
+
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "1024"))
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "300"))  #seconds
+
+
+def detached_copy(doctor: model.Doctor) -> model.Doctor:
+    #a clean, fully loaded copy not tied to any session or request
+    copy = model.Doctor(**{
+        attr.key: getattr(doctor, attr.key) for attr in inspect(model.Doctor).column_attrs
+    })
+    make_transient_to_detached(copy)
+    return copy
+
+
+class PrincipalCache:
+
+    def __init__(self, max_entries: int = PRINCIPAL_CACHE_SIZE, ttl: float = PRINCIPAL_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  #token -> (expires_at, doctor_id, detached doctor)
+        self._by_doctor = {}  #doctor_id -> set of tokens
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _drop(self, token: str):
+        #caller holds the lock
+        _, doctor_id, _ = self._entries.pop(token)
+        tokens = self._by_doctor.get(doctor_id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._by_doctor[doctor_id]
+
+    def get(self, token: str):
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            if entry[0] < time.time():
+                self._drop(token)
+                self.expired += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, token: str, doctor: model.Doctor, token_exp=None):
+        expires_at = time.time() + self.ttl
+        if token_exp is not None:
+            expires_at = min(expires_at, float(token_exp))
+
+        copy = detached_copy(doctor)
+        with self._lock:
+            if token in self._entries:
+                self._drop(token)
+            self._entries[token] = (expires_at, copy.id, copy)
+            self._by_doctor.setdefault(copy.id, set()).add(token)
+
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate_doctor(self, doctor_id: int):
+        with self._lock:
+            for token in list(self._by_doctor.get(doctor_id, ())):
+                self._drop(token)
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_doctor.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "doctors": len(self._by_doctor),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "db_lookups_saved": self.hits,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+principal_cache = PrincipalCache()
+
+
+@event.listens_for(model.Doctor, "after_update")
+@event.listens_for(model.Doctor, "after_delete")
+def _doctor_changed(mapper, connection, target):
+    principal_cache.invalidate_doctor(target.id)
+
+    #a request could re-cache the old row before this commits, so drop it again afterwards
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("changed_doctors", set()).add(target.id)
+
+
+@event.listens_for(OrmSession, "after_commit")
+@event.listens_for(OrmSession, "after_rollback")
+def _invalidate_changed_doctors(session):
+    for doctor_id in session.info.pop("changed_doctors", ()):
+        principal_cache.invalidate_doctor(doctor_id)
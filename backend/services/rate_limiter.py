@@ -0,0 +1,170 @@
+import os
+import math
+import time
+import asyncio
+import threading
+from collections import deque
+
+"""
+    admission control in front of the llm provider. two token buckets, one
+    for requests per minute and one for tokens per minute, sized to the
+    provider quota (LLM_RPM, LLM_TPM; per process, so divide the account
+    quota by the number of workers).
+    a call reserves its cost up front, which puts it in line behind every
+    call already admitted, and then sleeps until the buckets have refilled
+    far enough. calls that would wait longer than LLM_MAX_WAIT_SECONDS, or
+    find LLM_MAX_QUEUE calls already waiting, are shed with LLMRateLimited
+    straight away instead of being sent and coming back as a 429.
+    token costs are estimates (prompt size plus expected completion) and are
+    corrected with the provider's reported usage once a call returns. if the
+    provider still answers 429, pause() holds every call until its
+    retry-after has passed.
+    """
+
+LLM_RPM = float(os.getenv("LLM_RPM", "30"))  #groq free tier for llama-3.3-70b-versatile, raise on paid plans
+LLM_TPM = float(os.getenv("LLM_TPM", "12000"))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "32"))
+LLM_MAX_WAIT_SECONDS = float(os.getenv("LLM_MAX_WAIT_SECONDS", "10"))
+LLM_COMPLETION_TOKENS = int(os.getenv("LLM_COMPLETION_TOKENS", "300"))  #expected completion size per call
+
+WAIT_SAMPLES = 1000
+
+
+class LLMRateLimited(Exception):
+    #the call would exceed the provider quota, try again after retry_after seconds
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def estimate_tokens(messages: list, completion_tokens: int = LLM_COMPLETION_TOKENS) -> int:
+    #~4 characters per token for english prompts, plus the reply we expect back
+    return sum(len(m.get("content") or "") for m in messages) // 4 + completion_tokens
+
+
+class TokenBucket:
+
+    #refills continuously at rate per second up to capacity. the level may go
+    #negative: that is capacity already promised to callers still waiting
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_for(self, cost: float) -> float:
+        #seconds until cost more would be covered, after everything already reserved
+        deficit = cost - self.level
+        return deficit / self.rate if deficit > 0 else 0.0
+
+
+class RateLimiter:
+
+    def __init__(self, rpm: float = LLM_RPM, tpm: float = LLM_TPM,
+                 max_queue: int = LLM_MAX_QUEUE, max_wait: float = LLM_MAX_WAIT_SECONDS):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.admitted = 0
+        self.shed = 0
+        self.provider_429s = 0
+        self._waits = deque(maxlen=WAIT_SAMPLES)
+
+    def _wait(self, cost: float, calls: int = 1) -> float:
+        #caller holds the lock
+        now = time.monotonic()
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        return max(self.requests.wait_for(calls), self.tokens.wait_for(cost), self._paused_until - now)
+
+    def _admit(self, wait: float):
+        #caller holds the lock, sheds the call if its wait is too long or the line is full
+        if wait > self.max_wait or (wait > 0 and self.waiting >= self.max_queue):
+            self.shed += 1
+            raise LLMRateLimited("LLM quota exhausted", retry_after=max(wait, 1.0))
+
+    def check(self, calls: int = 1, cost: int = LLM_COMPLETION_TOKENS):
+        #raise now if `calls` calls of this cost each would be shed, without reserving them.
+        #lets a route refuse a turn before it has written anything
+        with self._lock:
+            self._admit(self._wait(min(calls * cost, self.tokens.capacity), calls))
+
+    async def acquire(self, cost: int):
+        #a single call bigger than the whole minute's quota still gets through, alone
+        cost = min(cost, self.tokens.capacity)
+        with self._lock:
+            wait = self._wait(cost)
+            self._admit(wait)
+            self.requests.level -= 1
+            self.tokens.level -= cost
+            self.admitted += 1
+            self._waits.append(wait)
+            if wait > 0:
+                self.waiting += 1
+                self.max_waiting = max(self.max_waiting, self.waiting)
+
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                #the call never goes out, hand its reservation back to the calls behind it
+                with self._lock:
+                    self.requests.level = min(self.requests.capacity, self.requests.level + 1)
+                    self.tokens.level = min(self.tokens.capacity, self.tokens.level + cost)
+                    self.admitted -= 1
+                raise
+            finally:
+                with self._lock:
+                    self.waiting -= 1
+
+    def settle(self, estimated: int, actual):
+        #charge the difference between the estimate and the provider's reported usage
+        if actual is None:
+            return
+        with self._lock:
+            self.tokens.level -= actual - min(estimated, self.tokens.capacity)
+
+    def pause(self, seconds: float):
+        #the provider answered 429 anyway (another process, a smaller quota than configured)
+        with self._lock:
+            self.provider_429s += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def stats(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            self.requests.refill(now)
+            self.tokens.refill(now)
+            waits = sorted(self._waits)
+            waited = [w for w in waits if w > 0]
+            return {
+                "rpm": self.requests.capacity,
+                "tpm": self.tokens.capacity,
+                "requests_available": round(self.requests.level, 2),
+                "tokens_available": round(self.tokens.level),
+                "waiting": self.waiting,
+                "max_waiting": self.max_waiting,
+                "max_queue": self.max_queue,
+                "admitted": self.admitted,
+                "shed": self.shed,
+                "provider_429s": self.provider_429s,
+                "paused_for_seconds": round(max(0.0, self._paused_until - now), 2),
+                "waited_ratio": round(len(waited) / len(waits), 4) if waits else 0.0,
+                "wait_ms_p50": round(waits[len(waits) // 2] * 1000, 1) if waits else 0.0,
+                "wait_ms_p95": round(waits[max(0, math.ceil(len(waits) * 0.95) - 1)] * 1000, 1) if waits else 0.0,
+                "wait_ms_max": round(waits[-1] * 1000, 1) if waits else 0.0
+            }
+
+
+llm_limiter = RateLimiter()
@@ -0,0 +1,242 @@
+#backend/services/report_jobs.py
+import os
+import sys
+import time
+import random
+import logging
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+
+"""
+    durable background jobs for session finalization.
+    finalize_session only commits the session/appointment change and inserts a
+    report_jobs row; worker threads pick pending rows up, render the pdf and
+    email it to the doctor, retrying with exponential backoff. because the job
+    state lives in the database, jobs left over after a restart are picked up
+    again, and a job stuck in "running" by a crashed worker is reclaimed once
+    its lock goes stale.
+    """
+
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", "2"))
+REPORT_JOB_MAX_ATTEMPTS = int(os.getenv("REPORT_JOB_MAX_ATTEMPTS", "5"))
+REPORT_RETRY_BASE_SECONDS = float(os.getenv("REPORT_RETRY_BASE_SECONDS", "5"))
+REPORT_RETRY_MAX_SECONDS = float(os.getenv("REPORT_RETRY_MAX_SECONDS", "600"))
+REPORT_POLL_SECONDS = float(os.getenv("REPORT_POLL_SECONDS", "2"))
+REPORT_JOB_STALE_SECONDS = float(os.getenv("REPORT_JOB_STALE_SECONDS", "300"))
+
+if __name__ == "__main__":
+    #add project root to python path when run as a standalone worker
+    sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+    from dotenv import load_dotenv
+    load_dotenv()
+
+from sqlalchemy import or_, and_
+
+from backend.app.database import SessionLocal
+from backend.app import model
+from backend.services.pdf_generator import generate_summary_pdf
+from backend.services.email_service import send_report_email
+from backend.services.report_store import store_report
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_report_job(db, session_id: int):
+    #added to the caller's transaction so the job exists iff the finalize commit succeeds
+    job = model.ReportJob(
+        session_id=session_id,
+        status="pending",
+        attempts=0,
+        max_attempts=REPORT_JOB_MAX_ATTEMPTS,
+        next_run_at=datetime.now(),
+        email_sent=False
+    )
+    db.add(job)
+    return job
+
+
+def job_to_dict(job) -> dict:
+    return {
+        "id": job.id,
+        "session_id": job.session_id,
+        "status": job.status,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "next_run_at": job.next_run_at,
+        "pdf_generated": bool(job.pdf_path),
+        "email_sent": job.email_sent,
+        "last_error": job.last_error,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at
+    }
+
+
+def retry_delay(attempts: int) -> float:
+    #exponential backoff with jitter: base, 2*base, 4*base ... capped
+    delay = min(REPORT_RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0)), REPORT_RETRY_MAX_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def claim_next_job(db):
+    #claim one due job; SKIP LOCKED lets several workers poll the same table safely
+    now = datetime.now()
+    stale_before = now - timedelta(seconds=REPORT_JOB_STALE_SECONDS)
+
+    job = db.query(model.ReportJob).filter(
+        or_(
+            and_(model.ReportJob.status == "pending", model.ReportJob.next_run_at <= now),
+            and_(model.ReportJob.status == "running", model.ReportJob.locked_at < stale_before)
+        )
+    ).order_by(
+        model.ReportJob.next_run_at
+    ).with_for_update(skip_locked=True).first()
+
+    if not job:
+        db.rollback()
+        return None
+
+    #conditional update so only one worker wins even where SKIP LOCKED isn't available
+    claimed = db.query(model.ReportJob).filter(
+        model.ReportJob.id == job.id,
+        model.ReportJob.status == job.status,
+        model.ReportJob.attempts == job.attempts
+    ).update({
+        model.ReportJob.status: "running",
+        model.ReportJob.attempts: model.ReportJob.attempts + 1,
+        model.ReportJob.locked_at: now
+    }, synchronize_session=False)
+    db.commit()
+
+    if claimed != 1:
+        return None
+
+    db.refresh(job)
+    return job
+
+
+def process_job(db, job):
+    #render the pdf (once) and send the email (once), each step is skipped if already done
+    session = job.session
+
+    symptom_list = session.summary_content.get("symptoms", [])
+
+    patient_name = "patient"
+    if session.appointment and session.appointment.user:
+        patient_name = session.appointment.user.full_name
+
+    pdf_bytes = None
+    if not job.pdf_path or not os.path.exists(job.pdf_path):
+        logger.debug("🔄 Generating PDF for session %d (job %d)", job.session_id, job.id)
+        pdf_bytes = generate_summary_pdf(job.session_id, patient_name, symptom_list)
+
+        #written atomically and indexed by session for download_pdf
+        report = store_report(db, job.session_id, pdf_bytes)
+        job.pdf_path = report.file_path
+        db.commit()
+
+    if not job.email_sent:
+        email_result = send_report_email(job.pdf_path, patient_name, job.session_id, pdf_bytes=pdf_bytes)
+        if not email_result.get("success"):
+            raise RuntimeError(email_result.get("message", "Email not sent"))
+        job.email_sent = True
+        db.commit()
+
+
+def run_one_job() -> bool:
+    #returns True if a job was claimed, so the caller can poll again straight away
+    db = SessionLocal()
+    try:
+        job = claim_next_job(db)
+        if not job:
+            return False
+
+        try:
+            process_job(db, job)
+            job.status = "succeeded"
+            job.last_error = None
+            job.locked_at = None
+            db.commit()
+            logger.info("✅ Report job %d for session %d succeeded", job.id, job.session_id,
+                        extra={"session_id": job.session_id, "job_id": job.id})
+
+        except Exception as e:
+            db.rollback()
+            job.last_error = str(e)[:2000]
+            job.locked_at = None
+
+            if job.attempts >= job.max_attempts:
+                job.status = "failed"
+                logger.error("❌ Report job %d failed permanently: %s", job.id, e,
+                             extra={"session_id": job.session_id, "job_id": job.id})
+            else:
+                delay = retry_delay(job.attempts)
+                job.status = "pending"
+                job.next_run_at = datetime.now() + timedelta(seconds=delay)
+                logger.warning("⚠️ Report job %d attempt %d failed, retrying in %.0fs: %s", job.id, job.attempts, delay, e,
+                               extra={"session_id": job.session_id, "job_id": job.id})
+            db.commit()
+
+        return True
+
+    finally:
+        db.close()
+
+
+class ReportWorkerPool:
+
+    def __init__(self, size: int = REPORT_WORKERS):
+        self.size = size
+        self._threads = []
+        self._stop = threading.Event()
+        self._wake = threading.Condition()
+
+    def start(self):
+        if self._threads or self.size <= 0:
+            return
+        self._stop.clear()
+        for i in range(self.size):
+            thread = threading.Thread(target=self._loop, name=f"report-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info("🧵 Started %d report worker(s)", self.size)
+
+    def stop(self, timeout: float = 10):
+        self._stop.set()
+        self.notify()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def notify(self):
+        #wake idle workers, e.g. right after a session was finalized
+        with self._wake:
+            self._wake.notify_all()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                if run_one_job():
+                    continue
+            except Exception as e:
+                logger.exception("⚠️ Report worker error: %s", e)
+
+            with self._wake:
+                self._wake.wait(REPORT_POLL_SECONDS)
+
+
+report_workers = ReportWorkerPool()
+
+
+if __name__ == "__main__":
+    #run workers in their own process (set REPORT_WORKERS=0 on the api to disable in-process workers)
+    from backend.app.logging_config import setup_logging, stop_logging
+    setup_logging()
+    pool = ReportWorkerPool(int(sys.argv[1]) if len(sys.argv) > 1 else max(REPORT_WORKERS, 1))
+    pool.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pool.stop()
+        stop_logging()
@@ -0,0 +1,129 @@
+#backend/services/report_store.py
+import os
+import re
+import sys
+import hashlib
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+"""
+    stores rendered pdf reports on disk and records where each one is
+    (path, size, sha256) in the reports table, keyed by session. downloads
+    look the report up by session_id instead of scanning the reports directory.
+    run this file with --backfill once to index reports written before the
+    reports table existed.
+    """
+
+REPORT_DIR = "reports"
+
+if __name__ == "__main__":
+    sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+    from dotenv import load_dotenv
+    load_dotenv()
+
+from backend.app import model
+
+
+def write_atomically(path: str, data: bytes):
+    #write to a temp file in the same directory then rename, readers never see a partial pdf
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp_", suffix=".pdf")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def report_filename(session_id: int) -> str:
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    return f"symptom_report_{session_id}_{timestamp}.pdf"
+
+
+def record_report(db, session_id: int, file_path: str, size_bytes: int, sha256: str):
+    #insert or update the session's report row, the caller commits
+    report = db.query(model.Report).filter(
+        model.Report.session_id == session_id
+    ).first()
+
+    if report:
+        report.file_path = file_path
+        report.size_bytes = size_bytes
+        report.sha256 = sha256
+    else:
+        report = model.Report(
+            session_id=session_id,
+            file_path=file_path,
+            size_bytes=size_bytes,
+            sha256=sha256
+        )
+        db.add(report)
+    return report
+
+
+def store_report(db, session_id: int, pdf_bytes: bytes, report_dir: str = REPORT_DIR):
+    file_path = os.path.join(report_dir, report_filename(session_id))
+    write_atomically(file_path, pdf_bytes)
+    return record_report(db, session_id, file_path, len(pdf_bytes), hashlib.sha256(pdf_bytes).hexdigest())
+
+
+def get_report(db, session_id: int):
+    return db.query(model.Report).filter(
+        model.Report.session_id == session_id
+    ).first()
+
+
+def backfill_reports(db, report_dir: str = REPORT_DIR) -> int:
+    #index pdfs written before the reports table existed, newest file per session wins
+    pattern = re.compile(r"^symptom_report_(\d+)_(\d{8}_\d{6})\.pdf$")
+    newest = {}
+    for name in os.listdir(report_dir):
+        match = pattern.match(name)
+        if match:
+            session_id = int(match.group(1))
+            if session_id not in newest or name > newest[session_id]:
+                newest[session_id] = name
+
+    indexed = {
+        row.session_id for row in db.query(model.Report.session_id).filter(
+            model.Report.session_id.in_(list(newest))
+        )
+    } if newest else set()
+    existing_sessions = {
+        row.id for row in db.query(model.Session.id).filter(
+            model.Session.id.in_(list(newest))
+        )
+    } if newest else set()
+
+    count = 0
+    for session_id, name in newest.items():
+        if session_id in indexed or session_id not in existing_sessions:
+            continue
+        path = os.path.join(report_dir, name)
+        with open(path, "rb") as f:
+            data = f.read()
+        record_report(db, session_id, path, len(data), hashlib.sha256(data).hexdigest())
+        count += 1
+
+    db.commit()
+    return count
+
+
+if __name__ == "__main__":
+    from backend.app.database import SessionLocal
+
+    if "--backfill" in sys.argv:
+        db = SessionLocal()
+        try:
+            print(f"✅ Indexed {backfill_reports(db)} existing report(s)")
+        finally:
+            db.close()
+    else:
+        print("usage: python -m backend.services.report_store --backfill")
@@ -0,0 +1,192 @@
+#backend/services/symptom_store.py
+import sys
+from pathlib import Path
+
+"""
+    per-symptom storage for the interview. every symptom a patient reports is
+    a row in symptoms keyed by (session_id, position), carrying a bitmask of
+    the fields known so far. a chat turn diffs the extracted state against the
+    session's rows and writes only what changed (an UPDATE of the changed
+    columns of a changed symptom, an INSERT for a new one) instead of
+    rewriting the whole summaries json every turn.
+    the json summary is still there as Session.summary_content, a view over the
+    rows. sessions that only have the old summaries json are backfilled by
+    their next chat turn; run this file with --backfill to convert them all.
+    """
+
+if __name__ == "__main__":
+    sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+    from dotenv import load_dotenv
+    load_dotenv()
+
+import logging
+from sqlalchemy import select, exists
+from backend.app import model
+
+logger = logging.getLogger(__name__)
+
+#completeness bits
+NAME, SEVERITY, DURATION, FREQUENCY = 1, 2, 4, 8
+COMPLETE = NAME | SEVERITY | DURATION | FREQUENCY
+
+#missing details are asked for in this order
+DETAIL_FIELDS = ((SEVERITY, "severity"), (DURATION, "duration"), (FREQUENCY, "frequency"))
+
+#what the extractor puts in "symptom" when the patient hasn't named one yet
+PLACEHOLDER_NAMES = ("yes", "no", "other", "symptom")
+
+
+def completeness(entry: dict) -> int:
+    name = entry.get("symptom")
+    mask = NAME if name and str(name).lower() not in PLACEHOLDER_NAMES else 0
+    for bit, field in DETAIL_FIELDS:
+        if entry.get(field):
+            mask |= bit
+    return mask
+
+
+def next_missing(masks: list):
+    #(index, field) to ask about next: the first unnamed symptom, else the newest symptom
+    #with a missing detail. None once every symptom is complete
+    for i, mask in enumerate(masks):
+        if not mask & NAME:
+            return i, "symptom"
+    for i in range(len(masks) - 1, -1, -1):
+        for bit, field in DETAIL_FIELDS:
+            if not masks[i] & bit:
+                return i, field
+    return None
+
+
+def current_symptom(rows: list):
+    #the symptom being asked about, from the stored masks without looking at the fields
+    missing = next_missing([row.completeness for row in rows])
+    return rows[missing[0]].name if missing else None
+
+
+def _text(value, field: str, length: int):
+    #values longer than the column are cut to fit, with a warning so the loss is visible
+    if value is None or value == "":
+        return None
+    text = str(value)
+    if len(text) > length:
+        logger.warning("✂️ Symptom %s truncated from %d to %d characters", field, len(text), length,
+                       extra={"field": field, "length": len(text)})
+        text = text[:length]
+    return text
+
+
+def _column_values(entry: dict) -> dict:
+    name = _text(entry.get("symptom"), "symptom", 100)
+    values = {
+        "name": name,
+        "name_key": name.strip().lower() if name else None,
+        "severity": _text(entry.get("severity"), "severity", 50),
+        "duration": _text(entry.get("duration"), "duration", 100),
+        "frequency": _text(entry.get("frequency"), "frequency", 100)
+    }
+    #from the stored values, so the mask always agrees with what the row says
+    values["completeness"] = completeness({
+        "symptom": values["name"], "severity": values["severity"],
+        "duration": values["duration"], "frequency": values["frequency"]
+    })
+    return values
+
+
+def apply_state(db, session_id: int, rows: list, state: dict) -> list:
+    #bring the session's rows (ordered by position) in line with state, touching only what
+    #changed. new symptoms are added to db; rows past the end of the new list are returned
+    #for the caller to delete (sync and async sessions delete differently)
+    symptoms = (state or {}).get("symptoms") or []
+    for position, entry in enumerate(symptoms):
+        values = _column_values(entry)
+        if position < len(rows):
+            row = rows[position]
+            for key, value in values.items():
+                if getattr(row, key) != value:
+                    setattr(row, key, value)
+        else:
+            db.add(model.Symptom(session_id=session_id, position=position, **values))
+    return rows[len(symptoms):]
+
+
+def _rows_query(session_id: int):
+    return select(model.Symptom).filter(model.Symptom.session_id == session_id).order_by(model.Symptom.position)
+
+
+async def load_state(db, session_id: int) -> tuple:
+    #(rows, state) for a chat turn. a session without rows yet falls back to its old summaries
+    #json (None if it has neither), which the turn's save_state then writes out as rows
+    result = await db.execute(_rows_query(session_id))
+    rows = list(result.scalars().all())
+    if rows:
+        return rows, {"symptoms": [row.as_dict() for row in rows]}
+
+    result = await db.execute(
+        select(model.Summary.summary_content).filter(model.Summary.session_id == session_id)
+    )
+    return rows, result.scalar()
+
+
+async def save_state(db, session_id: int, state: dict):
+    #stages the changes, the caller commits. overlapping turns on one session (a stream and its
+    #retry) would both insert the same new position, so the session row is locked until that
+    #commit and the rows are re-read under the lock: the later turn diffs against the earlier one.
+    #the re-read is a locking read too, so it sees the earlier turn's commit rather than a snapshot
+    await db.execute(select(model.Session.id).filter(model.Session.id == session_id).with_for_update())
+    result = await db.execute(
+        _rows_query(session_id).with_for_update().execution_options(populate_existing=True)
+    )
+    for row in apply_state(db, session_id, list(result.scalars().all()), state):
+        await db.delete(row)
+
+
+def symptom_lists(db, session_ids: list) -> dict:
+    #session_id -> symptom list for many sessions in one query (one more for old sessions
+    #that only have summaries json)
+    lists = {}
+    rows = db.query(model.Symptom).filter(
+        model.Symptom.session_id.in_(session_ids)
+    ).order_by(model.Symptom.session_id, model.Symptom.position)
+    for row in rows:
+        lists.setdefault(row.session_id, []).append(row.as_dict())
+
+    legacy = [session_id for session_id in session_ids if session_id not in lists]
+    if legacy:
+        summaries = db.query(model.Summary.session_id, model.Summary.summary_content).filter(
+            model.Summary.session_id.in_(legacy)
+        )
+        for session_id, content in summaries:
+            lists[session_id] = (content or {}).get("symptoms", [])
+    return lists
+
+
+def backfill_symptoms(db, batch_size: int = 500) -> int:
+    #write rows for every session that only has the old summaries json
+    count = 0
+    last_id = 0
+    while True:
+        summaries = db.query(model.Summary.id, model.Summary.session_id, model.Summary.summary_content).filter(
+            model.Summary.id > last_id,
+            ~exists().where(model.Symptom.session_id == model.Summary.session_id)
+        ).order_by(model.Summary.id).limit(batch_size).all()
+        if not summaries:
+            return count
+        last_id = summaries[-1].id
+        for summary in summaries:
+            apply_state(db, summary.session_id, [], summary.summary_content)
+            count += 1
+        db.commit()
+
+
+if __name__ == "__main__":
+    from backend.app.database import SessionLocal
+
+    if "--backfill" in sys.argv:
+        db = SessionLocal()
+        try:
+            print(f"✅ Converted {backfill_symptoms(db)} session summary(ies) to symptom rows")
+        finally:
+            db.close()
+    else:
+        print("usage: python -m backend.services.symptom_store --backfill")
@@ -0,0 +1,266 @@
+import os
+import time
+import struct
+import tempfile
+import subprocess
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from backend.services.metrics import span
+from backend.services.bounded_pool import BoundedPool, PoolOverloaded
+
+if TYPE_CHECKING:
+    #imported for annotations only, transcribe_pcm loads it on first use
+    import speech_recognition as sr
+
+"""
+    speech to text for patient voice notes.
+    decoding, conversion and recognition are blocking (ffmpeg subprocess,
+    audio processing, a network call to the recognizer), so they run on a
+    dedicated bounded pool instead of the event loop. once TRANSCRIBE_MAX_QUEUE
+    jobs are waiting or running, new ones are rejected so the route can shed
+    load with a 503.
+    the recognizer is pluggable: TRANSCRIBE_ENGINE=google (default) or
+    TRANSCRIBE_ENGINE=stub for offline load tests.
+    audio is decoded in memory: wav uploads are parsed directly, streamable
+    formats are piped through ffmpeg (stdin -> stdout), and mp4/m4a (the mobile
+    app's recordings, whose index ffmpeg has to seek to) go to ffmpeg as a
+    temp file straight away. the wav that comes back is downmixed and resampled
+    once to 16 kHz mono 16-bit pcm with numpy and handed to the recognizer.
+    streamed voice input (sessions /transcribe-stream) is already in that
+    format and goes through transcribe_pcm one vad segment at a time.
+    """
+
+TRANSCRIBE_WORKERS = int(os.getenv("TRANSCRIBE_WORKERS", "4"))
+TRANSCRIBE_MAX_QUEUE = int(os.getenv("TRANSCRIBE_MAX_QUEUE", "16"))
+TRANSCRIBE_ENGINE = os.getenv("TRANSCRIBE_ENGINE", "google")
+STUB_TRANSCRIBE_LATENCY = float(os.getenv("STUB_TRANSCRIBE_LATENCY", "0.3"))
+STUB_TRANSCRIBE_TEXT = os.getenv("STUB_TRANSCRIBE_TEXT", "I have had a headache for two days")
+STUB_TRANSCRIBE_RTF = float(os.getenv("STUB_TRANSCRIBE_RTF", "0"))  #extra seconds per second of audio
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+
+#what the recognizer gets: 16 kHz mono 16-bit pcm
+TARGET_RATE = 16000
+TARGET_WIDTH = 2
+
+#iso media containers: ffmpeg can't read these from a pipe when the index (moov) is written
+#after the audio, which is how phones record them
+SEEKABLE_EXTENSIONS = (".m4a", ".mp4", ".m4b", ".mov", ".3gp", ".3g2")
+
+
+class TranscriptionError(Exception):
+    #the recognizer could not make out any speech
+    pass
+
+
+class RecognizerUnavailable(Exception):
+    #the recognizer service could not be reached
+    pass
+
+
+class TranscriptionOverloaded(PoolOverloaded):
+    #too many transcriptions already queued
+    pass
+
+
+class Recognizer:
+
+    name = "base"
+
+    def transcribe(self, audio_data: "sr.AudioData") -> str:
+        raise NotImplementedError
+
+
+class GoogleRecognizer(Recognizer):
+
+    name = "google"
+
+    def __init__(self, language: str = "en-US"):
+        self.language = language
+
+    def transcribe(self, audio_data: "sr.AudioData") -> str:
+        import speech_recognition as sr
+        try:
+            return sr.Recognizer().recognize_google(audio_data, language=self.language)
+        except sr.UnknownValueError:
+            raise TranscriptionError("Could not understand audio")
+        except sr.RequestError as e:
+            raise RecognizerUnavailable(str(e))
+
+
+class StubRecognizer(Recognizer):
+
+    #offline engine for load tests: canned text, latency of a fixed part plus
+    #STUB_TRANSCRIBE_RTF per second of audio like a real recognizer
+
+    name = "stub"
+
+    def __init__(self, latency: float = STUB_TRANSCRIBE_LATENCY, text: str = STUB_TRANSCRIBE_TEXT,
+                 real_time_factor: float = STUB_TRANSCRIBE_RTF):
+        self.latency = latency
+        self.text = text
+        self.real_time_factor = real_time_factor
+
+    def transcribe(self, audio_data: "sr.AudioData") -> str:
+        duration = len(audio_data.frame_data) / (audio_data.sample_rate * audio_data.sample_width)
+        time.sleep(self.latency + self.real_time_factor * duration)
+        if not audio_data.frame_data:
+            raise TranscriptionError("Empty audio")
+        return self.text
+
+
+RECOGNIZERS = {
+    "google": GoogleRecognizer,
+    "stub": StubRecognizer,
+}
+
+_recognizer = None
+
+
+def get_recognizer() -> Recognizer:
+    global _recognizer
+    if _recognizer is None:
+        if TRANSCRIBE_ENGINE not in RECOGNIZERS:
+            raise RuntimeError(f"Unknown TRANSCRIBE_ENGINE '{TRANSCRIBE_ENGINE}'")
+        _recognizer = RECOGNIZERS[TRANSCRIBE_ENGINE]()
+    return _recognizer
+
+
+def parse_wav(data: bytes):
+    #returns (sample_rate, channels, sample_width, pcm memoryview) without copying the samples.
+    #tolerates the placeholder sizes ffmpeg writes when its wav output is a pipe
+    if len(data) < 12 or data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        raise ValueError("Not a WAV file")
+
+    view = memoryview(data)
+    offset = 12
+    fmt = None
+    while offset + 8 <= len(data):
+        chunk_id = data[offset:offset + 4]
+        chunk_size = struct.unpack_from("<I", data, offset + 4)[0]
+        body = offset + 8
+
+        if chunk_id == b"fmt ":
+            audio_format, channels, rate, _, _, bits = struct.unpack_from("<HHIIHH", data, body)
+            if audio_format not in (1, 0xFFFE):  #pcm / wave_format_extensible
+                raise ValueError(f"Unsupported WAV encoding {audio_format}")
+            fmt = (rate, channels, bits // 8)
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("WAV data before fmt chunk")
+            end = len(data) if chunk_size in (0, 0xFFFFFFFF) else min(body + chunk_size, len(data))
+            rate, channels, width = fmt
+            end -= (end - body) % (channels * width)  #drop a trailing partial frame
+            return rate, channels, width, view[body:end]
+
+        offset = body + chunk_size + (chunk_size & 1)
+
+    raise ValueError("WAV file has no data chunk")
+
+
+def pcm_to_mono_float(pcm, channels: int, width: int) -> np.ndarray:
+    #interleaved integer pcm -> mono float32 in [-1, 1]
+    if width == 1:
+        ints, offset, scale = np.frombuffer(pcm, dtype=np.uint8), 128.0, 128.0
+    elif width == 2:
+        ints, offset, scale = np.frombuffer(pcm, dtype="<i2"), 0.0, 32768.0
+    elif width == 3:
+        raw = np.frombuffer(pcm, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        ints = raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)
+        ints, offset, scale = np.where(ints & 0x800000, ints - 0x1000000, ints), 0.0, 8388608.0
+    elif width == 4:
+        ints, offset, scale = np.frombuffer(pcm, dtype="<i4"), 0.0, 2147483648.0
+    else:
+        raise ValueError(f"Unsupported sample width {width}")
+
+    #downmix straight from the integer view, no interleaved float copy
+    if channels > 1:
+        samples = ints.reshape(-1, channels).sum(axis=1, dtype=np.float32) / channels
+    else:
+        samples = ints.astype(np.float32)
+    return (samples - offset) / scale
+
+
+def resample(samples: np.ndarray, src_rate: int, dst_rate: int = TARGET_RATE) -> np.ndarray:
+    if src_rate == dst_rate or samples.size == 0:
+        return samples
+
+    if src_rate > dst_rate:
+        #windowed-sinc low-pass at the new nyquist so downsampling doesn't alias
+        #(speech sits well below 6 kHz, the margin buys a short filter)
+        taps = 101
+        cutoff = 0.4 * dst_rate / src_rate
+        n = np.arange(taps) - (taps - 1) / 2
+        kernel = (2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(taps)).astype(np.float32)
+        samples = np.convolve(samples, kernel / kernel.sum(), mode="same")
+
+    #linear interpolation at the output positions only, arrays stay output-sized
+    positions = np.arange(samples.size * dst_rate // src_rate, dtype=np.float64) * (src_rate / dst_rate)
+    left = positions.astype(np.int64)
+    frac = (positions - left).astype(np.float32)
+    right = np.minimum(left + 1, samples.size - 1)
+    return samples[left] * (1.0 - frac) + samples[right] * frac
+
+
+def needs_seekable_input(content: bytes, file_extension: str) -> bool:
+    #iso media files start with a box size and "ftyp", whatever the upload was named
+    return content[4:8] == b"ftyp" or (file_extension or "").lower() in SEEKABLE_EXTENSIONS
+
+
+def ffmpeg_to_wav(content: bytes, file_extension: str) -> bytes:
+    #decode any container/codec to wav, one ffmpeg run: streamable formats through stdin,
+    #mp4/m4a from a temp file ffmpeg can seek in. the wav always comes back through stdout
+    command = [FFMPEG_BINARY, "-hide_banner", "-loglevel", "error",
+               "-i", "pipe:0", "-f", "wav", "-acodec", "pcm_s16le", "pipe:1"]
+    if needs_seekable_input(content, file_extension):
+        with tempfile.NamedTemporaryFile(suffix=file_extension) as source:
+            source.write(content)
+            source.flush()
+            command[command.index("pipe:0")] = source.name
+            result = subprocess.run(command, capture_output=True)
+    else:
+        result = subprocess.run(command, input=content, capture_output=True)
+
+    if result.returncode != 0 or not result.stdout:
+        raise ValueError(f"Could not decode audio: {result.stderr.decode(errors='ignore').strip()}")
+    return result.stdout
+
+
+def decode_audio(content: bytes, file_extension: str) -> bytes:
+    #any upload -> 16 kHz mono 16-bit pcm bytes
+    if content[:4] != b"RIFF":
+        content = ffmpeg_to_wav(content, file_extension)
+
+    rate, channels, width, pcm = parse_wav(content)
+    samples = resample(pcm_to_mono_float(pcm, channels, width), rate)
+    return (np.clip(samples, -1.0, 1.0) * 32767.0).astype("<i2").tobytes()
+
+
+@span("transcription")
+def transcribe_pcm(pcm: bytes) -> str:
+    #16 kHz mono 16-bit pcm -> text, blocking like transcribe_bytes
+    import speech_recognition as sr
+    return get_recognizer().transcribe(sr.AudioData(pcm, TARGET_RATE, TARGET_WIDTH))
+
+
+def transcribe_bytes(content: bytes, file_extension: str) -> str:
+    #blocking: runs on the transcription pool, never on the event loop
+    return transcribe_pcm(decode_audio(content, file_extension))
+
+
+class TranscriptionPool(BoundedPool):
+
+    overloaded = TranscriptionOverloaded
+    overloaded_message = "Transcription queue is full"
+
+    def __init__(self, workers: int = TRANSCRIBE_WORKERS, max_queue: int = TRANSCRIBE_MAX_QUEUE):
+        super().__init__(workers, max_queue, thread_name_prefix="transcribe")
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats["engine"] = TRANSCRIBE_ENGINE
+        return stats
+
+
+transcription_pool = TranscriptionPool()
@@ -0,0 +1,121 @@
+import os
+from collections import deque
+
+import numpy as np
+
+"""
+    energy-based voice activity detection for streamed voice input.
+    audio arrives as 16 kHz mono 16-bit pcm in arbitrary sized chunks; it is
+    cut into short frames and each frame's level (dBFS) is compared against
+    an adaptive noise floor. a segment opens on the first loud frame (keeping
+    a little pre-roll so the first syllable isn't clipped) and closes after
+    VAD_SILENCE_MS of quiet, or at VAD_MAX_SEGMENT_SECONDS so long monologues
+    are still transcribed piece by piece. segments with less than
+    VAD_MIN_SPEECH_MS of speech (clicks, coughs) are dropped.
+    """
+
+VAD_FRAME_MS = int(os.getenv("VAD_FRAME_MS", "30"))
+VAD_THRESHOLD_DB = float(os.getenv("VAD_THRESHOLD_DB", "12"))  #above the noise floor
+VAD_MIN_LEVEL_DB = float(os.getenv("VAD_MIN_LEVEL_DB", "-50"))  #anything quieter is never speech
+VAD_SILENCE_MS = int(os.getenv("VAD_SILENCE_MS", "600"))
+VAD_MIN_SPEECH_MS = int(os.getenv("VAD_MIN_SPEECH_MS", "200"))
+VAD_PREROLL_MS = int(os.getenv("VAD_PREROLL_MS", "200"))
+VAD_MAX_SEGMENT_SECONDS = float(os.getenv("VAD_MAX_SEGMENT_SECONDS", "15"))
+
+#noise floor starts at a quiet room and follows the audio: quickly down, slowly up
+INITIAL_NOISE_DB = -60.0
+NOISE_FALL = 0.5
+NOISE_RISE_QUIET = 0.05
+NOISE_RISE_SPEECH = 0.002
+
+
+def frame_levels(frames: np.ndarray) -> np.ndarray:
+    #(n_frames, frame_samples) int16 -> rms level of each frame in dBFS
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1)) / 32768.0
+    return 20.0 * np.log10(rms + 1e-10)
+
+
+class EnergyVAD:
+
+    def __init__(self, sample_rate: int = 16000, frame_ms: int = VAD_FRAME_MS):
+        self.frame_bytes = sample_rate * frame_ms // 1000 * 2
+        self.threshold_db = VAD_THRESHOLD_DB
+        self.silence_frames = max(1, VAD_SILENCE_MS // frame_ms)
+        self.min_speech_frames = max(1, VAD_MIN_SPEECH_MS // frame_ms)
+        self.max_segment_bytes = int(VAD_MAX_SEGMENT_SECONDS * sample_rate) * 2
+        self.noise_db = INITIAL_NOISE_DB
+
+        self._pending = bytearray()  #bytes not yet making up a whole frame
+        self._preroll = deque(maxlen=max(1, VAD_PREROLL_MS // frame_ms))
+        self._segment = bytearray()
+        self._speech_frames = 0
+        self._quiet_run = 0
+        self.in_speech = False
+
+    def _is_speech(self, level: float) -> bool:
+        speech = level > VAD_MIN_LEVEL_DB and level > self.noise_db + self.threshold_db
+
+        if level < self.noise_db:
+            self.noise_db += (level - self.noise_db) * NOISE_FALL
+        else:
+            rise = NOISE_RISE_SPEECH if speech else NOISE_RISE_QUIET
+            self.noise_db += (level - self.noise_db) * rise
+        return speech
+
+    def _close_segment(self):
+        #returns the finished segment, or None if it was too little speech to bother with
+        segment = bytes(self._segment) if self._speech_frames >= self.min_speech_frames else None
+        self._segment = bytearray()
+        self._speech_frames = 0
+        self._quiet_run = 0
+        self.in_speech = False
+        return segment
+
+    def feed(self, pcm: bytes) -> list:
+        #add audio, returns the segments that finished inside it
+        self._pending += pcm
+        usable = len(self._pending) - len(self._pending) % self.frame_bytes
+        if not usable:
+            return []
+
+        chunk = bytes(self._pending[:usable])
+        del self._pending[:usable]
+
+        frames = np.frombuffer(chunk, dtype="<i2").reshape(-1, self.frame_bytes // 2)
+        segments = []
+
+        for i, level in enumerate(frame_levels(frames)):
+            frame = chunk[i * self.frame_bytes:(i + 1) * self.frame_bytes]
+            speech = self._is_speech(float(level))
+
+            if not self.in_speech:
+                if speech:
+                    self.in_speech = True
+                    self._segment += b"".join(self._preroll)
+                    self._preroll.clear()
+                else:
+                    self._preroll.append(frame)
+                    continue
+
+            self._segment += frame
+            if speech:
+                self._speech_frames += 1
+                self._quiet_run = 0
+            else:
+                self._quiet_run += 1
+
+            if self._quiet_run >= self.silence_frames or len(self._segment) >= self.max_segment_bytes:
+                segment = self._close_segment()
+                if segment:
+                    segments.append(segment)
+
+        return segments
+
+    def flush(self):
+        #end of stream: returns the segment still open, if any
+        if not self.in_speech:
+            self._pending.clear()
+            return None
+        self._segment += self._pending[:len(self._pending) & ~1]
+        self._pending.clear()
+        return self._close_segment()
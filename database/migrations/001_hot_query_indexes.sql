@@ -0,0 +1,26 @@
+-- composite indexes for the hot queries, for databases created from an older
+-- preconsultationdb.sql. new databases get these from the dump / init_db.
+--
+--   messages:     WHERE session_id = ? ORDER BY created_at, id       (history, chat window)
+--   sessions:     WHERE appointment_id = ? AND ended_at IS NULL      (session start / resume)
+--   appointments: WHERE doctor_id = ? ORDER BY appointment_date, id  (doctor dashboard)
+--   appointments: WHERE access_code = ? AND status IN (...)          (already served by UNIQUE KEY `access_code`)
+--
+-- each composite starts with the foreign key column, so it also backs the foreign key
+-- and the single-column index it replaces can go in the same statement.
+-- idx_access_code duplicated the unique key on access_code and only cost writes.
+
+USE `preconsultationdb`;
+
+ALTER TABLE `messages`
+  ADD KEY `idx_messages_session_created` (`session_id`,`created_at`,`id`),
+  DROP KEY `idx_session_id`;
+
+ALTER TABLE `sessions`
+  ADD KEY `idx_sessions_appointment_ended` (`appointment_id`,`ended_at`),
+  DROP KEY `idx_appointment_id`;
+
+ALTER TABLE `appointments`
+  ADD KEY `idx_appointments_doctor_date` (`doctor_id`,`appointment_date`,`id`),
+  DROP KEY `idx_doctor_id`,
+  DROP KEY `idx_access_code`;
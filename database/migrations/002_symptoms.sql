@@ -0,0 +1,32 @@
+-- one row per reported symptom, for databases created from an older
+-- preconsultationdb.sql. new databases get this table from the dump / init_db.
+--
+--   symptoms: WHERE session_id = ? ORDER BY position          (chat turn, finalize, report)
+--   symptoms: WHERE session_id = ? AND completeness < 15      (dashboard incomplete=true)
+--   symptoms: WHERE name_key = ? AND session_id = ?           (dashboard symptom=...)
+--
+-- a chat turn now updates only the changed columns of the changed symptom rows instead
+-- of rewriting the summaries json. summaries is kept and still read for sessions that
+-- have no symptom rows yet; convert them all after applying this with
+--
+--   python -m backend.services.symptom_store --backfill
+
+USE `preconsultationdb`;
+
+CREATE TABLE `symptoms` (
+  `id` int NOT NULL AUTO_INCREMENT,
+  `session_id` int NOT NULL,
+  `position` smallint NOT NULL,
+  `name` varchar(100) COLLATE utf8mb4_unicode_ci DEFAULT NULL,
+  `name_key` varchar(100) COLLATE utf8mb4_unicode_ci DEFAULT NULL,
+  `severity` varchar(50) COLLATE utf8mb4_unicode_ci DEFAULT NULL,
+  `duration` varchar(100) COLLATE utf8mb4_unicode_ci DEFAULT NULL,
+  `frequency` varchar(100) COLLATE utf8mb4_unicode_ci DEFAULT NULL,
+  `completeness` smallint NOT NULL DEFAULT '0',
+  `updated_at` datetime DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `uq_symptoms_session_position` (`session_id`,`position`),
+  KEY `idx_symptoms_session_completeness` (`session_id`,`completeness`),
+  KEY `idx_symptoms_name_session` (`name_key`,`session_id`),
+  CONSTRAINT `fk_symptoms_session` FOREIGN KEY (`session_id`) REFERENCES `sessions` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -0,0 +1,7 @@
+#tests/conftest.py
+#run from the project root: python -m pytest -q
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
@@ -0,0 +1,78 @@
+#tests/test_chat_shed.py
+#a chat turn shed for llm quota after the user message was saved must take that message back out,
+#otherwise the 503 leaves an unanswered message behind and the patient's retry stores it twice
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from backend.app import model
+from backend.app.database import Base, get_async_db
+from backend.routers import chat
+from backend.services.conversation_cache import conversation_cache
+from backend.services.rate_limiter import LLMRateLimited
+
+
+@pytest.fixture
+def shed_chat(tmp_path, monkeypatch):
+    path = tmp_path / "chat.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(model.Session.__table__.insert().values(id=1, appointment_id=1, started_at=datetime(2026, 6, 1, 8, 0)))
+    engine.dispose()
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    LocalSession = async_sessionmaker(bind=async_engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_db():
+        async with LocalSession() as db:
+            yield db
+
+    async def shed_reply(*args, **kwargs):
+        raise LLMRateLimited("LLM quota exhausted", retry_after=3)
+
+    async def shed_stream(*args, **kwargs):
+        raise LLMRateLimited("LLM quota exhausted", retry_after=3)
+        yield  #an async generator, like stream_ai_response
+
+    monkeypatch.setattr(chat, "generate_ai_response", shed_reply)
+    monkeypatch.setattr(chat, "stream_ai_response", shed_stream)
+    monkeypatch.setattr(chat, "AsyncSessionLocal", LocalSession)
+    conversation_cache.invalidate(1)
+
+    app = FastAPI()
+    app.dependency_overrides[get_async_db] = override_db
+    app.include_router(chat.router)
+
+    def saved_messages():
+        check = create_engine(f"sqlite:///{path}")
+        with check.connect() as conn:
+            rows = conn.execute(select(model.Message.content)).scalars().all()
+        check.dispose()
+        return rows
+
+    yield TestClient(app), saved_messages
+    conversation_cache.invalidate(1)
+
+
+def test_shed_turn_leaves_no_message(shed_chat):
+    client, saved_messages = shed_chat
+    res = client.post("/1", json={"content": "my head hurts"})
+
+    assert res.status_code == 503
+    assert res.headers["Retry-After"] == "3"
+    assert saved_messages() == []
+    assert conversation_cache.get(1, None) is None
+
+
+def test_shed_stream_leaves_no_message(shed_chat):
+    client, saved_messages = shed_chat
+    res = client.post("/1/stream", json={"content": "my head hurts"})
+
+    assert res.status_code == 200
+    assert "event: error" in res.text
+    assert saved_messages() == []
@@ -0,0 +1,110 @@
+#tests/test_dashboard_queries.py
+#GET /appointments/dashboard must issue the same number of sql statements for every page,
+#whatever its size: a lazy load sneaking back into _dashboard_item would make it grow with the page
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.app import model
+from backend.app.database import Base, get_db, get_read_db
+from backend.routers import appointments
+from backend.services.auth_service import create_access_token
+
+APPOINTMENTS = 30
+#appointments joined to patients, sessions (with report job and old summary), symptoms
+STATEMENTS_PER_PAGE = 3
+
+
+@pytest.fixture
+def dashboard():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    LocalSession = sessionmaker(bind=engine)
+
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        #the doctor lookup for the bearer token is not part of the page
+        if "FROM doctors" not in statement:
+            statements.append(statement)
+
+    db = LocalSession()
+    doctor = model.Doctor(full_name="Test Doctor", email="doctor@example.com", password_hash="x")
+    db.add(doctor)
+    db.flush()
+    start_day = datetime(2026, 6, 1, 8, 0)
+    for i in range(APPOINTMENTS):
+        appointment = model.Appointment(
+            doctor_id=doctor.id, user=model.User(full_name=f"Patient {i}", email=f"patient{i}@example.com"),
+            status="completed" if i % 2 else "scheduled",
+            appointment_date=start_day + timedelta(minutes=10 * (i // 2)),
+            access_code=f"{i:08d}"
+        )
+        db.add(appointment)
+        if i % 3:
+            session = model.Session(appointment=appointment, started_at=appointment.appointment_date)
+            db.add(session)
+            if i % 3 == 1:
+                db.add(model.Symptom(session=session, position=0, name="Headache", name_key="headache",
+                                     severity="4", completeness=3))
+                db.add(model.ReportJob(session=session, status="succeeded"))
+            else:
+                #a session from before the symptoms table
+                db.add(model.Summary(session=session, summary_content={"symptoms": [{"symptom": "cough"}]}))
+    db.commit()
+    token = create_access_token({"sub": str(doctor.id)})
+    db.close()
+
+    def override_db():
+        session = LocalSession()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app = FastAPI()
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_read_db] = override_db
+    app.include_router(appointments.router)
+    client = TestClient(app, headers={"Authorization": f"Bearer {token}"})
+    yield client, statements
+    engine.dispose()
+
+
+def walk(client, statements, **params):
+    #every page by cursor: (appointment ids seen, statements per page)
+    seen, per_page = [], []
+    while True:
+        before = len(statements)
+        res = client.get("/appointments/dashboard", params=params)
+        assert res.status_code == 200
+        per_page.append(len(statements) - before)
+        page = res.json()
+        seen.extend(item["id"] for item in page["items"])
+        if not page["has_more"]:
+            return seen, per_page
+        params["cursor"] = page["next_cursor"]
+
+
+@pytest.mark.parametrize("limit", [3, 10, 30])
+def test_statements_per_page_do_not_grow_with_page_size(dashboard, limit):
+    client, statements = dashboard
+    seen, per_page = walk(client, statements, limit=limit)
+
+    assert sorted(seen) == sorted(set(seen)) and len(seen) == APPOINTMENTS
+    assert per_page == [STATEMENTS_PER_PAGE] * len(per_page)
+
+
+@pytest.mark.parametrize("params", [{"status": "completed"}, {"symptom": "Headache"}, {"incomplete": "true"}])
+def test_filters_keep_the_statement_count(dashboard, params):
+    client, statements = dashboard
+    seen, per_page = walk(client, statements, limit=5, **params)
+
+    assert seen
+    assert per_page == [STATEMENTS_PER_PAGE] * len(per_page)
@@ -0,0 +1,28 @@
+#tests/test_download_range.py
+#Range headers on the report download: one supported form, everything else ignored (rfc 9110)
+import pytest
+
+from backend.routers.sessions import _parse_range, _RangeNotSatisfiable
+
+SIZE = 100
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-9", (0, 9)),
+    ("bytes=5-", (5, 99)),
+    ("bytes=-5", (95, 99)),
+    ("bytes=90-200", (90, 99)),
+    #not supported or not valid: ignored, the whole file is sent
+    ("bytes=0-9,20-29", None),
+    ("items=0-9", None),
+    ("bytes=9-3", None),
+    ("bytes=-", None),
+])
+def test_parse_range(header, expected):
+    assert _parse_range(header, SIZE) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=100-", "bytes=150-160", "bytes=-0"])
+def test_unsatisfiable_single_range(header):
+    with pytest.raises(_RangeNotSatisfiable):
+        _parse_range(header, SIZE)
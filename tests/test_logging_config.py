@@ -0,0 +1,59 @@
+#tests/test_logging_config.py
+import io
+import sys
+import logging
+import threading
+
+from backend.app import logging_config
+from backend.app.logging_config import setup_logging, stop_logging, log_stats
+
+
+class StalledSink(io.StringIO):
+
+    #a terminal / log pipe that stops taking writes until released, so the bounded queue stays full
+
+    def __init__(self):
+        super().__init__()
+        self.writing = threading.Event()
+        self.release = threading.Event()
+
+    def write(self, text):
+        self.writing.set()
+        self.release.wait(timeout=10)
+        return super().write(text)
+
+
+def test_stop_logging_with_a_full_queue(monkeypatch):
+    sink = StalledSink()
+    monkeypatch.setattr(sys, "stdout", sink)
+    monkeypatch.setattr(logging_config, "LOG_QUEUE_SIZE", 5)
+    monkeypatch.setattr(logging_config, "LOG_LEVEL", "INFO")
+    setup_logging()
+
+    #the listener takes the first record and stalls on the sink, then the queue fills behind it
+    logger = logging.getLogger("tests.logging_config")
+    logger.info("record 0")
+    assert sink.writing.wait(timeout=5)
+    for i in range(1, 50):
+        logger.info("record %d", i)
+    assert log_stats() == {"queued": 5, "dropped": 44}
+
+    errors = []
+
+    def stop():
+        try:
+            stop_logging()
+        except Exception as e:
+            errors.append(e)
+
+    #shutdown starts while the queue is full, then the sink catches up
+    stopper = threading.Thread(target=stop)
+    stopper.start()
+    stopper.join(timeout=0.2)
+    sink.release.set()
+    stopper.join(timeout=10)
+
+    assert not stopper.is_alive()
+    assert errors == []
+    assert logging_config._listener is None
+    assert "record 5" in sink.getvalue()
@@ -0,0 +1,34 @@
+#tests/test_transcribe_stream.py
+#text frames on /transcribe-stream: only {"type": "end"} ends the recording,
+#anything that is not a json object is a protocol error with a fixed detail
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.routers import sessions
+from backend.routers.sessions import _control_message
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"type": "end"}', {"type": "end"}),
+    ('{"type": "ping"}', {"type": "ping"}),
+    ("5", None),
+    ('"x"', None),
+    ("[1, 2]", None),
+    ("null", None),
+    ("not json", None),
+])
+def test_control_message(text, expected):
+    assert _control_message(text) == expected
+
+
+@pytest.mark.parametrize("frame", ["5", '"x"', "not json"])
+def test_bad_text_frame_gets_a_fixed_error(frame):
+    app = FastAPI()
+    app.include_router(sessions.router)
+    client = TestClient(app)
+    with client.websocket_connect("/transcribe-stream") as ws:
+        ws.send_text(frame)
+        msg = ws.receive_json()
+
+    assert msg == {"type": "error", "detail": "Invalid message, text frames must be json objects."}